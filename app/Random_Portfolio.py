@@ -1,8 +1,10 @@
 import streamlit as st
-import plotly.express as px
+from charts import line_chart, zoom_window
 from backtester import random_ticks as random_ticks
 from backtester import given_portfolio as given_portfolio
 from backtester import SP500_tickers as SP500_tickers
+from backtester import portfolio_metrics as portfolio_metrics
+from metrics import METRICS
 
 st.set_page_config(page_title="Random portfolio tester", page_icon="📈")
 
@@ -50,19 +52,25 @@ st.write("ROI with **rebalancing**:", banch["REBALANCED"].iloc[-1])
 
 st.write("**SP500** index perfromance:", banch["SPY"].iloc[-1])
 
-# Create figure
-fig_banch = px.line(
-    banch,
+st.write("Equal-weight **universe** performance:", banch["UNIVERSE"].iloc[-1])
+
+st.write("**Risk** metrics:", portfolio_metrics(banch))
+
+# Create figure, downsampled to the screen width within the zoomed period
+start, end = zoom_window(banch.index, "zoom")
+
+fig_banch = line_chart(
+    banch.loc[start:end].drop(columns=METRICS),
     title="Banchmark: Portfolio cumulutive gain vs SP500 index",
 )
 
-fig_port = px.line(
-    portfolio / portfolio.iloc[0],
+fig_port = line_chart(
+    (portfolio / portfolio.iloc[0]).loc[start:end],
     title="Portfolio stocks cumulative gain",
 )
 
-fig_rebal = px.line(
-    rebalanced / rebalanced.iloc[0],
+fig_rebal = line_chart(
+    (rebalanced / rebalanced.iloc[0]).loc[start:end],
     title="Rebalanced portfolio stocks cumulative gain",
 )
 
@@ -0,0 +1,225 @@
+import numpy as np
+import pandas as pd
+
+import registry
+from load_data import segment as segment
+from load_data import spy_data as spy_data
+from load_data import sp500_data as sp500_data
+from load_data import sp500_valid as sp500_valid
+
+# read straight from the shared memory-mapped store, not through the DataFrame
+PRICES = segment["arrays"]["prices"]
+DATES = sp500_data.index
+
+# equal-weight universe benchmarks, cumulative so a window is the ratio of two rows, see universe
+UNIVERSE = segment["arrays"]["universe"]
+UNIVERSE_HOLD = segment["arrays"]["universe_hold"]
+UNIVERSE_YEARS = segment["arrays"]["universe_years"]
+
+# window-return index, the return of a window is a difference of two log prices, see prefix
+LOG_PRICES = segment["arrays"]["log_prices"]
+NEXT_PRICED = segment["arrays"]["next_priced"]
+LAST_PRICED = segment["arrays"]["last_priced"]
+
+
+def plan(tickers, start, end):
+    """Resolves a ticker query to row and column positions, before any price is read.
+
+    Args:
+        tickers (str): Hyphen-separated list of stock ticker symbols, a list of symbols or an array of their IDs, see registry.
+        start (datetime): The first date of the query.
+        end (datetime): The last date of the query, included.
+
+    Returns:
+        tuple: A tuple containing two elements:
+        - rows (slice): Rows of the dates in sp500_data
+        - ids (np.ndarray): Ticker IDs, in alphabetical order
+
+    Raises:
+        KeyError: If a ticker is not in the dataset.
+
+    Examples:
+        >>> rows, ids = plan('MSFT-AAPL', start, end)
+    """
+    ids = registry.parse(tickers) if isinstance(tickers, str) else tickers
+    ids = registry.to_ids(ids)
+    ids = ids[np.argsort(registry.SYMBOLS[ids], kind="stable")]
+
+    i, j = DATES.slice_locs(start, end)
+    return slice(i, j), ids
+
+
+def missing(rows, ids):
+    """Finds the tickers of a query with no price at all in its dates.
+
+    Only the validity bits of the queried block are read, see load_data.derived_indexes.
+
+    Args:
+        rows (slice): Rows of the query, see plan.
+        ids (np.ndarray): Ticker IDs of the query.
+
+    Returns:
+        np.ndarray: IDs of the tickers without data.
+    """
+    return ids[~sp500_valid[rows, ids].any(axis=0)]
+
+
+def read(rows, ids):
+    """Reads the prices of a query, keeping the days where every queried stock has a price.
+
+    Only the queried columns are copied out of the store, and NaN filtering runs on that block alone, so the result is the same as sp500_data.loc[start:end][tickers].dropna().
+
+    The block is returned as float64 whatever the storage type, see load_data.PRICE_DTYPE, so the portfolio engines accumulate in float64.
+
+    Args:
+        rows (slice): Rows of the query, see plan.
+        ids (np.ndarray): Ticker IDs of the query.
+
+    Returns:
+        pd.DataFrame: Stock prices with a UTC datetime index and the tickers as columns.
+
+    Examples:
+        >>> prices = read(*plan('AAPL-MSFT', start, end))
+    """
+    block = PRICES[rows, ids].astype(np.float64, copy=False)
+    complete = ~np.isnan(block).any(axis=1)
+
+    return pd.DataFrame(
+        block[complete],
+        index=DATES[rows][complete],
+        columns=pd.Index(registry.SYMBOLS[ids], name=sp500_data.columns.name),
+    )
+
+
+def benchmark(rows):
+    """Reads the SPY prices over the dates of a query.
+
+    Args:
+        rows (slice): Rows of the query, see plan.
+
+    Returns:
+        pd.DataFrame: SPY prices from the first to the last date of the query.
+    """
+    dates = DATES[rows]
+    if dates.empty:
+        return spy_data.iloc[:0]
+    return spy_data.loc[dates[0] : dates[-1]]
+
+
+def complete_rows(ids, first, last, slots=None):
+    """Finds the first and last rows of windows where every ticker of a set has a price.
+
+    Starting from the window bounds, each step jumps to the next (or last) priced row of the tickers still missing a price, so a window costs one gather per gap met instead of a scan of its rows.
+
+    Args:
+        ids (np.ndarray): A windows x tickers array of ticker IDs, one set per window.
+        first (np.ndarray): First row of each window.
+        last (np.ndarray): Last row of each window, included.
+        slots (np.ndarray, optional): A windows x tickers boolean array, False for the padding of smaller sets. Defaults to None, every ID.
+
+    Returns:
+        tuple: A tuple containing two np.ndarray:
+        - start: First row of each window where the whole set has a price
+        - end: Last such row, below start if there is none
+
+    Examples:
+        >>> rows, ids = plan('AAPL-MSFT', start, end)
+        >>> first, last = complete_rows(ids[None], [rows.start], [rows.stop - 1])
+    """
+    ids = np.asarray(ids)
+    slots = np.ones(ids.shape, dtype=bool) if slots is None else slots
+    start, end = np.array(first), np.array(last)
+    top = len(DATES) - 1
+
+    moving = start <= end
+    while moving.any():
+        found = NEXT_PRICED[np.minimum(start, top)[:, None], ids]
+        step = np.where(slots, found, start[:, None]).max(axis=1)
+        moving = (step != start) & (start <= end)
+        start = np.where(moving, step, start)
+
+    moving = start <= end
+    while moving.any():
+        found = LAST_PRICED[end[:, None], ids]
+        step = np.where(slots, found, end[:, None]).min(axis=1)
+        moving = (step != end) & (start <= end)
+        end = np.where(moving, step, end)
+    return start, end
+
+
+def window_returns(ids, first, last, slots=None):
+    """Growth of every ticker of a set over windows, from the first to the last row where the whole set has a price.
+
+    Only two rows of log prices are read per window, whatever its length, see complete_rows.
+
+    Args:
+        ids (np.ndarray): A windows x tickers array of ticker IDs, one set per window.
+        first (np.ndarray): First row of each window.
+        last (np.ndarray): Last row of each window, included.
+        slots (np.ndarray, optional): A windows x tickers boolean array, False for the padding of smaller sets. Defaults to None, every ID.
+
+    Returns:
+        np.ndarray: A windows x tickers array of price ratios in float64, NaN for the padding and for windows where the set never has a price.
+
+    Examples:
+        >>> rows, ids = plan('AAPL-MSFT', start, end)
+        >>> roi = window_returns(ids[None], [rows.start], [rows.stop - 1]).mean(axis=1)
+    """
+    ids = np.asarray(ids)
+    slots = np.ones(ids.shape, dtype=bool) if slots is None else slots
+    start, end = complete_rows(ids, first, last, slots)
+    inside = start <= end
+    start, end = np.where(inside, start, 0), np.where(inside, end, 0)
+
+    log = LOG_PRICES[end[:, None], ids].astype(np.float64)
+    log -= LOG_PRICES[start[:, None], ids]
+    return np.where(slots & inside[:, None], np.exp(log), np.nan)
+
+
+def universe(rows, startY):
+    """Reads the equal-weight universe benchmarks over the dates of a query.
+
+    Args:
+        rows (slice): Rows of the query, see plan.
+        startY (int): The year the universe is bought, see universe.buy_and_hold_indexes.
+
+    Returns:
+        pd.DataFrame: Indexed by the dates of the query, with the columns:
+        - UNIVERSE: The universe bought on the first session of startY and held, NaN if the year is not in the dataset
+        - UNIVERSE_RB: The universe rebalanced every session, starting at 1 on the first date of the query
+
+    Examples:
+        >>> rows, ids = plan('AAPL', start, end)
+        >>> bench = universe(rows, 2010)
+    """
+    dates = DATES[rows]
+    k = UNIVERSE_YEARS.searchsorted(startY)
+    if k < UNIVERSE_YEARS.size and UNIVERSE_YEARS[k] == startY:
+        hold = UNIVERSE_HOLD[k, rows]
+    else:
+        hold = np.full(dates.size, np.nan)
+    rebalanced = UNIVERSE[rows]
+    if rebalanced.size:
+        rebalanced = rebalanced / rebalanced[0]
+    return pd.DataFrame({"UNIVERSE": hold, "UNIVERSE_RB": rebalanced}, index=dates)
+
+
+def universe_growth(starts, ends):
+    """Growth of the equal-weight universe rebalanced every session, over many windows in O(1) each.
+
+    Args:
+        starts (pd.DatetimeIndex): First date of each window.
+        ends (pd.DatetimeIndex): Last date of each window, included.
+
+    Returns:
+        np.ndarray: The growth over each window, from its first to its last session, NaN for windows without one.
+
+    Examples:
+        >>> dates = strategies.schedule(start, 8)
+        >>> growth = universe_growth(dates[:-1], dates[1:])
+    """
+    first = DATES.searchsorted(starts, side="left")
+    last = DATES.searchsorted(ends, side="right") - 1
+    inside = (first <= last) & (first < DATES.size)
+    first, last = np.minimum(first, DATES.size - 1), np.maximum(last, 0)
+    return np.where(inside, UNIVERSE[last] / UNIVERSE[first], np.nan)
@@ -0,0 +1,324 @@
+import argparse
+import inspect
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+# importing the engines loads the dataset once for the whole server
+from backtester import given_portfolio, simulate
+from momentum import moment, stop_strategy
+
+
+def _date(value):
+    date = pd.Timestamp(value)
+    return date.tz_localize("UTC") if date.tz is None else date
+
+
+def _tickers(value):
+    # a JSON list of symbols or the hyphen-separated string of the query string
+    return "-".join(value) if isinstance(value, list) else str(value)
+
+
+# endpoint -> engine, typed parameters and output names, parameters with a default in the engine are optional
+ENDPOINTS = {
+    "given_portfolio": (
+        given_portfolio,
+        {"tickers": _tickers, "startY": int, "nb_years": int},
+        ["banch", "portfolio", "rebalanced"],
+    ),
+    "simulate": (
+        simulate,
+        {"startY": int, "nb_years": int, "nb_stocks": int, "nb_trials": int},
+        ["stats", "median"],
+    ),
+    "moment": (
+        moment,
+        {"date": _date, "NY": float, "top_n": int, "skip": int},
+        None,
+    ),
+    "stop_strategy": (
+        stop_strategy,
+        {
+            "date": _date,
+            "n_quarters": int,
+            "com": float,
+            "loss_rate": float,
+            "restart_nb": int,
+            "lookback": int,
+            "skip": int,
+            "top_n": int,
+        },
+        None,
+    ),
+}
+
+
+def to_columnar(result):
+    """Converts engine results to JSON-ready columnar payloads.
+
+    DataFrames are sent as one list per column instead of one object per row, which keeps large results compact.
+
+    Args:
+        result: A DataFrame, Series, scalar or a tuple/dict of them.
+
+    Returns:
+        A JSON-serializable object. DataFrames become {"index": [...], "columns": {name: [...]}}.
+
+    Examples:
+        >>> payload = to_columnar(moment(date, 1, 10))
+    """
+    if isinstance(result, pd.DataFrame):
+        return {
+            "index": _values(result.index),
+            "columns": {str(c): _values(result[c]) for c in result.columns},
+        }
+    if isinstance(result, pd.Series):
+        return {str(k): _scalar(v) for k, v in result.items()}
+    if isinstance(result, dict):
+        return {str(k): to_columnar(v) for k, v in result.items()}
+    return _scalar(result)
+
+
+def _values(column):
+    if isinstance(column.dtype, pd.DatetimeTZDtype) or column.dtype.kind == "M":
+        return [v.isoformat() for v in column]
+    return [_scalar(v) for v in column]
+
+
+def _scalar(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+
+class Stats:
+    """Thread-safe latency and throughput counters of the service."""
+
+    def __init__(self, window=1000):
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.window = window
+
+    def record(self, endpoint, event, latency=None):
+        with self.lock:
+            counters = self.endpoints.setdefault(
+                endpoint,
+                {
+                    "requests": 0,
+                    "computed": 0,
+                    "coalesced": 0,
+                    "rejected": 0,
+                    "errors": 0,
+                    "latencies": deque(maxlen=self.window),
+                    "finished": deque(maxlen=self.window),
+                },
+            )
+            counters[event] += 1
+            if latency is not None:
+                counters["latencies"].append(latency)
+                counters["finished"].append(time.time())
+
+    def snapshot(self):
+        now = time.time()
+        with self.lock:
+            report = {"uptime": now - self.started, "endpoints": {}}
+            for endpoint, counters in self.endpoints.items():
+                latencies = np.array(counters["latencies"])
+                recent = [t for t in counters["finished"] if t > now - 60]
+                report["endpoints"][endpoint] = {
+                    **{
+                        k: v
+                        for k, v in counters.items()
+                        if k not in ("latencies", "finished")
+                    },
+                    "throughput_1m": len(recent) / 60,
+                    "latency_p50": _percentile(latencies, 50),
+                    "latency_p95": _percentile(latencies, 95),
+                    "latency_p99": _percentile(latencies, 99),
+                    "latency_max": _percentile(latencies, 100),
+                }
+        return report
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if values.size else None
+
+
+class Engine:
+    """Runs engine calls on a bounded worker pool, coalescing identical concurrent requests.
+
+    Args:
+        workers (int): Number of worker threads.
+        queue (int): Number of requests allowed to wait for a worker, more are rejected.
+    """
+
+    def __init__(self, workers=4, queue=16):
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.slots = threading.BoundedSemaphore(workers + queue)
+        # reentrant, a future finishing early runs _done while the lock is held
+        self.lock = threading.RLock()
+        self.inflight = {}
+        self.stats = Stats()
+
+    def call(self, endpoint, params):
+        """Computes an endpoint result, or joins the identical computation already running.
+
+        Args:
+            endpoint (str): Name of the endpoint, see ENDPOINTS.
+            params (dict): Raw query parameters.
+
+        Returns:
+            The columnar payload, see to_columnar, or None if the service is overloaded.
+
+        Raises:
+            KeyError: If the endpoint or a parameter is unknown or missing.
+            ValueError: If a parameter has the wrong type.
+        """
+        function, types, names = ENDPOINTS[endpoint]
+        unknown = set(params) - set(types)
+        if unknown:
+            raise KeyError(f"unknown parameters {sorted(unknown)}")
+        args = {
+            name: convert(params[name])
+            for name, convert in types.items()
+            if name in params
+        }
+        try:
+            bound = inspect.signature(function).bind(**args)
+        except TypeError as e:
+            raise KeyError(str(e))
+        bound.apply_defaults()
+        # keyed on the typed values with their defaults, so 5 and "5", reordered or omitted defaults share a computation
+        key = (endpoint, json.dumps(bound.arguments, sort_keys=True, default=str))
+
+        started = time.perf_counter()
+        with self.lock:
+            future = self.inflight.get(key)
+            if future is not None:
+                self.stats.record(endpoint, "coalesced")
+            else:
+                # backpressure: bounded number of running and queued computations
+                if not self.slots.acquire(blocking=False):
+                    self.stats.record(endpoint, "rejected")
+                    return None
+                future = self.pool.submit(self._run, function, args, names)
+                self.inflight[key] = future
+                future.add_done_callback(lambda _: self._done(key))
+                self.stats.record(endpoint, "computed")
+
+        try:
+            return future.result()
+        except Exception:
+            self.stats.record(endpoint, "errors")
+            raise
+        finally:
+            self.stats.record(
+                endpoint, "requests", latency=time.perf_counter() - started
+            )
+
+    def _run(self, function, args, names):
+        result = function(**args)
+        if names is not None:
+            result = dict(zip(names, result))
+        return to_columnar(result)
+
+    def _done(self, key):
+        with self.lock:
+            del self.inflight[key]
+        self.slots.release()
+
+
+class Handler(BaseHTTPRequestHandler):
+    engine = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        self._dispatch(url.path.strip("/"), dict(parse_qsl(url.query)))
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            return self._send(400, {"error": f"invalid JSON body: {e}"})
+        if not isinstance(params, dict):
+            return self._send(400, {"error": "the JSON body must be an object"})
+        self._dispatch(urlsplit(self.path).path.strip("/"), params)
+
+    def _dispatch(self, endpoint, params):
+        if endpoint == "metrics":
+            return self._send(200, self.engine.stats.snapshot())
+        if endpoint not in ENDPOINTS:
+            return self._send(404, {"error": f"unknown endpoint {endpoint!r}"})
+        try:
+            payload = self.engine.call(endpoint, params)
+        except (KeyError, ValueError, TypeError) as e:
+            return self._send(400, {"error": str(e)})
+        except Exception as e:
+            return self._send(500, {"error": repr(e)})
+        if payload is None:
+            return self._send(503, {"error": "overloaded"}, {"Retry-After": "1"})
+        self._send(200, payload)
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=8600, workers=4, queue=16):
+    """Serves the backtest engines over a local HTTP/JSON API.
+
+    Endpoints take their parameters from the query string or a JSON body, named as the engine arguments, and the arguments with a default may be left out:
+    /given_portfolio, /simulate, /moment and /stop_strategy. /metrics reports request counts, coalesced and rejected requests, throughput and latency percentiles.
+
+    Args:
+        host (str, optional): Interface to listen on. Defaults to "127.0.0.1".
+        port (int, optional): Port to listen on. Defaults to 8600.
+        workers (int, optional): Number of worker threads running the engines. Defaults to 4.
+        queue (int, optional): Number of requests allowed to wait for a worker before answering 503. Defaults to 16.
+
+    Examples:
+        >>> serve(port=8600)
+        $ curl 'http://127.0.0.1:8600/moment?date=2022-12-30&NY=1&top_n=10'
+    """
+    Handler.engine = Engine(workers, queue)
+    server = ThreadingHTTPServer((host, port), Handler)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest engines HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue", type=int, default=16)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.queue)
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import registry
+
+# columns holding the tickers of a portfolio, as hyphen-separated strings, sets, lists or ID arrays
+TICKER_COLUMNS = ("TICKERS", "Portfolio")
+PLACEHOLDERS = {"", "_"}  # no stock held, e.g. the first row of the strategies
+
+# one dictionary for every batch: the ticker IDs index it, see registry
+DICTIONARY = pa.array(registry.SYMBOLS.tolist(), type=pa.string())
+TICKERS_TYPE = pa.list_(pa.dictionary(pa.int32(), pa.string()))
+
+
+def ticker_lists(column):
+    """Encodes a column of portfolios as lists of ticker IDs with the symbols as dictionary.
+
+    Args:
+        column (iterable): Portfolios, each a hyphen-separated string, a set or list of symbols, or an array of IDs.
+
+    Returns:
+        pa.ListArray: A list<dictionary<int32, string>> array, the indices are the ticker IDs.
+
+    Notes:
+        - Sets are stored in ID order, lists and arrays in their own order
+        - Placeholders of the strategies ("" and "_") are left out, so a portfolio in cash is an empty list
+
+    Examples:
+        >>> tickers = ticker_lists(stats["TICKERS"])
+    """
+    lengths, parts = [0], []
+    for portfolio in column:
+        if isinstance(portfolio, str):
+            ids = registry.parse(portfolio) if portfolio not in PLACEHOLDERS else []
+        elif isinstance(portfolio, (set, frozenset)):
+            ids = np.sort(registry.to_ids(sorted(set(portfolio) - PLACEHOLDERS)))
+        else:
+            portfolio = np.asarray(portfolio)
+            if portfolio.dtype.kind not in "iu":
+                portfolio = [p for p in portfolio if p not in PLACEHOLDERS]
+            ids = registry.to_ids(portfolio)
+        parts.append(np.asarray(ids, dtype=np.int32))
+        lengths.append(len(ids))
+
+    ids = np.concatenate(parts) if parts else np.empty(0, dtype=np.int32)
+    values = pa.DictionaryArray.from_arrays(pa.array(ids), DICTIONARY)
+    offsets = pa.array(np.cumsum(lengths, dtype=np.int32))
+    return pa.ListArray.from_arrays(offsets, values)
+
+
+def ticker_ids(array):
+    """Decodes a column of ticker lists without copying it.
+
+    Args:
+        array (pa.ListArray or pa.ChunkedArray): A column written by ticker_lists, e.g. read back from a file. The chunks of several batches are concatenated first, which copies them.
+
+    Returns:
+        tuple: A tuple containing two np.ndarray:
+        - offsets: Portfolio i holds ids[offsets[i]:offsets[i + 1]]
+        - ids: Ticker IDs of all portfolios, see registry
+
+    Examples:
+        >>> offsets, ids = ticker_ids(read("sweep.arrow")["TICKERS"])
+    """
+    if isinstance(array, pa.ChunkedArray):
+        array = array.chunk(0) if array.num_chunks == 1 else array.combine_chunks()
+    # a sliced array keeps the offsets of its parent
+    ids = array.values.indices.to_numpy(zero_copy_only=True)
+    offsets = array.offsets.to_numpy(zero_copy_only=True)
+    return offsets - offsets[0], ids[offsets[0] : offsets[-1]]
+
+
+def to_batch(result):
+    """Converts an engine result to an Arrow record batch with typed columns.
+
+    Args:
+        result (pd.DataFrame or pd.Series): A result of the engines, e.g. the stats of simulate or a strategy.
+
+    Returns:
+        pa.RecordBatch: The columns as Arrow arrays, the portfolios as lists of ticker IDs, see ticker_lists.
+
+    Notes:
+        - Object columns of numbers, dates or booleans get their own type
+        - The index is kept as columns with the pandas metadata, so to_pandas() restores it
+
+    Examples:
+        >>> stats, med = simulate(2010, 5, 10, 100)
+        >>> batch = to_batch(stats)
+    """
+    frame = result.to_frame() if isinstance(result, pd.Series) else result
+    tickers = [c for c in frame.columns if c in TICKER_COLUMNS]
+
+    batch = pa.RecordBatch.from_pandas(frame.drop(columns=tickers).infer_objects())
+    for name in tickers:
+        at = frame.columns.get_loc(name)
+        batch = batch.add_column(
+            at, pa.field(name, TICKERS_TYPE), ticker_lists(frame[name])
+        )
+    return batch
+
+
+def write(results, path):
+    """Writes engine results to an Arrow IPC (Feather v2) file.
+
+    The file is not compressed, so readers map its buffers instead of decoding them, see read.
+
+    Args:
+        results (pd.DataFrame or iterable): A result, or results with the same columns, each written as a record batch.
+        path (str): Path of the file.
+
+    Returns:
+        pa.Schema: The schema of the file.
+
+    Examples:
+        >>> write(sweep(start, end, 8, 0.007), "sweep.arrow")
+        >>> write((simulate(2010, 5, 10, 100)[0] for _ in range(10)), "trials.arrow")
+    """
+    if isinstance(results, (pd.DataFrame, pd.Series)):
+        results = [results]
+
+    writer = None
+    for result in results:
+        batch = to_batch(result)
+        if writer is None:
+            writer = pa.ipc.new_file(path, batch.schema)
+        writer.write_batch(batch)
+    if writer is None:
+        raise ValueError("no results to write")
+    writer.close()
+    return batch.schema
+
+
+def read(path):
+    """Reads an Arrow IPC file memory-mapped, without copying the columns.
+
+    Processes reading the same file share its pages, so large sweep results cost no serialization.
+
+    Args:
+        path (str): Path of a file written by write, or any uncompressed Arrow IPC or Feather v2 file.
+
+    Returns:
+        pa.Table: The results, one chunk per written batch. Call to_pandas() for a DataFrame, the portfolios become lists of symbols.
+
+    Examples:
+        >>> table = read("sweep.arrow")
+        >>> offsets, ids = ticker_ids(table["TICKERS"])
+    """
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+# DEBUGGING
+
+# 1. Stats of a simulation, written and mapped back
+# from backtester import simulate
+# stats, med = simulate(2010, 5, 10, 100)
+# write(stats, "/tmp/stats.arrow")
+# print(read("/tmp/stats.arrow").to_pandas())
+
+# 2. Portfolios of the stop-loss strategy as ticker IDs
+# from momentum import stop_strategy
+# strategy = stop_strategy(pd.Timestamp("2015-01-02", tz="UTC"), 8, 0.007, 0.1, 2)
+# print(ticker_ids(to_batch(strategy)["Portfolio"]))
@@ -1,8 +1,34 @@
 import datetime
 import random
+from statistics import NormalDist
+import numpy as np
 import pandas as pd
+import access
+import registry
+from executors import SerialExecutor
+from metrics import METRICS, risk_metrics, running_metrics
 from load_data import spy_data as spy_data
 from load_data import sp500_data as sp500_data
+from load_data import sp500_valid as sp500_valid
+from load_data import sp500_members as sp500_members
+
+# columns of the trials of simulate
+TRIAL_COLUMNS = [
+    "TICKERS",
+    "START",
+    "NYEARS",
+    "ROI",
+    "REBALANCED",
+    "SPY",
+    "UNIVERSE",
+    "UNIVERSE_RB",
+    "RBDAYS",
+    # "ROI1Y",
+    # "SPY1Y",
+]
+
+# quantiles of the analytic ROI distribution, see roi_distribution
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
 
 
 def random_portfolio(startY, nb_years, nb_tickers):
@@ -46,22 +72,23 @@ def rebalance(portfolio, period):
     # rounding up or down :/
     nperiods = round(portfolio.index.size / period, 0)
 
+    # the same loop on the price array, without a pandas assignment per period
+    prices = portfolio.to_numpy(dtype=np.float64)
+    size = prices.shape[1]
+    cumul = prices / prices[0] / size
+    total = cumul.sum(axis=1)
     n = 0
-    cumul = portfolio / portfolio.iloc[0]
-    cumul = cumul / cumul.columns.size
-    sum = cumul.sum(axis=1)
     while n < nperiods:
-        gain = sum.iloc[n * period]  # portfolio total at period
+        start = n * period
         reinvest = round(
-            gain / cumul.columns.size, 6
+            total[start] / size, 6
         )  # balancing, deviding total among all possitions
         # re-starting cumulating from new reinvestment till the end
-        cumul[n * period :] = (
-            reinvest * portfolio[n * period :] / portfolio.iloc[n * period]
-        )
-        sum[n * period :] = cumul[n * period :].sum(axis=1)
+        cumul[start:] = reinvest * prices[start:] / prices[start]
+        total[start:] = cumul[start:].sum(axis=1)
         n += 1
-    return sum, cumul
+    cumul = pd.DataFrame(cumul, index=portfolio.index, columns=portfolio.columns)
+    return pd.Series(total, index=portfolio.index), cumul
 
 
 def given_portfolio(tickers, startY, nb_years):
@@ -70,7 +97,7 @@ def given_portfolio(tickers, startY, nb_years):
     This function creates a portfolio from selected stock tickers, calculates cumulative returns, and compares performance against the S&P 500 benchmark.
 
     Args:
-        tickers (str): Hyphen-separated list of stock ticker symbols.
+        tickers (str): Hyphen-separated list of stock ticker symbols, or an array of their IDs, see registry.
         startY (int): The starting year for portfolio analysis.
         nb_years (int): Number of years to analyze portfolio performance.
 
@@ -81,9 +108,12 @@ def given_portfolio(tickers, startY, nb_years):
         - rebalanced_portfolio (pd.DataFrame): Portfolio with periodic rebalancing
 
     Notes:
-        - Filters out stocks with insufficient data
+        - Filters out days with missing data for any of the stocks
+        - Foreign stocks are valued at their last close on days their exchange is closed
         - Calculates cumulative returns
         - Performs portfolio rebalancing at yearly intervals
+        - Adds the equal-weight universe, held (UNIVERSE) and rebalanced daily (UNIVERSE_RB), as benchmarks, see access.universe
+        - Adds the risk metrics of ROI against SPY, from the start to each day, as the VOL, SHARPE, SORTINO, MAXDD, MAXDD_DAYS, BETA, ALPHA and TE columns, see metrics.running_metrics
 
     Examples:
         >>> performance, raw_data, rebalanced = given_portfolio('AAPL-GOOGL-MSFT', 2010, 5)
@@ -94,19 +124,21 @@ def given_portfolio(tickers, startY, nb_years):
     end = pd.Timestamp(datetime.datetime(startY + nb_years, 1, 1))
     end = end.tz_localize("UTC")
 
-    # Slice stocks data
-    timeslice = sp500_data.loc[start:end]
-    notnaslice = timeslice.dropna(axis=1, how="all").dropna(thresh=50)
-    # is that valid? or a bias, since dropping some values
-    # that do not exist for the whole period
+    # rows and ticker IDs of the query, in alphabetical order, strings stop here
+    rows, ids = access.plan(tickers, start, end)
 
     # Prepare banchmark set
-    spy = spy_data.loc[notnaslice.index[0] : notnaslice.index[-1]]
+    spy = access.benchmark(rows)
 
-    ticker_names = tickers.split("-")
+    # stocks with no data in the period
+    missing = access.missing(rows, ids)
+    if missing.size:
+        raise KeyError(f"{registry.to_symbols(missing)} not in index")
 
-    given_portfolio = notnaslice[ticker_names].dropna()
-    given_portfolio.sort_index(axis=1, inplace=True)
+    # only the portfolio columns are read, aligned on the primary calendar at load time
+    given_portfolio = access.read(rows, ids)
+    # is that valid? or a bias, since dropping some values
+    # that do not exist for the whole period
 
     # cumulative returns  = %difference data to day from the begining of investment
     banch = (
@@ -127,9 +159,69 @@ def given_portfolio(tickers, startY, nb_years):
 
     banch = banch.dropna()
 
+    # equal-weight universe benchmarks, looked up in the precomputed indexes
+    banch = banch.join(access.universe(rows, startY))
+
+    # risk metrics of the portfolio without rebalancing, from the start to each day
+    banch = banch.join(
+        running_metrics(banch["ROI"], banch["SPY"]).set_axis(banch.index)
+    )
+
     return banch, given_portfolio, rebalanced_portfolio
 
 
+def portfolio_metrics(banch):
+    """Computes the risk metrics of a given portfolio, with and without rebalancing, against the S&P 500.
+
+    Args:
+        banch (pd.DataFrame): Performance metrics returned by given_portfolio.
+
+    Returns:
+        pd.DataFrame: A DataFrame with ROI, REBALANCED and SPY rows and the columns of metrics.risk_metrics.
+
+    Examples:
+        >>> banch, portfolio, rebalanced = given_portfolio('AAPL-GOOGL-MSFT', 2010, 5)
+        >>> stats = portfolio_metrics(banch)
+    """
+    series = ["ROI", "REBALANCED", "SPY"]
+    stats = risk_metrics(banch[series].to_numpy().T, banch["SPY"].to_numpy())
+    stats.index = series
+    return stats
+
+
+def SP500_ids(startY, nb_years):
+    """Retrieves the IDs of valid S&P 500 stock tickers for a specified time period.
+
+    This function intersects the availability and point-in-time membership bitmaps over the given date range, without scanning the prices.
+
+    Args:
+        startY (int): The starting year for ticker selection.
+        nb_years (int): Number of years to consider for ticker availability.
+
+    Returns:
+        np.ndarray: Integer IDs of the tickers, see registry, in alphabetical order of the tickers.
+
+    Notes:
+        - Filters out stocks with no data in the period
+        - Keeps only stocks that were index members on the first day of the period
+
+    Examples:
+        >>> ids = SP500_ids(2010, 5)
+    """
+    # init dates
+    start = pd.Timestamp(datetime.datetime(startY, 1, 1))
+    start = start.tz_localize("UTC")
+    end = pd.Timestamp(datetime.datetime(startY + nb_years, 1, 1))
+    end = end.tz_localize("UTC")
+    # Availability and point-in-time membership bitmaps, no scan of the prices
+    i, j = sp500_data.index.slice_locs(start, end)
+    if i == j:
+        return np.array([], dtype=np.intp)
+    available = sp500_valid[i:j].any(axis=0) & sp500_members[i]
+
+    return registry.ALPHABETICAL[available[registry.ALPHABETICAL]]
+
+
 def SP500_tickers(startY, nb_years):
     """Retrieves a list of valid S&P 500 stock tickers for a specified time period.
 
@@ -143,25 +235,31 @@ def SP500_tickers(startY, nb_years):
         str: A hyphen-separated string of stock ticker symbols sorted alphabetically.
 
     Notes:
-        - Filters out stocks with insufficient data
-        - Requires at least 50 non-null data points
+        - Uses SP500_ids to get available stocks
         - Returns tickers sorted alphabetically
 
     Examples:
         >>> tickers = SP500_tickers(2010, 5)
     """
-    # init dates
-    start = pd.Timestamp(datetime.datetime(startY, 1, 1))
-    start = start.tz_localize("UTC")
-    end = pd.Timestamp(datetime.datetime(startY + nb_years, 1, 1))
-    end = end.tz_localize("UTC")
-    # Slice stocks data
-    timeslice = sp500_data.loc[start:end]
-    notnaslice = timeslice.dropna(axis=1, how="all").dropna(thresh=50)
+    return registry.join(SP500_ids(startY, nb_years))
+
+
+def random_ids(startY, nb_years, nb_stocks):
+    """Generates a random subset of stock ticker IDs from the S&P 500 for a specified time period.
+
+    Args:
+        startY (int): The starting year for stock selection.
+        nb_years (int): Number of years to consider for stock availability.
+        nb_stocks (int): Number of stock tickers to randomly select.
 
-    all_ticks = sorted(list(notnaslice.columns))
+    Returns:
+        np.ndarray: Integer IDs of the randomly selected tickers, see registry.
 
-    return "-".join(all_ticks)
+    Examples:
+        >>> ids = random_ids(2010, 5, 10)
+    """
+    sp_ids = SP500_ids(startY, nb_years)
+    return np.array(random.sample(list(sp_ids), nb_stocks), dtype=np.intp)
 
 
 def random_ticks(startY, nb_years, nb_stocks):
@@ -178,19 +276,18 @@ def random_ticks(startY, nb_years, nb_stocks):
         str: A hyphen-separated string of randomly selected stock ticker symbols, sorted alphabetically.
 
     Notes:
-        - Uses SP500_tickers to get available stocks
-        - Randomly samples from available tickers
+        - Uses random_ids to sample from available stocks
         - Returns tickers sorted alphabetically
 
     Examples:
         >>> random_tickers = random_ticks(2010, 5, 10)
     """
-    sp_ticks = SP500_tickers(startY, nb_years).split("-")
-    rand_ticks = random.sample(sp_ticks, nb_stocks)
-    return "-".join(sorted(rand_ticks))
+    return registry.join(random_ids(startY, nb_years, nb_stocks))
 
 
-def simulate(startY, nb_years, nb_stocks, nb_trials):
+def simulate(
+    startY, nb_years, nb_stocks, nb_trials, paths=None, executor=None, analytic=False
+):
     """Conducts a Monte Carlo simulation of portfolio performance using random stock selections.
 
     This function generates multiple random portfolios to analyze investment strategy performance and compare against benchmark returns.
@@ -200,6 +297,9 @@ def simulate(startY, nb_years, nb_stocks, nb_trials):
         nb_years (int): Number of years to simulate portfolio performance.
         nb_stocks (int): Number of stocks to include in each random portfolio.
         nb_trials (int): Number of random portfolio simulations to run.
+        paths (iterable, optional): Batches of synthetic paths, see bootstrap.synthetic_paths. When given, each trial holds its random portfolio on its own synthetic path instead of the historical one. Defaults to None.
+        executor (SerialExecutor, optional): Runs the trials, see executors. Defaults to None, in the current process.
+        analytic (bool, optional): Takes the ROI, SPY and universe medians from the closed-form distribution of roi_distribution, which it adds to the medians. The trials only run for the path-dependent REBALANCED, none when nb_trials is 0. Defaults to False.
 
     Returns:
         pd.DataFrame: A DataFrame containing performance statistics for simulated portfolios, including:
@@ -209,56 +309,221 @@ def simulate(startY, nb_years, nb_stocks, nb_trials):
         - ROI: Portfolio return
         - REBALANCED: Rebalanced portfolio performance
         - SPY: S&P 500 benchmark performance
+        - UNIVERSE, UNIVERSE_RB: Equal-weight universe benchmark, held and rebalanced daily, see given_portfolio. On synthetic paths, the equal-weight mean of all the path's stocks
         - RBDAYS: Rebalancing interval
+        - VOL, SHARPE, SORTINO, MAXDD, MAXDD_DAYS, BETA, ALPHA, TE: Risk metrics of the portfolio without rebalancing, the last day of given_portfolio
+
+    Raises:
+        ValueError: If there are fewer eligible stocks than nb_stocks, in the period or in the universe of the synthetic paths.
 
     Notes:
         - Uses random stock selection for each trial
         - Calculates portfolio performance with and without rebalancing
         - Compares portfolio performance to S&P 500 benchmark
+        - With nb_trials=0, the stats are empty and the medians NaN
 
     Examples:
         >>> simulation_results = simulate(2010, 5, 10, 100)
+        >>> stress_results = simulate(2010, 5, 10, 1000, synthetic_paths(2000, 20, 1000, 5 * 252))
+        >>> stats, med = simulate(2010, 5, 10, 0, analytic=True)
     """
-    # init stats
-    stats = pd.DataFrame(
-        columns=[
-            "TICKERS",
-            "START",
-            "NYEARS",
+    if analytic:
+        return _simulate_analytic(startY, nb_years, nb_stocks, nb_trials, executor)
+    if paths is not None:
+        return _simulate_paths(startY, nb_years, nb_stocks, nb_trials, paths)
+
+    # portfolios are drawn here, so the results do not depend on the executor
+    portfolios = [random_ids(startY, nb_years, nb_stocks) for _ in range(nb_trials)]
+    tasks = [(rand, startY, nb_years) for rand in portfolios]
+    trials = (executor or SerialExecutor()).map(_trial, tasks)
+
+    # one row per trial, the stats are built once at the end
+    rows = [
+        {
+            "TICKERS": registry.join(rand),
+            "START": startY,
+            "NYEARS": nb_years,
+            "RBDAYS": 252,
+            # "ROI1Y": banch["ROI"].iloc[252],  # portfolio perf after 1Y
+            # "SPY1Y": banch["SPY"].iloc[252],  # SP500 perf after 1Y
+            **last,  # final ROI, REBALANCED, SPY, universe and risk metrics
+        }
+        for rand, last in zip(portfolios, trials)
+    ]
+    stats = pd.DataFrame(rows, columns=TRIAL_COLUMNS + METRICS)
+
+    med = stats[
+        [
+            # "ROI1Y", "SPY1Y",
             "ROI",
             "REBALANCED",
             "SPY",
-            "RBDAYS",
-            # "ROI1Y",
-            # "SPY1Y",
+            "UNIVERSE",
+            "UNIVERSE_RB",
+        ]
+    ].median()
+    return stats, med
+
+
+def roi_distribution(startY, nb_years, nb_stocks, quantiles=QUANTILES):
+    """Computes the distribution of the ROI of random portfolios in closed form, without drawing any.
+
+    The ROI of an equal-weight portfolio held without rebalancing is the mean of the terminal price ratios of its stocks, drawn without replacement from the eligible universe. The mean, variance and skewness of such a sample mean follow from the moments of the universe ratios, and the quantiles from the Cornish-Fisher expansion of the normal ones.
+
+    Args:
+        startY (int): The starting year.
+        nb_years (int): Number of years the portfolios are held.
+        nb_stocks (int): Number of stocks in each portfolio.
+        quantiles (tuple, optional): Probabilities of the quantiles. Defaults to QUANTILES.
+
+    Returns:
+        pd.Series: The distribution, including:
+        - N: Number of eligible stocks, see SP500_ids
+        - MEAN, STD, SKEW: Mean, standard deviation and skewness of the ROI
+        - Q5, Q50, ...: ROI quantiles, Q50 being the median
+        - SPY: S&P 500 benchmark performance
+        - UNIVERSE, UNIVERSE_RB: Equal-weight universe benchmark, held and rebalanced daily, see access.universe
+
+    Raises:
+        ValueError: If there are fewer eligible stocks than nb_stocks.
+
+    Notes:
+        - Each stock is measured from its first to its last price in the period, see access.window_returns, while a portfolio of given_portfolio starts on the first day all its stocks have a price. Both agree when no stock is listed or delisted during the period
+        - The quantiles are approximations, the closer to normal the better, i.e. with more stocks. They are exact for one stock. Beyond a skewness of 3 / |z| of the farthest quantile, about 1.8 for Q5 and Q95, the expansion is no longer increasing and the quantiles are taken from 10,000 sampled portfolios instead, see _portfolio_means
+
+    Examples:
+        >>> distribution = roi_distribution(2010, 5, 10)
+        >>> distribution[["MEAN", "Q50"]]
+    """
+    start = pd.Timestamp(datetime.datetime(startY, 1, 1)).tz_localize("UTC")
+    end = pd.Timestamp(datetime.datetime(startY + nb_years, 1, 1)).tz_localize("UTC")
+    ids = SP500_ids(startY, nb_years)
+    rows, ids = access.plan(ids, start, end)
+
+    # terminal ratio of every eligible stock, two rows of the window-return index each
+    n = ids.size
+    ratios = access.window_returns(
+        ids[:, None], np.full(n, rows.start), np.full(n, rows.stop - 1)
+    )[:, 0]
+    ratios = ratios[np.isfinite(ratios)]
+    n, k = ratios.size, nb_stocks
+    if not 0 < k <= n:
+        raise ValueError(f"{k} stocks drawn out of {n} eligible")
+
+    # moments of the mean of k draws without replacement out of n
+    deviation = ratios - ratios.mean()
+    m2, m3 = (deviation**2).mean(), (deviation**3).mean()
+    variance = m2 / k * (n - k) / (n - 1) if n > 1 else 0.0
+    third = m3 / k**2 * (n - k) * (n - 2 * k) / ((n - 1) * (n - 2)) if n > 2 else 0.0
+    skew = third / variance**1.5 if variance > 0 else 0.0
+
+    # Cornish-Fisher quantiles, corrected for the skewness, which only grow with z
+    # while |skew| < 3 / |z|, past that the quantiles of sampled portfolios
+    z = np.array([NormalDist().inv_cdf(p) for p in quantiles])
+    if k == 1:
+        values = np.quantile(ratios, quantiles)  # a single stock, exact
+    elif abs(skew) * np.abs(z).max() < 3:
+        values = ratios.mean() + np.sqrt(variance) * (z + (z**2 - 1) * skew / 6)
+    else:
+        values = np.quantile(_portfolio_means(ratios, k), quantiles)
+
+    # a portfolio lies between the mean of the k lowest and of the k highest ratios
+    ordered = np.sort(ratios)
+    values = np.clip(values, ordered[:k].mean(), ordered[-k:].mean())
+
+    spy = access.benchmark(rows)["SPY"]
+    benchmarks = access.universe(rows, startY).iloc[-1]
+    return pd.Series(
+        {
+            "N": n,
+            "MEAN": ratios.mean(),
+            "STD": np.sqrt(variance),
+            "SKEW": skew,
+            **{f"Q{round(p * 100)}": value for p, value in zip(quantiles, values)},
+            "SPY": spy.iloc[-1] / spy.iloc[0],
+            "UNIVERSE": benchmarks["UNIVERSE"],
+            "UNIVERSE_RB": benchmarks["UNIVERSE_RB"],
+        }
+    )
+
+
+def _portfolio_means(ratios, k, n_draws=10_000, batch=1_000, seed=0):
+    # ROI of sampled portfolios, the k smallest of uniform keys are a uniform k-subset;
+    # seeded so that the page shows the same quantiles on every run
+    rng = np.random.default_rng(seed)
+    means = []
+    for _ in range(n_draws // batch):
+        picks = rng.random((batch, ratios.size)).argpartition(k - 1, axis=1)[:, :k]
+        means.append(ratios[picks].mean(axis=1))
+    return np.concatenate(means)
+
+
+def _simulate_analytic(startY, nb_years, nb_stocks, nb_trials, executor):
+    # closed-form ROI and benchmarks, trials only for REBALANCED
+    distribution = roi_distribution(startY, nb_years, nb_stocks)
+    stats, med = simulate(startY, nb_years, nb_stocks, nb_trials, executor=executor)
+    med = pd.concat(
+        [
+            pd.Series({"ROI": distribution["Q50"], "REBALANCED": med["REBALANCED"]}),
+            distribution,
         ]
     )
+    return stats, med
+
 
-    for _ in range(nb_trials):
-        rand = random_ticks(startY, nb_years, nb_stocks)
-        banch, portfolio, rebalanced_portfolio = given_portfolio(rand, startY, nb_years)
-        stats = stats._append(
+def _trial(ids, startY, nb_years):
+    # one trial of simulate, run by the executor, only the last day is sent back
+    banch, portfolio, rebalanced_portfolio = given_portfolio(ids, startY, nb_years)
+    final = ["ROI", "REBALANCED", "SPY", "UNIVERSE", "UNIVERSE_RB", *METRICS]
+    return banch[final].iloc[-1].to_dict()
+
+
+def _simulate_paths(startY, nb_years, nb_stocks, nb_trials, paths):
+    # vectorized over each batch of paths, one random portfolio per path
+    rng = np.random.default_rng(random.getrandbits(64))
+    stats = []
+    for ids, prices, spy in paths:
+        # the universe of the paths is the stocks priced on every day of their source
+        if not 0 < nb_stocks <= ids.size:
+            raise ValueError(f"{nb_stocks} stocks drawn out of {ids.size} eligible")
+        n, n_days = spy.shape
+        picks = np.argsort(rng.random((n, ids.size)), axis=1)[:, :nb_stocks]
+        held = np.take_along_axis(prices, picks[:, None, :], axis=2)
+
+        # equal weights again every 252 days, values at each rebalancing
+        rebalancing = np.arange(0, n_days, 252)
+        growth = held[:, rebalancing[1:]] / held[:, rebalancing[:-1]]
+        values = np.cumprod(growth.mean(axis=2, dtype=np.float64), axis=1)
+        values = np.concatenate([np.ones((n, 1)), values], axis=1)
+        base = np.arange(n_days) // 252
+        since = (held / held[:, rebalancing[base]]).mean(axis=2, dtype=np.float64)
+        rebalanced = values[:, base] * since
+
+        roi = held.mean(axis=2, dtype=np.float64)
+
+        # the universe of a path is all its stocks, in equal weights
+        universe = prices[:, -1].mean(axis=1, dtype=np.float64)
+        daily = prices[:, 1:] / prices[:, :-1]
+        universe_rb = np.prod(daily.mean(axis=2, dtype=np.float64), axis=1)
+        batch = pd.DataFrame(
             {
-                "TICKERS": rand,
+                "TICKERS": [registry.join(ids[p]) for p in picks],
                 "START": startY,
                 "NYEARS": nb_years,
+                "ROI": roi[:, -1],
+                "REBALANCED": rebalanced[:, -1],
+                "SPY": spy[:, -1],
+                "UNIVERSE": universe,
+                "UNIVERSE_RB": universe_rb,
                 "RBDAYS": 252,
-                # "ROI1Y": banch["ROI"].iloc[252],  # portfolio perf after 1Y
-                # "SPY1Y": banch["SPY"].iloc[252],  # SP500 perf after 1Y
-                "ROI": banch["ROI"].iloc[-1],  # portfolio perf
-                "REBALANCED": banch["REBALANCED"].iloc[-1],  # rebalanced portfolio perf
-                "SPY": banch["SPY"].iloc[-1],  # SP500 perf after 3Y
-            },
-            ignore_index=True,
+            }
         )
-    med = stats[
-        [
-            # "ROI1Y", "SPY1Y",
-            "ROI",
-            "REBALANCED",
-            "SPY",
-        ]
-    ].median()
+        stats.append(pd.concat([batch, risk_metrics(roi, spy)], axis=1))
+        if sum(map(len, stats)) >= nb_trials:
+            break
+
+    stats = pd.concat(stats, ignore_index=True).iloc[:nb_trials]
+    med = stats[["ROI", "REBALANCED", "SPY", "UNIVERSE", "UNIVERSE_RB"]].median()
     return stats, med
 
 
@@ -300,3 +565,9 @@ def simulate(startY, nb_years, nb_stocks, nb_trials):
 # print(stats.head())
 # print(stats.size)
 # print(stats.tail())
+
+# 7. Analytic ROI distribution
+
+# print(roi_distribution(2017, 3, 10))
+# stats, med = simulate(2017, 3, 10, 0, analytic=True)
+# print(med)
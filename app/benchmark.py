@@ -0,0 +1,162 @@
+import argparse
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# seconds to import each entry point in a new process, once the shared dataset is published
+BUDGETS = {
+    "backtester": 1.5,
+    "momentum": 1.5,
+    "signals": 1.5,
+    "api": 1.5,
+    "executors": 0.1,
+}
+
+# packages only the code paths that use them may load: downloads, plotting, the UI and the remote workers
+DEFERRED = ("yfinance", "plotly", "streamlit", "multiprocessing")
+
+
+def _run(code):
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join([APP_DIR, os.environ.get("PYTHONPATH", "")]),
+    )
+    done = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if done.returncode:
+        raise RuntimeError(done.stderr.strip().splitlines()[-1])
+    return done
+
+
+def import_profile(module):
+    """Profiles the import of a module in a new process, with python -X importtime.
+
+    Args:
+        module (str): Name of the module, an app module or a third-party package.
+
+    Returns:
+        pd.DataFrame: Seconds spent importing each package, its own code and its submodules, sorted from the slowest.
+
+    Notes:
+        - App modules count the work they run at import, e.g. mapping the dataset or the log prices of scores
+        - Run it from the folder of the CSV files, like the app
+
+    Examples:
+        >>> import_profile("momentum").head()
+    """
+    lines = _run(f"import {module}").stderr.splitlines()
+    rows = []
+    for line in lines[1:]:  # the first line is the header
+        if not line.startswith("import time:"):
+            continue
+        own, _, name = line[len("import time:") :].split("|")
+        rows.append((name.strip().split(".")[0], int(own) / 1e6))
+
+    profile = pd.DataFrame(rows, columns=["Package", "Seconds"])
+    return (
+        profile.groupby("Package")["Seconds"]
+        .sum()
+        .sort_values(ascending=False)
+        .to_frame()
+    )
+
+
+def startup_time(module, repeat=3):
+    """Measures the time to import a module in a new process.
+
+    Args:
+        module (str): Name of the module.
+        repeat (int, optional): Number of processes, the fastest one is kept. Defaults to 3.
+
+    Returns:
+        tuple: A tuple containing two elements:
+        - seconds (float): The import time of the fastest process
+        - loaded (list): The DEFERRED packages the import loaded
+
+    Notes:
+        - A first untimed process publishes the shared dataset, so every entry point is measured as a new replica would start
+
+    Examples:
+        >>> seconds, loaded = startup_time("backtester")
+    """
+    code = (
+        "import sys, time\n"
+        "t = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - t)\n"
+        f"print(*[p for p in {DEFERRED!r} if p in sys.modules])"
+    )
+    _run(code)
+    runs = [_run(code).stdout.splitlines() for _ in range(repeat)]
+    return min(float(run[0]) for run in runs), runs[0][1].split()
+
+
+def check(budgets=BUDGETS, repeat=3):
+    """Checks the startup of the entry points against their budgets.
+
+    Args:
+        budgets (dict, optional): Seconds allowed to import each module. Defaults to BUDGETS.
+        repeat (int, optional): Number of processes per module, see startup_time. Defaults to 3.
+
+    Returns:
+        tuple: A tuple containing two elements:
+        - report (pd.DataFrame): Seconds, budget and deferred packages loaded per module
+        - failures (list): A message per module over its budget or loading a deferred package
+
+    Examples:
+        >>> report, failures = check()
+    """
+    rows, failures = [], []
+    for module, budget in budgets.items():
+        seconds, loaded = startup_time(module, repeat)
+        rows.append((module, seconds, budget, " ".join(loaded)))
+        if seconds > budget:
+            failures.append(f"{module}: {seconds:.3f}s over the {budget:.3f}s budget")
+        if loaded:
+            failures.append(f"{module}: loads {', '.join(loaded)} at import")
+
+    report = pd.DataFrame(rows, columns=["Module", "Seconds", "Budget", "Loaded"])
+    return report.set_index("Module"), failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import time of the app entry points")
+    parser.add_argument("modules", nargs="*", help="profile these modules instead")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="multiplies the budgets, for slower machines",
+    )
+    args = parser.parse_args()
+
+    if args.modules:
+        for module in args.modules:
+            print(f"{module}:\n{import_profile(module).head(15)}\n")
+        sys.exit()
+
+    report, failures = check(
+        {m: b * args.scale for m, b in BUDGETS.items()}, args.repeat
+    )
+    print(report.to_string(float_format="{:.3f}".format))
+    for failure in failures:
+        print("FAIL", failure)
+    sys.exit(1 if failures else 0)
+
+
+# DEBUGGING
+
+# 1. Where the import time of the momentum engine goes
+# print(import_profile("momentum").head(10))
+
+# 2. Startup of the API server and what it loads
+# print(startup_time("api"))
@@ -0,0 +1,145 @@
+import datetime
+import numpy as np
+import pandas as pd
+
+import scores
+from load_data import PRICE_DTYPE as PRICE_DTYPE
+from load_data import spy_data as spy_data
+from load_data import sp500_data as sp500_data
+from load_data import sp500_members as sp500_members
+
+METHODS = ("stationary", "block")
+
+
+def source_returns(startY, nb_years):
+    """Collects the daily log returns that synthetic paths are drawn from.
+
+    Every row is one day of history for the whole universe and SPY, so drawing rows keeps the cross-sectional correlation of that day.
+
+    Args:
+        startY (int): The first year of history.
+        nb_years (int): Number of years of history.
+
+    Returns:
+        tuple: A tuple containing three np.ndarray:
+        - ids: Ticker IDs of the universe, see registry
+        - returns: A days x ids array of daily log returns, in the storage type of the prices
+        - spy: The daily log returns of SPY on the same days
+
+    Notes:
+        - The universe is the index members on the first day with a price on every day of the period
+        - SPY is valued at its last close on sessions it has no price
+
+    Examples:
+        >>> ids, returns, spy = source_returns(2010, 5)
+    """
+    start = pd.Timestamp(datetime.datetime(startY, 1, 1)).tz_localize("UTC")
+    end = pd.Timestamp(datetime.datetime(startY + nb_years, 1, 1)).tz_localize("UTC")
+    i, j = sp500_data.index.slice_locs(start, end)
+    if j - i < 2:
+        raise ValueError(f"no history from {startY} to {startY + nb_years}")
+
+    log = scores.LOG_PRICES[i:j]
+    (ids,) = np.nonzero(np.isfinite(log).all(axis=0) & sp500_members[i])
+
+    spy = spy_data["SPY"].reindex(sp500_data.index[i:j]).ffill().bfill()
+    return ids, np.diff(log[:, ids], axis=0), np.diff(np.log(spy.to_numpy()))
+
+
+def block_rows(n_paths, n_days, n_source, block=21, method="stationary", rng=None):
+    """Draws the source rows of synthetic paths, in blocks of consecutive days.
+
+    Args:
+        n_paths (int): Number of paths.
+        n_days (int): Number of days of each path.
+        n_source (int): Number of source days to draw from.
+        block (int, optional): Block length in days, the mean block length for the stationary bootstrap. Defaults to 21.
+        method (str, optional): "stationary" for random block lengths (Politis and Romano), "block" for fixed ones. Defaults to "stationary".
+        rng (np.random.Generator, optional): Random generator. Defaults to None.
+
+    Returns:
+        np.ndarray: A paths x days array of source rows, blocks wrap around the end of the source.
+
+    Examples:
+        >>> rows = block_rows(1000, 756, 5000, block=21)
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}, use one of {METHODS}")
+    rng = np.random.default_rng(rng)
+
+    days = np.arange(n_days)
+    if method == "stationary":
+        restart = rng.random((n_paths, n_days)) < 1 / block
+        restart[:, 0] = True
+    else:
+        restart = np.broadcast_to(days % block == 0, (n_paths, n_days))
+
+    # every day continues the block started on the last restart
+    starts = rng.integers(0, n_source, (n_paths, n_days))
+    last = np.maximum.accumulate(np.where(restart, days, 0), axis=1)
+    return (np.take_along_axis(starts, last, axis=1) + days - last) % n_source
+
+
+def synthetic_paths(
+    startY,
+    nb_years,
+    n_paths,
+    n_days,
+    block=21,
+    method="stationary",
+    batch=32,
+    seed=None,
+    dtype=PRICE_DTYPE,
+):
+    """Generates synthetic price paths of the universe and SPY by bootstrapping history.
+
+    Paths are drawn in batches into preallocated arrays, which are reused from one batch to the next.
+
+    Args:
+        startY (int): The first year of the source history.
+        nb_years (int): Number of years of source history.
+        n_paths (int): Number of paths to generate.
+        n_days (int): Number of daily returns of each path.
+        block (int, optional): Block length in days, see block_rows. Defaults to 21.
+        method (str, optional): "stationary" or "block", see block_rows. Defaults to "stationary".
+        batch (int, optional): Number of paths per batch. Defaults to 32.
+        seed (int, optional): Seed of the random generator, for reproducible paths. Defaults to None.
+        dtype (str, optional): Type of the path arrays, "float32" halves their memory. Defaults to load_data.PRICE_DTYPE.
+
+    Yields:
+        tuple: A tuple containing three elements:
+        - ids (np.ndarray): Ticker IDs of the columns, see registry
+        - prices (np.ndarray): A paths x (n_days + 1) x ids array of prices starting at 1
+        - spy (np.ndarray): A paths x (n_days + 1) array of SPY prices starting at 1
+
+    Notes:
+        - The arrays of a batch are overwritten by the next batch, copy them to keep them
+        - Log prices are cumulated in the type of the paths, the engines cumulate their returns in float64
+
+    Examples:
+        >>> for ids, prices, spy in synthetic_paths(2005, 10, 1000, 756):
+        ...     print(prices[:, -1].mean())
+    """
+    rng = np.random.default_rng(seed)
+    ids, returns, spy_returns = source_returns(startY, nb_years)
+    returns = returns.astype(dtype, copy=False)
+    spy_returns = spy_returns.astype(dtype, copy=False)
+
+    prices = np.empty((batch, n_days + 1, ids.size), dtype=dtype)
+    spy = np.empty((batch, n_days + 1), dtype=dtype)
+    prices[:, 0] = 0
+    spy[:, 0] = 0
+
+    for first in range(0, n_paths, batch):
+        n = min(batch, n_paths - first)
+        rows = block_rows(n, n_days, returns.shape[0], block, method, rng)
+
+        # gather the returns, then cumulate and exponentiate in place
+        np.take(returns, rows, axis=0, out=prices[:n, 1:], mode="wrap")
+        np.take(spy_returns, rows, out=spy[:n, 1:], mode="wrap")
+        np.cumsum(prices[:n], axis=1, out=prices[:n])
+        np.cumsum(spy[:n], axis=1, out=spy[:n])
+
+        yield ids, np.exp(prices[:n], out=prices[:n]), np.exp(spy[:n], out=spy[:n])
+        prices[:n, 0] = 0
+        spy[:n, 0] = 0
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# Yahoo Finance ticker suffixes of the exchanges we may hold stocks from,
+# tickers without a suffix trade on the primary (US) calendar
+EXCHANGE_SUFFIXES = {
+    ".PA": "XPAR",
+    ".AS": "XAMS",
+    ".BR": "XBRU",
+    ".DE": "XETR",
+    ".L": "XLON",
+    ".MI": "XMIL",
+    ".MC": "XMAD",
+    ".SW": "XSWX",
+    ".TO": "XTSE",
+    ".T": "XTKS",
+    ".HK": "XHKG",
+}
+PRIMARY_EXCHANGE = "XNYS"
+
+
+def exchange_of(ticker):
+    """Returns the exchange calendar a ticker trades on, from its Yahoo Finance suffix.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+
+    Returns:
+        str: ISO MIC code of the exchange, PRIMARY_EXCHANGE for US tickers.
+
+    Examples:
+        >>> exchange_of('SAN.PA')
+        'XPAR'
+    """
+    for suffix, exchange in EXCHANGE_SUFFIXES.items():
+        if ticker.endswith(suffix):
+            return exchange
+    return PRIMARY_EXCHANGE
+
+
+def align_to_primary(sp500_data, thresh=50):
+    """Aligns all tickers on the primary exchange calendar.
+
+    Rows where only foreign stocks traded are dropped, and foreign stocks are forward filled over the primary sessions their exchange was closed, within their trading life. The mask keeps track of the real observations.
+
+    Args:
+        sp500_data (pd.DataFrame): Raw stock prices, with rows from every exchange calendar.
+        thresh (int, optional): Minimum number of primary exchange prices for a row to be a primary session. Defaults to 50.
+
+    Returns:
+        tuple: A tuple containing two elements:
+        - aligned (pd.DataFrame): Stock prices on the primary calendar
+        - valid (np.ndarray): A dates x tickers boolean array, True where the price was observed that day
+
+    Notes:
+        - Stocks on the primary calendar are not filled, their gaps stay NaN
+        - Mixed-exchange portfolios are valued with the last close of foreign stocks
+
+    Examples:
+        >>> aligned, valid = align_to_primary(sp500_data)
+    """
+    foreign = np.array(
+        [exchange_of(str(ticker)) != PRIMARY_EXCHANGE for ticker in sp500_data.columns]
+    )
+    observed = sp500_data.notna().to_numpy()
+    sessions = observed[:, ~foreign].sum(axis=1) >= thresh
+
+    aligned = sp500_data.copy()
+    if foreign.any():
+        # last close inside the trading life of each foreign stock
+        prices = sp500_data.loc[:, foreign]
+        alive = prices.ffill().notna() & prices.bfill().notna()
+        aligned.loc[:, foreign] = prices.ffill().where(alive)
+
+    return aligned[sessions], observed[sessions]
@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Default width in pixels of a chart in the centered Streamlit layout,
+# one point per pixel is all a browser can show.
+CHART_WIDTH = 704
+
+
+def lttb(x, y, n_out):
+    """Downsamples a series with the largest-triangle-three-buckets algorithm.
+
+    This function keeps the first and last points and, for each bucket in between, the point forming the largest triangle with the previously kept point and the average of the next bucket, which preserves peaks and troughs.
+
+    Args:
+        x (np.ndarray): Increasing x values as floats.
+        y (np.ndarray): Series values, without NaN.
+        n_out (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Integer positions of the kept points.
+
+    Examples:
+        >>> kept = lttb(np.arange(10000.0), np.random.rand(10000), 700)
+    """
+    n = x.size
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # interior points split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    kept = np.empty(n_out, dtype=int)
+    kept[0] = 0
+    kept[-1] = n - 1
+
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # average of the next bucket, or the last point for the final bucket
+        nlo, nhi = hi, edges[b + 2] if b + 2 < edges.size else n
+        cx = x[nlo:nhi].mean()
+        cy = y[nlo:nhi].mean()
+
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        kept[b + 1] = a
+
+    return kept
+
+
+def downsample(frame, n_points=CHART_WIDTH):
+    """Reduces every column of a time series DataFrame to a point budget.
+
+    Each column is downsampled on its own with lttb, so the result is returned in long format, ready for px.line(..., x=<index name>, y="value", color="variable").
+
+    Args:
+        frame (pd.DataFrame): Series to plot, indexed by date.
+        n_points (int, optional): Point budget per series. Defaults to CHART_WIDTH.
+
+    Returns:
+        pd.DataFrame: A long DataFrame with the index name, "variable" and "value" columns.
+
+    Examples:
+        >>> long = downsample(banch, 700)
+        >>> fig = px.line(long, x='Date', y='value', color='variable')
+    """
+    x = frame.index
+    x_name = x.name or "index"
+    if isinstance(x, pd.DatetimeIndex):
+        x_float = x.asi8.astype(float)
+    else:
+        x_float = x.to_numpy(dtype=float)
+
+    parts = []
+    for column in frame.columns:
+        y = frame[column].to_numpy(dtype=float)
+        valid = np.flatnonzero(~np.isnan(y))
+        kept = valid[lttb(x_float[valid], y[valid], n_points)]
+        parts.append(
+            pd.DataFrame({x_name: x[kept], "variable": column, "value": y[kept]})
+        )
+    return pd.concat(parts, ignore_index=True)
+
+
+def zoom_window(index, key):
+    """Renders a date range slider and returns the selected period.
+
+    Charts are downsampled to the width of the screen, narrowing the period shows the data in more detail, up to full resolution.
+
+    Args:
+        index (pd.DatetimeIndex): Dates available for the charts.
+        key (str): Unique Streamlit widget key.
+
+    Returns:
+        tuple: Start and end timestamps of the selected period, in the index timezone.
+
+    Examples:
+        >>> start, end = zoom_window(banch.index, "zoom")
+    """
+    first = index[0].tz_localize(None).to_pydatetime()
+    last = index[-1].tz_localize(None).to_pydatetime()
+    start, end = st.slider(
+        "**Zoom** period:",
+        min_value=first,
+        max_value=last,
+        value=(first, last),
+        format="YYYY-MM-DD",
+        key=key,
+    )
+    return pd.Timestamp(start, tz=index.tz), pd.Timestamp(end, tz=index.tz)
+
+
+def line_chart(frame, title, n_points=CHART_WIDTH):
+    """Builds a plotly line chart from a downsampled DataFrame.
+
+    Args:
+        frame (pd.DataFrame): Series to plot, indexed by date.
+        title (str): Chart title.
+        n_points (int, optional): Point budget per series. Defaults to CHART_WIDTH.
+
+    Returns:
+        plotly.graph_objects.Figure: The line chart.
+
+    Examples:
+        >>> st.plotly_chart(line_chart(banch, "Banchmark"))
+    """
+    # plotly is loaded by the first chart, not by importing the helpers
+    import plotly.express as px
+
+    long = downsample(frame, n_points)
+    return px.line(long, x=long.columns[0], y="value", color="variable", title=title)
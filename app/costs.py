@@ -0,0 +1,170 @@
+import numpy as np
+
+import registry
+
+# Transaction costs from the weights actually traded. At each rebalancing the portfolio moves
+# from the weights drifted by the last period's returns to the new target weights. All functions
+# take weights of shape (..., periods, tickers), so the leading axes batch several strategies.
+
+TRADED = 1e-12  # smallest weight change counted as a trade by the fixed costs
+
+
+def ticker_costs(costs):
+    """Spreads a cost over the tickers.
+
+    Args:
+        costs (float, dict or np.ndarray): The same cost for every ticker, a mapping of symbols to costs, the others costing 0, or a cost per ticker ID.
+
+    Returns:
+        np.ndarray: The cost of every ticker, by ID.
+
+    Examples:
+        >>> rates = ticker_costs({"AAPL": 0.0005, "MSFT": 0.0005})
+    """
+    if isinstance(costs, dict):
+        by_id = np.zeros(registry.SYMBOLS.size)
+        by_id[registry.to_ids(list(costs))] = list(costs.values())
+        return by_id
+    return np.broadcast_to(np.asarray(costs, dtype=float), registry.SYMBOLS.shape)
+
+
+def drifted(weights, growth):
+    """Weights at the end of each period, once the prices have moved.
+
+    Args:
+        weights (np.ndarray): Target weights of each period, NaN or 0 for cash.
+        growth (np.ndarray): Growth of every held stock over each period, see strategies.holding_growth.
+
+    Returns:
+        np.ndarray: The drifted weights, 0 for periods in cash.
+    """
+    value = np.where(np.nan_to_num(weights) > 0, weights * growth, 0)
+    total = value.sum(axis=-1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, value / total, 0)
+
+
+def trades(weights, growth):
+    """Weight changes at every rebalancing, from the drifted to the target weights.
+
+    The first portfolio is bought from cash and the last one is sold back to cash.
+
+    Args:
+        weights (np.ndarray): Target weights of shape (..., periods, tickers).
+        growth (np.ndarray): Growth of every held stock over each period.
+
+    Returns:
+        np.ndarray: The changes, of shape (..., periods + 1, tickers), one row per rebalancing date.
+    """
+    target = np.nan_to_num(weights)
+    cash = np.zeros_like(target[..., :1, :])
+    before = drifted(target, growth)
+    return np.concatenate([target, cash], axis=-2) - np.concatenate(
+        [cash, before], axis=-2
+    )
+
+
+def turnover(weights, growth):
+    """Turnover at every rebalancing, the sum of the absolute weight changes.
+
+    Args:
+        weights (np.ndarray): Target weights of shape (..., periods, tickers).
+        growth (np.ndarray): Growth of every held stock over each period.
+
+    Returns:
+        np.ndarray: The turnover, of shape (..., periods + 1), 1 to buy the first portfolio and 1 to sell the last one.
+
+    Examples:
+        >>> weights = strategies.equal_weights(positions)
+        >>> growth, spy = strategies.holding_growth(dates[:-1], weights)
+        >>> turnover(weights, growth)
+    """
+    return np.abs(trades(weights, growth)).sum(axis=-1)
+
+
+def rebalancing_costs(weights, growth, proportional=0.0, fixed=0.0, capital=1.0):
+    """Costs of every rebalancing.
+
+    Args:
+        weights (np.ndarray): Target weights of shape (..., periods, tickers).
+        growth (np.ndarray): Growth of every held stock over each period.
+        proportional (float, dict or np.ndarray, optional): Cost per unit of value traded, per ticker, see ticker_costs. Defaults to 0.0.
+        fixed (float, dict or np.ndarray, optional): Cost per trade, per ticker, in currency. Defaults to 0.0.
+        capital (float, optional): Starting capital in currency, the unit of the fixed costs. Defaults to 1.0.
+
+    Returns:
+        tuple: A tuple containing two np.ndarray of shape (..., periods + 1):
+        - rate: Proportional costs, as a share of the portfolio value
+        - fees: Fixed costs, as a share of the starting capital
+    """
+    traded = np.abs(trades(weights, growth))
+    rate = traded @ ticker_costs(proportional)
+    fees = (traded > TRADED) @ ticker_costs(fixed) / capital
+    return rate, fees
+
+
+def cumulate(growth, costs, start):
+    """Compounds period returns net of costs, without a loop over the periods.
+
+    The value after period q is growth[q] * value[q - 1] - costs[q], which unrolls to G[q] * (start - sum(costs[j] / G[j], j <= q)) with G the cumulative growth.
+
+    Args:
+        growth (np.ndarray): Return of each period, along the last axis.
+        costs (np.ndarray): Cost paid at the end of each period.
+        start (float): The starting value.
+
+    Returns:
+        np.ndarray: The value after each period, NaN from the first NaN return on.
+    """
+    total = np.cumprod(growth, axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return total * (start - np.cumsum(costs / total, axis=-1))
+
+
+def net_values(weights, growth, proportional=0.0, fixed=0.0, capital=1.0):
+    """Values of portfolios net of their transaction costs, over every rebalancing and strategy at once.
+
+    Proportional costs scale with the value traded and fixed costs with the number of trades, so the value at each date is a linear recurrence of the last one, see cumulate.
+
+    Args:
+        weights (np.ndarray): Target weights of shape (..., periods, tickers), NaN or 0 for periods in cash.
+        growth (np.ndarray): Growth of every held stock over each period, see strategies.holding_growth.
+        proportional (float, dict or np.ndarray, optional): Cost per unit of value traded, per ticker. Defaults to 0.0.
+        fixed (float, dict or np.ndarray, optional): Cost per trade, per ticker, in currency. Defaults to 0.0.
+        capital (float, optional): Starting capital in currency. Defaults to 1.0.
+
+    Returns:
+        tuple: A tuple containing two np.ndarray of shape (..., periods + 1), in units of the starting capital:
+        - values: Value after the costs of each rebalancing date
+        - paid: Costs paid at each rebalancing date
+
+    Examples:
+        >>> values, paid = net_values(weights, growth, proportional=0.0005, fixed=1, capital=10000)
+        >>> batch, paid = net_values(np.stack([weights_a, weights_b]), np.stack([growth_a, growth_b]), 0.0005)
+    """
+    rate, fees = rebalancing_costs(weights, growth, proportional, fixed, capital)
+
+    # growth of the whole portfolio before each rebalancing, cash does not move
+    held = np.nan_to_num(weights) > 0
+    roi = np.where(held, weights * growth, 0).sum(axis=-1)
+    roi = np.where(held.any(axis=-1), roi, 1)
+    gross = np.concatenate([np.ones_like(roi[..., :1]), roi], axis=-1)
+
+    values = cumulate(gross * (1 - rate), fees, 1.0)
+    before = gross * np.concatenate(
+        [np.ones_like(values[..., :1]), values[..., :-1]], axis=-1
+    )
+    return values, before - values
+
+
+# DEBUGGING
+
+# 1. Turnover and costs of the momentum portfolios
+# import pandas as pd
+# import strategies
+# dates = strategies.schedule(pd.Timestamp("2007-06-01").tz_localize("UTC"), 8)
+# positions = strategies.top_positions(strategies.momentum_signal(dates[:-1]), 10)
+# weights = strategies.equal_weights(positions)
+# growth, spy = strategies.holding_growth(dates[:-1], weights)
+# print(turnover(weights, growth))
+# print(net_values(weights, growth, proportional=0.0005, fixed=1, capital=10000))
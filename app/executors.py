@@ -0,0 +1,280 @@
+import argparse
+import math
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# shared secret of the remote workers, required when they are not on localhost
+AUTHKEY = os.environ.get("PORTFOLIO_WORKER_KEY", "").encode() or None
+
+# public secret of the workers on localhost, when PORTFOLIO_WORKER_KEY is not set
+LOCAL_KEY = b"portfoliobacktester"
+
+
+def chunks(tasks, chunksize):
+    """Splits tasks into consecutive chunks, the unit of work sent to the workers.
+
+    Args:
+        tasks (list): Argument tuples of the tasks.
+        chunksize (int): Number of tasks per chunk.
+
+    Returns:
+        list: The chunks, in task order.
+    """
+    return [tasks[i : i + chunksize] for i in range(0, len(tasks), chunksize)]
+
+
+def worker_key(hosts, authkey=None):
+    """Returns the shared secret for workers on some hosts.
+
+    Without a secret, the public LOCAL_KEY only protects workers on the loopback interface, anyone who can reach another interface could send them code to run.
+
+    Args:
+        hosts (list): Host names or addresses of the workers.
+        authkey (bytes, optional): Shared secret of the workers. Defaults to None, LOCAL_KEY.
+
+    Returns:
+        bytes: The secret.
+
+    Raises:
+        ValueError: If a host is not a loopback address and there is no secret.
+    """
+    if authkey:
+        return authkey
+    import ipaddress
+    import socket
+
+    for host in hosts:
+        try:
+            loopback = ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+        except (OSError, ValueError):
+            loopback = False
+        if not loopback:
+            raise ValueError(f"set PORTFOLIO_WORKER_KEY to use a worker on {host!r}")
+    return LOCAL_KEY
+
+
+def run_chunk(function, chunk):
+    """Runs the tasks of a chunk in a worker.
+
+    Args:
+        function (callable): The function of the tasks, a module level function or a functools.partial of one so it can be pickled.
+        chunk (list): Argument tuples of the tasks.
+
+    Returns:
+        list: The results, in task order.
+    """
+    return [function(*task) for task in chunk]
+
+
+class SerialExecutor:
+    """Runs the tasks one after the other in the current process."""
+
+    workers = 1
+
+    def map(self, function, tasks, chunksize=None):
+        """Runs function(*task) for every task.
+
+        All executors share this method: results are merged in task order, so they do not depend on the executor, the number of workers or the chunk size.
+
+        Args:
+            function (callable): The function of the tasks, a module level function or a functools.partial of one.
+            tasks (iterable): Argument tuples of the tasks.
+            chunksize (int, optional): Number of tasks sent to a worker at once. Defaults to about 4 chunks per worker.
+
+        Returns:
+            list: The results, in task order.
+
+        Examples:
+            >>> SerialExecutor().map(pow, [(2, 3), (3, 2)])
+            [8, 9]
+        """
+        return run_chunk(function, list(tasks))
+
+    def _chunks(self, tasks, chunksize):
+        tasks = list(tasks)
+        chunksize = chunksize or max(1, math.ceil(len(tasks) / (4 * self.workers)))
+        return chunks(tasks, chunksize)
+
+
+class ThreadExecutor(SerialExecutor):
+    """Runs the tasks on a pool of threads, for engines that release the GIL in NumPy.
+
+    Args:
+        workers (int, optional): Number of threads. Defaults to 4.
+    """
+
+    def __init__(self, workers=4):
+        self.workers = workers
+
+    def pool(self):
+        return ThreadPoolExecutor(max_workers=self.workers)
+
+    def map(self, function, tasks, chunksize=None):
+        parts = self._chunks(tasks, chunksize)
+        with self.pool() as pool:
+            results = pool.map(run_chunk, [function] * len(parts), parts)
+            return [result for part in results for result in part]
+
+
+class ProcessExecutor(ThreadExecutor):
+    """Runs the tasks on a pool of local processes, which map the shared dataset instead of copying it.
+
+    Args:
+        workers (int, optional): Number of processes. Defaults to os.cpu_count().
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count()
+
+    def pool(self):
+        # multiprocessing is loaded by the first process pool, not by the engines importing SerialExecutor
+        from concurrent.futures import ProcessPoolExecutor
+
+        return ProcessPoolExecutor(max_workers=self.workers)
+
+
+class RemoteExecutor(SerialExecutor):
+    """Runs the tasks on worker processes reached over sockets, see serve_worker.
+
+    Every worker gets a chunk at a time. A chunk lost with its worker, by a dropped connection or a timeout, is sent again to the other workers.
+
+    Args:
+        addresses (list): (host, port) of the workers.
+        retries (int, optional): Number of times a lost chunk is sent again. Defaults to 3.
+        timeout (float, optional): Seconds to wait for the result of a chunk before it is considered lost. Defaults to None, no limit.
+        authkey (bytes, optional): Shared secret of the workers. Defaults to AUTHKEY, see worker_key.
+
+    Raises:
+        ValueError: If a worker is not on localhost and there is no secret.
+
+    Examples:
+        >>> executor = RemoteExecutor([("127.0.0.1", 6001), ("127.0.0.1", 6002)])
+        >>> stats, med = simulate(2010, 5, 10, 1000, executor=executor)
+    """
+
+    def __init__(self, addresses, retries=3, timeout=None, authkey=AUTHKEY):
+        self.addresses = list(addresses)
+        self.workers = len(self.addresses)
+        self.retries = retries
+        self.timeout = timeout
+        self.authkey = worker_key([host for host, _ in self.addresses], authkey)
+
+    def map(self, function, tasks, chunksize=None):
+        parts = self._chunks(tasks, chunksize)
+        results = [None] * len(parts)
+        attempts = [0] * len(parts)
+        todo = queue.Queue()
+        for i in range(len(parts)):
+            todo.put(i)
+
+        state = {"remaining": len(parts), "error": None}
+        lock = threading.Lock()
+
+        def lost(i):
+            with lock:
+                attempts[i] += 1
+                if attempts[i] > self.retries:
+                    state["error"] = RuntimeError(f"chunk {i} lost {attempts[i]} times")
+                else:
+                    todo.put(i)
+
+        def feed(address):
+            conn = self._connect(address)
+            while conn is not None:
+                with lock:
+                    if state["remaining"] == 0 or state["error"]:
+                        break
+                try:
+                    i = todo.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                try:
+                    conn.send((function, parts[i]))
+                    if not conn.poll(self.timeout):
+                        raise TimeoutError(address)
+                    ok, value = conn.recv()
+                except (OSError, EOFError, TimeoutError):
+                    # the worker is gone or stuck, try again on a fresh connection
+                    lost(i)
+                    conn.close()
+                    conn = self._connect(address)
+                    continue
+                with lock:
+                    if ok:
+                        results[i] = value
+                        state["remaining"] -= 1
+                    else:
+                        state["error"] = value
+            if conn is not None:
+                conn.close()
+
+        threads = [threading.Thread(target=feed, args=(a,)) for a in self.addresses]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if state["error"] is not None:
+            raise state["error"]
+        if state["remaining"]:
+            raise RuntimeError(f"{state['remaining']} chunks left and no worker")
+        return [result for part in results for result in part]
+
+    def _connect(self, address):
+        from multiprocessing.connection import Client
+
+        try:
+            return Client(tuple(address), authkey=self.authkey)
+        except OSError:
+            return None
+
+
+def serve_worker(address=("127.0.0.1", 6001), authkey=AUTHKEY):
+    """Serves chunks of tasks to a RemoteExecutor, one connection at a time.
+
+    Args:
+        address (tuple, optional): (host, port) to listen on. Defaults to ("127.0.0.1", 6001).
+        authkey (bytes, optional): Shared secret of the workers. Defaults to AUTHKEY, see worker_key.
+
+    Raises:
+        ValueError: If the host is not a loopback address and there is no secret.
+
+    Notes:
+        - Run it from the app folder so the engines and the shared dataset are found
+        - Errors of the tasks are sent back to the executor and raised there
+
+    Examples:
+        $ python executors.py --port 6001
+    """
+    from multiprocessing.connection import Listener
+
+    authkey = worker_key([address[0]], authkey)
+    with Listener(tuple(address), authkey=authkey) as listener:
+        while True:
+            with listener.accept() as conn:
+                while True:
+                    try:
+                        function, chunk = conn.recv()
+                    except (OSError, EOFError):
+                        break
+                    try:
+                        reply = (True, run_chunk(function, chunk))
+                    except Exception as e:
+                        reply = (False, e)
+                    try:
+                        conn.send(reply)
+                    except OSError:
+                        break
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest remote worker")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6001)
+    args = parser.parse_args()
+    try:
+        serve_worker((args.host, args.port))
+    except ValueError as e:
+        parser.error(str(e))
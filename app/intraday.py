@@ -0,0 +1,428 @@
+import os
+import time
+import uuid
+import zlib
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# partitioned store of intraday bars, see ingest
+INTRADAY_DIR = os.environ.get("PORTFOLIO_INTRADAY_DIR", "./intraday")
+GROUPS = 16  # ticker groups, a query only opens the groups of its tickers
+BARS_PER_DAY = 390  # minute bars of a regular US session
+
+SCHEMA = pa.schema(
+    [
+        ("Time", pa.timestamp("ns", tz="UTC")),
+        ("Ticker", pa.string()),
+        ("Close", pa.float64()),
+    ]
+)
+
+
+def group_of(ticker):
+    """Returns the ticker group of a symbol, the first partition key of the store.
+
+    Args:
+        ticker (str): Stock ticker symbol.
+
+    Returns:
+        int: The group, stable across processes and runs.
+    """
+    return zlib.crc32(ticker.encode()) % GROUPS
+
+
+def ingest(chunks, root=INTRADAY_DIR):
+    """Adds intraday bars to the store, one chunk at a time.
+
+    Every chunk is split by ticker group and month, and each part is written as a new Arrow file in group=<g>/month=<YYYY-MM>, so memory is bounded by the chunk size.
+
+    Args:
+        chunks (iterable): DataFrames of bars in long format with Time, Ticker and Close columns, e.g. pd.read_csv(path, chunksize=...).
+        root (str, optional): Directory of the store. Defaults to INTRADAY_DIR.
+
+    Returns:
+        int: Number of bars written.
+
+    Notes:
+        - Naive times are taken as UTC
+        - Files are renamed in place once written, readers never see a partial one
+        - A bar ingested twice is read once, the last file written wins, see scan. Files are named by their write time, so the names sort in write order
+
+    Examples:
+        >>> ingest(pd.read_csv("bars.csv", chunksize=1_000_000))
+    """
+    written = 0
+    stamp = 0
+    for chunk in chunks:
+        times = pd.to_datetime(chunk["Time"], utc=True)
+        frame = pd.DataFrame(
+            {
+                "Time": times,
+                "Ticker": chunk["Ticker"].astype(str),
+                "Close": chunk["Close"].astype(float),
+            }
+        )
+        groups = {t: group_of(t) for t in frame["Ticker"].unique()}
+        months = np.datetime_as_string(times.dt.tz_convert(None).to_numpy(), unit="M")
+        # increasing within a run even if the clock does not move between chunks
+        stamp = max(time.time_ns(), stamp + 1)
+
+        for (group, month), part in frame.groupby(
+            [frame["Ticker"].map(groups), months], sort=False
+        ):
+            folder = os.path.join(root, f"group={group:02d}", f"month={month}")
+            os.makedirs(folder, exist_ok=True)
+            table = pa.Table.from_pandas(
+                part.sort_values("Time", kind="stable"),
+                schema=SCHEMA,
+                preserve_index=False,
+            )
+            name = f"part-{stamp:020d}-{uuid.uuid4().hex[:12]}.arrow"
+            with pa.ipc.new_file(os.path.join(folder, f".{name}"), SCHEMA) as writer:
+                writer.write_table(table)
+            os.replace(os.path.join(folder, f".{name}"), os.path.join(folder, name))
+            written += len(part)
+    return written
+
+
+def ingest_csv(path, chunksize=1_000_000, root=INTRADAY_DIR):
+    """Adds the bars of a CSV file to the store, see ingest.
+
+    Args:
+        path (str): CSV file with Time, Ticker and Close columns.
+        chunksize (int, optional): Number of rows read at once. Defaults to 1_000_000.
+        root (str, optional): Directory of the store. Defaults to INTRADAY_DIR.
+
+    Returns:
+        int: Number of bars written.
+    """
+    return ingest(pd.read_csv(path, chunksize=chunksize), root)
+
+
+def partitions(tickers, start, end, root=INTRADAY_DIR):
+    """Lists the files a query has to read, pruned by ticker group and month.
+
+    Args:
+        tickers (list): Stock ticker symbols.
+        start (datetime): The first time of the query.
+        end (datetime): The last time of the query, included.
+        root (str, optional): Directory of the store. Defaults to INTRADAY_DIR.
+
+    Returns:
+        list: (month, paths) pairs, in month order.
+    """
+    first = str(np.datetime64(_utc(start).tz_convert(None), "M"))
+    last = str(np.datetime64(_utc(end).tz_convert(None), "M"))
+
+    months = {}
+    for group in sorted({group_of(t) for t in tickers}):
+        folder = os.path.join(root, f"group={group:02d}")
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            month = name.partition("=")[2]
+            if first <= month <= last:
+                files = sorted(os.listdir(os.path.join(folder, name)))
+                months.setdefault(month, []).extend(
+                    os.path.join(folder, name, f)
+                    for f in files
+                    if f.endswith(".arrow") and not f.startswith(".")
+                )
+    return sorted(months.items())
+
+
+def scan(tickers, start, end, root=INTRADAY_DIR):
+    """Streams the bars of some tickers month by month, as time x tickers chunks.
+
+    Only the files of the groups and months of the query are opened, memory-mapped, and only the rows of its tickers and times are kept.
+
+    Args:
+        tickers (list): Stock ticker symbols.
+        start (datetime): The first time of the query.
+        end (datetime): The last time of the query, included.
+        root (str, optional): Directory of the store. Defaults to INTRADAY_DIR.
+
+    Yields:
+        pd.DataFrame: The close of each ticker, indexed by bar time, NaN where a ticker has no bar.
+
+    Examples:
+        >>> for bars in scan(["AAPL", "MSFT"], "2024-01-01", "2024-06-30"):
+        ...     print(bars.shape)
+    """
+    tickers = list(tickers)
+    start, end = _utc(start), _utc(end)
+    wanted = pa.array(tickers, type=pa.string())
+    bounds = pa.scalar(start, SCHEMA.field("Time").type), pa.scalar(
+        end, SCHEMA.field("Time").type
+    )
+
+    for month, paths in partitions(tickers, start, end, root):
+        table = pa.concat_tables(
+            pa.ipc.open_file(pa.memory_map(path, "r")).read_all() for path in paths
+        )
+        keep = pc.and_(
+            pc.is_in(table["Ticker"], value_set=wanted),
+            pc.and_(
+                pc.greater_equal(table["Time"], bounds[0]),
+                pc.less_equal(table["Time"], bounds[1]),
+            ),
+        )
+        bars = table.filter(keep).to_pandas()
+        if bars.empty:
+            continue
+        bars = bars.drop_duplicates(["Time", "Ticker"], keep="last")
+        yield bars.pivot(index="Time", columns="Ticker", values="Close").reindex(
+            columns=tickers
+        )
+
+
+def rebalance(prices, state, period):
+    """Streams the equal-weight rebalancing of backtester.rebalance over one chunk.
+
+    Args:
+        prices (np.ndarray): A bars x tickers chunk of complete rows, following the chunks already seen.
+        state (dict): Carried from one chunk to the next, start with {}.
+        period (int): Number of bars between rebalancings.
+
+    Returns:
+        np.ndarray: The value of the rebalanced portfolio at each bar of the chunk.
+
+    Notes:
+        - Every position gets round(value / n, 6) at each rebalancing, like the daily engine
+        - The daily engine skips the last rebalancing when less than half a period is left, which a stream cannot know, so it is kept here
+    """
+    n = prices.shape[1]
+    if not state:
+        state.update(rows=0, reinvest=1 / n, base=prices[0])
+
+    values = np.empty(len(prices))
+    bars = state["rows"] + np.arange(len(prices))
+    cuts = [*np.flatnonzero(bars % period == 0), len(prices)]
+    first = 0
+    for cut in cuts:
+        if cut > first:
+            values[first:cut] = state["reinvest"] * (
+                prices[first:cut] / state["base"]
+            ).sum(axis=1)
+        if cut < len(prices):
+            gain = state["reinvest"] * (prices[cut] / state["base"]).sum()
+            state["reinvest"] = round(gain / n, 6)
+            state["base"] = prices[cut]
+        first = cut
+    state["rows"] += len(prices)
+    return values
+
+
+def portfolio_chunks(
+    tickers, start, end, period=252 * BARS_PER_DAY, benchmark="SPY", root=INTRADAY_DIR
+):
+    """Streams the buy and hold and rebalanced performance of a portfolio over intraday bars.
+
+    Args:
+        tickers (list): Stock ticker symbols of the portfolio.
+        start (datetime): The first time of the backtest.
+        end (datetime): The last time of the backtest, included.
+        period (int, optional): Number of bars between rebalancings. Defaults to a year of bars.
+        benchmark (str, optional): Ticker of the benchmark in the store, None for none. Defaults to "SPY".
+        root (str, optional): Directory of the store. Defaults to INTRADAY_DIR.
+
+    Yields:
+        pd.DataFrame: The benchmark, ROI and REBALANCED columns of backtester.given_portfolio for the bars of a chunk.
+
+    Notes:
+        - Only bars where every stock of the portfolio has a price are kept
+        - The benchmark is valued at its last bar, from the first kept bar
+    """
+    tickers = list(tickers)
+    columns = tickers + ([benchmark] if benchmark else [])
+    state, base, last = {}, None, None
+    for bars in scan(columns, start, end, root):
+        if benchmark:
+            spy = bars[benchmark]
+            if last is not None:
+                spy = spy.fillna(last)
+            spy = spy.ffill()
+            last = spy.iloc[-1]
+
+        prices = bars[tickers].to_numpy()
+        complete = ~np.isnan(prices).any(axis=1)
+        prices = prices[complete]
+        if not len(prices):
+            continue
+        if base is None:
+            base = prices[0]
+            spy_base = spy[complete].iloc[0] if benchmark else None
+
+        chunk = pd.DataFrame(index=bars.index[complete])
+        if benchmark:
+            chunk[benchmark] = spy[complete] / spy_base
+        chunk["ROI"] = (prices / base).mean(axis=1)
+        chunk["REBALANCED"] = rebalance(prices, state, period)
+        yield chunk
+
+
+def given_portfolio(
+    tickers, start, end, period=252 * BARS_PER_DAY, benchmark="SPY", root=INTRADAY_DIR
+):
+    """Backtests a portfolio over intraday bars, see portfolio_chunks.
+
+    The price matrix is never materialized, only the performance columns are kept.
+
+    Args:
+        tickers (list): Stock ticker symbols of the portfolio.
+        start (datetime): The first time of the backtest.
+        end (datetime): The last time of the backtest, included.
+        period (int, optional): Number of bars between rebalancings. Defaults to a year of bars.
+        benchmark (str, optional): Ticker of the benchmark in the store, None for none. Defaults to "SPY".
+        root (str, optional): Directory of the store. Defaults to INTRADAY_DIR.
+
+    Returns:
+        pd.DataFrame: The benchmark, ROI and REBALANCED performance at each bar.
+
+    Raises:
+        ValueError: If no bar has a price for every stock of the portfolio.
+
+    Examples:
+        >>> banch = given_portfolio(["AAPL", "MSFT"], "2024-01-01", "2024-06-30", period=21 * BARS_PER_DAY)
+    """
+    chunks = list(portfolio_chunks(tickers, start, end, period, benchmark, root))
+    if not chunks:
+        raise ValueError(f"no bars of {tickers} from {start} to {end}")
+    return pd.concat(chunks)
+
+
+def com_strategy(
+    tickers,
+    start,
+    n_periods,
+    com,
+    lookback=5 * BARS_PER_DAY,
+    hold=BARS_PER_DAY,
+    top_n=10,
+    benchmark="SPY",
+    root=INTRADAY_DIR,
+):
+    """Runs the momentum strategy with transaction costs of momentum.com_strategy over intraday bars.
+
+    The bars are streamed once, keeping only the prices at the bars where the portfolio is scored and rebalanced, so memory does not grow with the number of bars.
+
+    Args:
+        tickers (list): Stock ticker symbols of the universe.
+        start (datetime): The first time of the lookback of the first period.
+        n_periods (int): Number of holding periods.
+        com (float): Transaction cost rate per portfolio rebalancing.
+        lookback (int, optional): Momentum lookback in bars. Defaults to 5 days of bars.
+        hold (int, optional): Holding period in bars. Defaults to a day of bars.
+        top_n (int, optional): Number of stocks in the portfolio. Defaults to 10.
+        benchmark (str, optional): Ticker of the benchmark in the store. Defaults to "SPY".
+        root (str, optional): Directory of the store. Defaults to INTRADAY_DIR.
+
+    Returns:
+        pd.DataFrame: One row per rebalancing with the Portfolio, ROI, SPY, COM, CROI and CSPY columns of momentum.com_strategy, indexed by Date.
+
+    Raises:
+        ValueError: If the store has fewer bars than the lookback and one period.
+
+    Notes:
+        - Bars are the times where any ticker of the universe or the benchmark traded, prices are carried from the last bar of each ticker
+        - The portfolio holds the top_n stocks beating the benchmark over the lookback, cash if none
+        - Stops at the last full period in the store
+
+    Examples:
+        >>> strategy = com_strategy(universe, "2024-01-02", 20, 0.001)
+    """
+    tickers = list(tickers)
+    wanted = {k * hold for k in range(n_periods + 1)}
+    wanted |= {lookback + k * hold for k in range(n_periods + 1)}
+    last_bar = lookback + n_periods * hold
+
+    snapshots, times, rows, carry = {}, {}, 0, None
+    for bars in scan(tickers + [benchmark], start, pd.Timestamp.max, root):
+        if carry is not None:
+            bars = pd.concat([carry, bars])
+        bars = bars.ffill().iloc[0 if carry is None else 1 :]
+        carry = bars.iloc[-1:]
+
+        values = bars.to_numpy()
+        for bar in wanted.intersection(range(rows, rows + len(values))):
+            snapshots[bar] = values[bar - rows]
+            times[bar] = bars.index[bar - rows]
+        rows += len(values)
+        if rows > last_bar:
+            break
+
+    if lookback + hold not in snapshots:
+        raise ValueError(f"{rows} bars, {lookback + hold + 1} needed")
+
+    symbols = np.asarray(tickers, dtype=object)
+    strategy = [
+        {
+            "Date": times[lookback],
+            "Portfolio": {"_"},
+            "ROI": 1,
+            "SPY": 1,
+            "COM": com,
+            "CROI": 1 - com,
+            "CSPY": 1 - com,
+        }
+    ]
+    held = set()
+    for k in range(n_periods):
+        t = lookback + k * hold
+        if t + hold not in snapshots:
+            break
+        before, now, after = snapshots[t - lookback], snapshots[t], snapshots[t + hold]
+
+        alfa = now[:-1] / before[:-1] - now[-1] / before[-1]
+        ids = _top_k(alfa, top_n)
+        r = (after[ids] / now[ids]).mean() if ids.size else 1
+        s = after[-1] / now[-1]
+
+        # sell + buy except those remained
+        current = set(symbols[ids])
+        cm = com if k == 0 else 2 * com * (top_n - len(held & current)) / top_n
+        held = current
+
+        strategy.append(
+            {
+                "Date": times[t + hold],
+                "Portfolio": current or {"_"},
+                "ROI": r,
+                "SPY": s,
+                "COM": cm,
+                "CROI": r * strategy[-1]["CROI"] - cm,
+                "CSPY": s * strategy[-1]["CSPY"],
+            }
+        )
+
+    # final sell of protfolio to cash out
+    strategy[-1]["CROI"] = strategy[-1]["CROI"] - com
+    strategy[-1]["CSPY"] = strategy[-1]["CSPY"] - com
+    return pd.DataFrame(strategy).set_index("Date")
+
+
+def _top_k(values, k):
+    # the k largest positive values, by descending value and then by position, see scores.top_k
+    (ids,) = np.nonzero(values > 0)
+    return ids[np.lexsort((ids, -values[ids]))][:k]
+
+
+def _utc(time):
+    time = pd.Timestamp(time)
+    return time.tz_localize("UTC") if time.tz is None else time.tz_convert("UTC")
+
+
+# DEBUGGING
+
+# 1. Ingest a CSV of minute bars
+# print(ingest_csv("bars.csv"))
+
+# 2. Buy and hold with a monthly rebalancing
+# banch = given_portfolio(["AAPL", "MSFT"], "2024-01-01", "2024-06-30", period=21 * BARS_PER_DAY)
+# print(banch.iloc[-1])
+
+# 3. Daily momentum over a week of bars
+# print(com_strategy(["AAPL", "MSFT", "NVDA", "AMZN"], "2024-01-02", 20, 0.001, top_n=2))
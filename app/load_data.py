@@ -1,9 +1,27 @@
-import yfinance as yf
 import pandas as pd
 import datetime
 import os
+import subprocess
 import sys
 
+import calendars
+import membership
+import prefix
+import shared_data
+import universe
+
+# bump when the arrays published in the shared segment change
+SEGMENT_LAYOUT = "6"
+
+# preprocessed segment baked into the container image, see bake
+SNAPSHOT_DIR = os.environ.get("PORTFOLIO_SNAPSHOT_DIR", "./snapshot")
+
+# storage of the price matrix, float32 halves the memory and bandwidth of the engines, see precision.py
+PRICE_DTYPES = ("float64", "float32")
+PRICE_DTYPE = os.environ.get("PORTFOLIO_PRICE_DTYPE", "float64")
+if PRICE_DTYPE not in PRICE_DTYPES:
+    raise ValueError(f"PORTFOLIO_PRICE_DTYPE must be one of {PRICE_DTYPES}")
+
 
 def download_sp500():
     """Downloads and saves historical stock price data for S&P 500 companies.
@@ -20,16 +38,25 @@ def download_sp500():
         - Saves downloaded data to 'spy_1999.csv' and 'sp500_1999.csv'
         - Excludes specific tickers like 'BRK.B' and 'BF.B'
         - Adds some additional tickers not in the original S&P 500 list
+        - Saves the point-in-time index membership to 'sp500_membership.csv' and also downloads former constituents
 
     Examples:
         >>> spy, sp500 = download_sp500()
     """
+    # only the Update_Data page downloads, the other processes never pay for yfinance
+    import yfinance as yf
+
     # Read and print the stock tickers that make up S&P500
-    sp500_info = pd.read_html(
+    sp500_tables = pd.read_html(
         "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-    )[0]
+    )
+    sp500_info = sp500_tables[0]
     # print(sp500_info.head())
 
+    # membership intervals, so backtests select among the constituents of their time
+    sp500_history = membership.history_from_wikipedia(sp500_info, sp500_tables[1])
+    sp500_history.to_csv(membership.MEMBERSHIP_PATH, index=False)
+
     # convert and add missing ['CROX', 'SKX', 'SHOO', 'AER']
     sp500_tickers = sp500_info.Symbol.to_list() + [
         "CROX",
@@ -39,6 +66,8 @@ def download_sp500():
         "SAN.PA",
     ]
 
+    sp500_tickers = list(dict.fromkeys(sp500_tickers + sp500_history.Ticker.to_list()))
+
     # print(sp500_tickers)
 
     history = datetime.datetime(1999, 1, 1)
@@ -48,6 +77,7 @@ def download_sp500():
 
     # clean up
     sp500_data = sp500_data.drop(["BRK.B", "BF.B"], axis=1)
+    sp500_data = sp500_data.dropna(axis=1, how="all")
 
     sp500_data.to_csv("./sp500_1999.csv", date_format="%Y-%m-%d")
     spy_data.to_csv("./spy_1999.csv", date_format="%Y-%m-%d")
@@ -89,6 +119,161 @@ def restore_sp500():
     return spy_data, sp500_data
 
 
+def materialize_signals():
+    """Rebuilds the precomputed momentum signals after new data was downloaded.
+
+    This function runs signals.py in a new process, so the engines load the fresh CSV files instead of the data already held by this process.
+
+    Examples:
+        >>> spy, sp500 = download_sp500()
+        >>> materialize_signals()
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "signals.py")
+    subprocess.run([sys.executable, script], check=True)
+
+
+def derived_indexes(sp500_data, valid):
+    """Computes the indexes shared alongside the price data.
+
+    Args:
+        sp500_data (pd.DataFrame): S&P 500 constituent stock prices, aligned on the primary calendar.
+        valid (np.ndarray): Observed prices mask, see calendars.align_to_primary.
+
+    Returns:
+        dict: A dictionary of arrays:
+        - valid: True where a price was observed, dates x tickers
+        - members: True where the ticker was an index member, dates x tickers, see membership.membership_mask
+        - universe: Equal-weight universe rebalanced every session, by date, see universe.rebalanced_index
+        - universe_hold: Equal-weight universe held from the start of each year, years x dates, see universe.buy_and_hold_indexes
+        - universe_years: The start years of universe_hold
+        - log_prices, next_priced, last_priced: The window-return index of the prices, dates x tickers, see prefix.prefix_index
+
+    Examples:
+        >>> aligned, valid = calendars.align_to_primary(sp500_data)
+        >>> indexes = derived_indexes(aligned, valid)
+    """
+    members = membership.membership_mask(
+        membership.read_history(), sp500_data.index, sp500_data.columns
+    )
+    prices = sp500_data.to_numpy(dtype="float64")
+    years, hold = universe.buy_and_hold_indexes(prices, members, sp500_data.index)
+    return {
+        "valid": valid,
+        "members": members,
+        "universe": universe.rebalanced_index(prices, members),
+        "universe_hold": hold,
+        "universe_years": years,
+        **prefix.prefix_index(prices, PRICE_DTYPE),
+    }
+
+
+def data_version():
+    """Returns the version tag of the data files and of the segment layout built from them.
+
+    Returns:
+        str: The version tag, see shared_data.dataset_version, suffixed with PRICE_DTYPE when it is not float64. Without data files, the version of the baked snapshot, or None.
+
+    Examples:
+        >>> version = data_version()
+    """
+    sources = ["./spy_1999.csv", "./sp500_1999.csv"]
+    if not all(os.path.exists(source) for source in sources):
+        return baked_version()
+    if os.path.exists(membership.MEMBERSHIP_PATH):
+        sources.append(membership.MEMBERSHIP_PATH)
+    version = shared_data.dataset_version(sources, SEGMENT_LAYOUT)
+    return version if PRICE_DTYPE == "float64" else f"{version}-{PRICE_DTYPE}"
+
+
+def load_segment():
+    """Attaches the shared memory segment holding the current data, publishing it if needed.
+
+    The data is published once per host as a read-only shared memory segment, and every process attaches to it without holding its own copy.
+
+    Returns:
+        dict: The attached segment, see shared_data.attach.
+
+    Notes:
+        - Checks for 'spy_1999.csv' and 'sp500_1999.csv' in the current directory
+        - Without them, uses the snapshot baked in SNAPSHOT_DIR, or calls download_sp500()
+        - Attaches the shared segment of the current files version if it exists, or the baked snapshot of that version
+        - Otherwise calls restore_sp500(), aligns the stocks on the primary exchange calendar and publishes the segment with its derived indexes
+
+    Examples:
+        >>> segment = load_segment()
+    """
+    version = data_version()
+    if version is None:
+        download_sp500()
+        version = data_version()
+
+    segment = shared_data.attach(version) or shared_data.attach(version, SNAPSHOT_DIR)
+    if segment is None:
+        segment = build_segment(version)
+    return segment
+
+
+def build_segment(version, root=None):
+    """Preprocesses the CSV files and publishes them as a segment with their derived indexes.
+
+    Args:
+        version (str): Version tag of the files, see data_version.
+        root (str, optional): Directory to publish to. Defaults to shared_data.default_dir().
+
+    Returns:
+        dict: The attached segment, see shared_data.attach.
+    """
+    spy_data, sp500_data = restore_sp500()
+    sp500_data, valid = calendars.align_to_primary(sp500_data)
+    arrays, meta = shared_data.from_frames(spy_data, sp500_data, PRICE_DTYPE)
+    arrays.update(derived_indexes(sp500_data, valid))
+    return shared_data.publish(version, arrays, meta, root)
+
+
+def bake(root=SNAPSHOT_DIR):
+    """Builds the preprocessed dataset snapshot shipped in the container image.
+
+    This function runs at image build time, so replicas map a ready segment instead of parsing CSV files, converting dates and building indexes on their first request.
+
+    Args:
+        root (str, optional): Directory of the snapshot. Defaults to SNAPSHOT_DIR.
+
+    Returns:
+        str: The version tag of the snapshot.
+
+    Notes:
+        - Calls download_sp500() if the CSV files are missing
+        - Records the version in a CURRENT file, read by baked_version
+
+    Examples:
+        $ python app/load_data.py --bake
+    """
+    if not (os.path.exists("./spy_1999.csv") and os.path.exists("./sp500_1999.csv")):
+        download_sp500()
+
+    version = data_version()
+    build_segment(version, root)
+    with open(os.path.join(root, "CURRENT"), "w") as f:
+        f.write(version)
+    return version
+
+
+def baked_version(root=SNAPSHOT_DIR):
+    """Returns the version of the baked snapshot, see bake.
+
+    Args:
+        root (str, optional): Directory of the snapshot. Defaults to SNAPSHOT_DIR.
+
+    Returns:
+        str: The version tag, or None if there is no snapshot.
+    """
+    try:
+        with open(os.path.join(root, "CURRENT")) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
 def safe_load():
     """Safely loads historical stock price data, downloading if necessary.
 
@@ -100,25 +285,30 @@ def safe_load():
         - sp500_data: S&P 500 constituent stock prices
 
     Notes:
-        - Checks for 'spy_1999.csv' and 'sp500_1999.csv' in the current directory
-        - Calls restore_sp500() if files exist
-        - Calls download_sp500() if files are missing
+        - The DataFrames are read-only views of the shared segment, see load_segment
 
     Examples:
         >>> spy, sp500 = safe_load()
     """
-    fp1 = "./spy_1999.csv"
-    fp2 = "./sp500_1999.csv"
-    if os.path.exists(fp1) and os.path.exists(fp2):
-        return restore_sp500()
-    else:
-        return download_sp500()
+    return shared_data.to_frames(load_segment())
+
+
+if __name__ == "__main__" and sys.argv[1:] == ["--bake"]:
+    # build time: write the snapshot without publishing a host segment first
+    bake()
+    materialize_signals()
+    sys.exit()
 
+segment = load_segment()
+spy_data, sp500_data = shared_data.to_frames(segment)
 
-spy_data, sp500_data = safe_load()
+# derived indexes, shared with the prices
+sp500_valid = segment["arrays"]["valid"]
+sp500_members = segment["arrays"]["members"]
 
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "--download":
         download_sp500()
+        materialize_signals()
     # else:
     #     load_data()
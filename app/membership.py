@@ -0,0 +1,111 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+MEMBERSHIP_PATH = "./sp500_membership.csv"
+
+
+def history_from_wikipedia(sp500_info, sp500_changes):
+    """Builds the S&P 500 membership history from the Wikipedia constituents and changes tables.
+
+    This function walks the index changes backwards from today's constituents, closing a membership interval at each addition and opening one at each removal.
+
+    Args:
+        sp500_info (pd.DataFrame): Current constituents table, with a Symbol column.
+        sp500_changes (pd.DataFrame): Selected changes table, with the effective date, added ticker and removed ticker as the first, second and fourth columns.
+
+    Returns:
+        pd.DataFrame: Membership intervals with Ticker, Start and End columns. Start is empty when the ticker was a member since before the first recorded change, End is empty for current members.
+
+    Examples:
+        >>> tables = pd.read_html('https://en.wikipedia.org/wiki/List_of_S%26P_500_companies')
+        >>> history = history_from_wikipedia(tables[0], tables[1])
+    """
+    changes = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(sp500_changes.iloc[:, 0], errors="coerce"),
+            "Added": sp500_changes.iloc[:, 1],
+            "Removed": sp500_changes.iloc[:, 3],
+        }
+    ).dropna(subset=["Date"])
+    changes = changes.sort_values("Date", ascending=False, kind="stable")
+
+    # ticker -> end of its membership interval, walking back in time
+    open_end = {ticker: pd.NaT for ticker in sp500_info.Symbol}
+    intervals = []
+    for date, added, removed in changes.itertuples(index=False):
+        if isinstance(added, str) and added in open_end:
+            intervals.append((added, date, open_end.pop(added)))
+        if isinstance(removed, str) and removed not in open_end:
+            open_end[removed] = date
+    intervals += [(ticker, pd.NaT, end) for ticker, end in open_end.items()]
+
+    return pd.DataFrame(intervals, columns=["Ticker", "Start", "End"])
+
+
+def read_history(path=MEMBERSHIP_PATH):
+    """Reads the local membership history file.
+
+    Args:
+        path (str, optional): Path of the CSV file. Defaults to MEMBERSHIP_PATH.
+
+    Returns:
+        pd.DataFrame: Membership intervals with Ticker, Start and End columns, or None if the file does not exist.
+
+    Examples:
+        >>> history = read_history()
+    """
+    if not os.path.exists(path):
+        return None
+    history = pd.read_csv(path)
+    history["Start"] = pd.to_datetime(history["Start"]).dt.tz_localize("UTC")
+    history["End"] = pd.to_datetime(history["End"]).dt.tz_localize("UTC")
+    return history
+
+
+def membership_mask(history, index, columns):
+    """Builds the point-in-time membership bitmap of the index.
+
+    Intervals are written as +1/-1 steps at their start and end rows and accumulated, so the whole bitmap is built in a few vectorized passes.
+
+    Args:
+        history (pd.DataFrame): Membership intervals, see read_history, or None.
+        index (pd.DatetimeIndex): Dates of the price data.
+        columns (pd.Index): Tickers of the price data.
+
+    Returns:
+        np.ndarray: A dates x tickers boolean array, True when the ticker was a member on that date.
+
+    Notes:
+        - Tickers without any recorded interval, like the additional non S&P 500 tickers, are always members
+        - Without a history every ticker is always a member
+
+    Examples:
+        >>> mask = membership_mask(read_history(), sp500_data.index, sp500_data.columns)
+    """
+    mask = np.ones((index.size, columns.size), dtype=bool)
+    if history is None:
+        return mask
+
+    history = history[history["Ticker"].isin(columns)]
+    cols = columns.get_indexer(history["Ticker"])
+    starts = np.where(
+        history["Start"].isna(),
+        0,
+        index.searchsorted(history["Start"].fillna(index[0])),
+    )
+    ends = np.where(
+        history["End"].isna(),
+        index.size,
+        index.searchsorted(history["End"].fillna(index[0])),
+    )
+
+    steps = np.zeros((index.size + 1, columns.size), dtype=np.int32)
+    np.add.at(steps, (starts, cols), 1)
+    np.add.at(steps, (ends, cols), -1)
+
+    recorded = np.zeros(columns.size, dtype=bool)
+    recorded[cols] = True
+    mask[:, recorded] = np.cumsum(steps[:-1, recorded], axis=0) > 0
+    return mask
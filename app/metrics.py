@@ -0,0 +1,148 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+# columns of risk_metrics and running_metrics
+METRICS = ["VOL", "SHARPE", "SORTINO", "MAXDD", "MAXDD_DAYS", "BETA", "ALPHA", "TE"]
+
+
+def risk_metrics(paths, benchmark, periods=TRADING_DAYS, risk_free=0.0):
+    """Computes risk metrics for a whole batch of cumulative performance paths at once.
+
+    This function works on trials x days arrays, so thousands of portfolios are measured with a few array operations instead of a loop over the portfolios.
+
+    Args:
+        paths (np.ndarray): A trials x days array of cumulative values, NaN where a path has no value.
+        benchmark (np.ndarray): Cumulative values of the benchmark, either one path of days values shared by all trials or a trials x days array.
+        periods (int, optional): Number of periods per year, 252 for daily and 4 for quarterly paths. Defaults to TRADING_DAYS.
+        risk_free (float, optional): Annual risk free rate. Defaults to 0.0.
+
+    Returns:
+        pd.DataFrame: A DataFrame with one row per trial, including:
+        - VOL: Annualized volatility
+        - SHARPE: Annualized Sharpe ratio
+        - SORTINO: Annualized Sortino ratio
+        - MAXDD: Maximum drawdown, as a negative fraction
+        - MAXDD_DAYS: Longest time below a previous peak, in periods
+        - BETA: Beta to the benchmark
+        - ALPHA: Annualized alpha to the benchmark
+        - TE: Annualized tracking error
+
+    Examples:
+        >>> paths = np.cumprod(1 + np.random.normal(0, 0.01, (10000, 756)), axis=1)
+        >>> stats = risk_metrics(paths, paths.mean(axis=0))
+    """
+    paths = np.atleast_2d(np.asarray(paths, dtype=float))
+    benchmark = np.broadcast_to(np.asarray(benchmark, dtype=float), paths.shape)
+
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+
+        returns = paths[:, 1:] / paths[:, :-1] - 1
+        bench = benchmark[:, 1:] / benchmark[:, :-1] - 1
+        # compare with the benchmark on the periods both have a return
+        bench = np.where(np.isnan(returns), np.nan, bench)
+        excess = returns - risk_free / periods
+
+        mean = np.nanmean(excess, axis=1)
+        std = np.nanstd(returns, axis=1, ddof=1)
+        downside = np.sqrt(np.nanmean(np.minimum(excess, 0) ** 2, axis=1))
+
+        # drawdowns from the running peak
+        peak = np.fmax.accumulate(paths, axis=1)
+        drawdown = paths / peak - 1
+        days = np.arange(paths.shape[1])
+        last_peak = np.maximum.accumulate(np.where(drawdown < 0, 0, days), axis=1)
+
+        # beta and alpha from the covariance with the benchmark
+        r_dev = returns - np.nanmean(returns, axis=1, keepdims=True)
+        b_dev = bench - np.nanmean(bench, axis=1, keepdims=True)
+        count = np.sum(~np.isnan(r_dev * b_dev), axis=1)
+        cov = np.nansum(r_dev * b_dev, axis=1) / (count - 1)
+        beta = cov / np.nanvar(bench, axis=1, ddof=1)
+        alpha = np.nanmean(returns, axis=1) - beta * np.nanmean(bench, axis=1)
+
+        return pd.DataFrame(
+            {
+                "VOL": std * np.sqrt(periods),
+                "SHARPE": mean / std * np.sqrt(periods),
+                "SORTINO": mean / downside * np.sqrt(periods),
+                "MAXDD": np.nanmin(drawdown, axis=1),
+                "MAXDD_DAYS": np.max(days - last_peak, axis=1),
+                "BETA": beta,
+                "ALPHA": alpha * periods,
+                "TE": np.nanstd(returns - bench, axis=1, ddof=1) * np.sqrt(periods),
+            }
+        )
+
+
+def running_metrics(path, benchmark, periods=TRADING_DAYS, risk_free=0.0):
+    """Computes the risk metrics of a cumulative performance path on each day, from its start to that day.
+
+    Every metric is updated from running sums of the returns, so all the days are measured in one pass instead of one risk_metrics call per day.
+
+    Args:
+        path (np.ndarray): Cumulative values of the portfolio, NaN where it has no value.
+        benchmark (np.ndarray): Cumulative values of the benchmark on the same days.
+        periods (int, optional): Number of periods per year, 252 for daily and 4 for quarterly paths. Defaults to TRADING_DAYS.
+        risk_free (float, optional): Annual risk free rate. Defaults to 0.0.
+
+    Returns:
+        pd.DataFrame: A DataFrame with one row per day and the columns of risk_metrics. The last row is risk_metrics of the whole path, the first has no return yet.
+
+    Examples:
+        >>> path = np.cumprod(1 + np.random.normal(0, 0.01, 756))
+        >>> stats = running_metrics(path, np.cumprod(1 + np.random.normal(0, 0.01, 756)))
+    """
+    path = np.asarray(path, dtype=float)
+    benchmark = np.asarray(benchmark, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = path[1:] / path[:-1] - 1
+        bench = benchmark[1:] / benchmark[:-1] - 1
+        bench = np.where(np.isnan(returns), np.nan, bench)
+        excess = returns - risk_free / periods
+
+        def running(values, mask):
+            # sums of the values observed up to each day, 0 on the first
+            return np.concatenate([[0.0], np.cumsum(np.where(mask, values, 0))])
+
+        has_r, has_b = ~np.isnan(returns), ~np.isnan(bench)
+        n_r, n_b = running(1, has_r), running(1, has_b)
+        s_r, s_rr = running(returns, has_r), running(returns**2, has_r)
+        s_b, s_bb = running(bench, has_b), running(bench**2, has_b)
+        s_rb = running(returns * bench, has_b)
+        s_down = running(np.minimum(excess, 0) ** 2, has_r)
+        tracking = returns - bench
+        s_t, s_tt = running(tracking, has_b), running(tracking**2, has_b)
+
+        def std(total, squares, count):
+            return np.sqrt(np.maximum(squares - total**2 / count, 0) / (count - 1))
+
+        vol = std(s_r, s_rr, n_r)
+        mean = s_r / n_r - risk_free / periods
+        # covariance on the days both have a return, the benchmark days
+        cov = (s_rb - s_r * s_b / n_b) / (n_b - 1)
+        beta = cov / std(s_b, s_bb, n_b) ** 2
+        alpha = s_r / n_r - beta * s_b / n_b
+
+        peak = np.fmax.accumulate(path)
+        drawdown = path / peak - 1
+        days = np.arange(path.size)
+        last_peak = np.maximum.accumulate(np.where(drawdown < 0, 0, days))
+
+        return pd.DataFrame(
+            {
+                "VOL": vol * np.sqrt(periods),
+                "SHARPE": mean / vol * np.sqrt(periods),
+                "SORTINO": mean / np.sqrt(s_down / n_r) * np.sqrt(periods),
+                "MAXDD": np.fmin.accumulate(drawdown),
+                "MAXDD_DAYS": np.maximum.accumulate(days - last_peak),
+                "BETA": beta,
+                "ALPHA": alpha * periods,
+                "TE": std(s_t, s_tt, n_b) * np.sqrt(periods),
+            }
+        )
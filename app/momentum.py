@@ -1,62 +1,158 @@
 import datetime
+import functools
+import numpy as np
 import pandas as pd
 
-from load_data import spy_data as spy_data
+import access
+import costs
+import registry
+import scores
+import strategies
+from executors import SerialExecutor
+from metrics import risk_metrics
 from load_data import sp500_data as sp500_data
+from load_data import sp500_members as sp500_members
 
+ORIGINS_PER_TASK = 64  # origins run together by rolling_paths, one executor task
 
-def moment(date, NY, top_n):
+
+def moment_ids(date, NY, top_n, skip=0):
+    """Ranks stock ticker IDs by momentum relative to the S&P 500.
+
+    This function is the array version of moment, used by the strategies.
+
+    Args:
+        date (datetime): The end date for performance calculation.
+        NY (float): Number of years to look back for performance analysis, 0.25 for 3 months.
+        top_n (int): Number of top-performing stocks to select.
+        skip (int, optional): Number of most recent months left out of the lookback, 1 for 12-1 momentum. Defaults to 0.
+
+    Returns:
+        tuple: A tuple containing three np.ndarray, sorted by ALFA in descending order:
+        - ids: Integer IDs of the top stocks, see registry
+        - roi: Their Return on Investment
+        - alfa: Their Abnormal Return relative to benchmark
+
+    Examples:
+        >>> end_date = pd.Timestamp('2022-12-31')
+        >>> ids, roi, alfa = moment_ids(end_date, 1, 10)
+    """
+    # log returns over the window, two rows of the shared log prices, see scores
+    stocks, spy, last = scores.momentum_scores(date, round(12 * NY), skip)
+
+    # Only stocks in the index at the date are candidates
+    roi = np.where(sp500_members[last], np.exp(stocks), np.nan)
+    alfa = roi - np.exp(spy)
+
+    # Sort by momentum score and select top_n
+    ids = scores.top_k(alfa, top_n)
+
+    return ids, roi[ids], alfa[ids]
+
+
+def moment(date, NY, top_n, skip=0):
     """Calculates momentum scores for stocks based on their performance relative to a benchmark.
 
     This function identifies top-performing stocks by comparing their returns to the S&P 500 over a specified time period.
 
     Args:
         date (datetime): The end date for performance calculation.
-        NY (int): Number of years to look back for performance analysis.
+        NY (float): Number of years to look back for performance analysis, 0.25 for 3 months.
         top_n (int): Number of top-performing stocks to select.
+        skip (int, optional): Number of most recent months left out of the lookback, 1 for 12-1 momentum. Defaults to 0.
 
     Returns:
         pd.DataFrame: A DataFrame containing the top stocks with their:
         - ROI (Return on Investment)
         - ALFA (Abnormal Return relative to benchmark)
-        Sorted by ALFA in descending order, limited to top_n stocks.
+        Sorted by ALFA in descending order, limited to top_n stocks that were index members at the date.
 
     Examples:
         >>> end_date = pd.Timestamp('2022-12-31')
         >>> top_momentum_stocks = moment(end_date, NY=1, top_n=10)
     """
-    end = date
-    start = end - pd.offsets.BDay(252 * NY)
+    ids, roi, alfa = moment_ids(date, NY, top_n, skip)
 
-    # Calculate value of initial investment of 10K in the Portfolio
-    # initial_investment = 10000, not needed for tests
+    return _ranking(ids, roi, alfa)  # Return top_n tickers
 
-    # Slice stocks data
-    timeslice = sp500_data.loc[start:end]
-    notnaslice = timeslice.dropna(axis=1, how="all").dropna(thresh=50)  # valid
 
-    # Prepare banchmark set
-    spy = spy_data.loc[notnaslice.index[0] : notnaslice.index[-1]]
-    spy_score = spy.iloc[-1] / spy.iloc[0]
+def _ranking(ids, roi, alfa):
+    # tickers as index and ROI, ALFA as columns
+    return pd.DataFrame(
+        {"ROI": roi, "ALFA": alfa},
+        index=pd.Index(registry.to_symbols(ids), name=sp500_data.columns.name),
+    )
 
-    # Create DataFrame with tickers as columns and ROI and ALFA as rows
-    score = pd.DataFrame(index=["ROI", "ALFA"], columns=sp500_data.columns)
-    score.loc["ROI"] = notnaslice.iloc[-1] / notnaslice.iloc[0]
-    score.loc["ALFA"] = score.loc["ROI"] - spy_score.values[0]
 
-    calculated_moment = score.loc[:, score.loc["ALFA"] > 0]
+class MomentumRank:
+    """Top momentum stocks of a date, kept up to date as the date moves forward.
 
-    # print(f"calculated_moment: {calculated_moment.head()}")
+    The log return of a window only depends on its first and last rows, so moving to a new date reads the appended and the expired rows and updates every score in O(tickers), however long the lookback. The top stocks are then picked with a partial sort, see scores.top_k.
 
-    # Sort by momentum score and select top_n, including scores
-    # Transpose to have tickers as index and ROI, ALFA as columns, then sort and select top_n
-    top_tickers_with_scores = (
-        calculated_moment.T[["ROI", "ALFA"]]
-        .sort_values(by="ALFA", ascending=False)
-        .head(top_n)
-    )
+    Args:
+        lookback (int, optional): Momentum lookback in months. Defaults to 12.
+        skip (int, optional): Number of most recent months left out of the lookback. Defaults to 0.
+        top_n (int, optional): Number of stocks in the ranking. Defaults to 10.
 
-    return top_tickers_with_scores  # Return top_n tickers
+    Examples:
+        >>> rank = MomentumRank()
+        >>> rank.update(pd.Timestamp('2022-12-29').tz_localize('UTC'))
+        >>> rank.update(pd.Timestamp('2022-12-30').tz_localize('UTC')).frame()
+    """
+
+    def __init__(self, lookback=12, skip=0, top_n=10):
+        self.lookback = lookback
+        self.skip = skip
+        self.top_n = top_n
+        self.date = None
+        self.rows = None  # first, end and last rows of the window
+        self.scores = None  # log return of every stock over the window
+        self.spy = None
+
+    def update(self, date):
+        """Moves the ranking to a date.
+
+        Args:
+            date (datetime): The end date of the lookback window.
+
+        Returns:
+            MomentumRank: The ranking itself, to chain with top or frame.
+        """
+        first, last = scores.rows_at(date, self.lookback)
+        end = scores.rows_at(date, self.skip)[0] if self.skip else last
+        rows = (first, end, last)
+
+        if rows != self.rows:
+            # only the rows entering and leaving the window are read
+            log, spy = scores.LOG_PRICES, scores.LOG_SPY
+            self.scores = log[end] - log[first]
+            end_spy = scores.spy_rows(end, "left" if self.skip else "right")
+            self.spy = spy[end_spy] - spy[scores.spy_rows(first, "left")]
+            if self.skip:
+                # candidates must still trade at the date
+                self.scores[np.isnan(log[last])] = np.nan
+            self.rows = rows
+        self.date = date
+        return self
+
+    def top(self):
+        """Ranks the stocks at the current date.
+
+        Returns:
+            tuple: ids, roi and alfa of the top stocks, see moment_ids.
+        """
+        roi = np.where(sp500_members[self.rows[2]], np.exp(self.scores), np.nan)
+        alfa = roi - np.exp(self.spy)
+        ids = scores.top_k(alfa, self.top_n)
+        return ids, roi[ids], alfa[ids]
+
+    def frame(self):
+        """Ranks the stocks at the current date.
+
+        Returns:
+            pd.DataFrame: The top stocks with their ROI and ALFA, see moment.
+        """
+        return _ranking(*self.top())
 
 
 def momentum_portfolio(tickers, start, period):
@@ -65,44 +161,116 @@ def momentum_portfolio(tickers, start, period):
     This function evaluates the performance of a given set of stocks against the S&P 500 benchmark over a defined investment period.
 
     Args:
-        tickers (list): List of stock ticker symbols to include in the portfolio.
+        tickers (list): List of stock ticker symbols to include in the portfolio, or an array of their IDs, see registry.
         start (datetime): The start date of the investment period.
         period (int): Number of business days to analyze the portfolio performance.
 
     Returns:
-        tuple: A tuple containing three elements:
+        tuple: A tuple containing four elements:
         - roi (float): Portfolio return as a percentage
         - given_portfolio (pd.DataFrame): Normalized portfolio performance data
         - spy_roi (float): S&P 500 benchmark return for the same period
+        - universe_roi (float): Equal-weight universe return for the same period, rebalanced daily, see access.universe_growth
 
     Examples:
         >>> start_date = pd.Timestamp('2022-01-01')
         >>> portfolio_tickers = ['AAPL', 'GOOGL', 'MSFT']
-        >>> portfolio_roi, portfolio_data, benchmark_roi = momentum_portfolio(portfolio_tickers, start_date, 63)
+        >>> portfolio_roi, portfolio_data, benchmark_roi, universe_roi = momentum_portfolio(portfolio_tickers, start_date, 63)
     """
     end = start + pd.offsets.BDay(period)
-    # Slice stocks data
-    timeslice = sp500_data.loc[start:end]
-    notnaslice = timeslice.dropna(axis=1, how="all").dropna(thresh=50)  # valid
+    # rows and ticker IDs of the query, in alphabetical order
+    rows, ids = access.plan(tickers, start, end)
 
     # Prepare banchmark set
-    spy = spy_data.loc[notnaslice.index[0] : notnaslice.index[-1]]
+    spy = access.benchmark(rows)
     spy_roi = spy.iloc[-1]["SPY"] / spy.iloc[0]["SPY"]
+    universe_roi = access.universe_growth(
+        pd.DatetimeIndex([start]), pd.DatetimeIndex([end])
+    )[0]
 
-    given_portfolio = notnaslice[tickers].dropna()
-    given_portfolio.sort_index(axis=1, inplace=True)
+    # only the portfolio columns are read, aligned on the primary calendar at load time
+    given_portfolio = access.read(rows, ids)
 
     # cumulative returns  = %difference data to day from the begining of investment
     # SP500 performance in %, since the start day of investment
     given_portfolio = given_portfolio / given_portfolio.iloc[0]
-    # calculating cumulative gain from Day 1
-    roi = (given_portfolio.sum(axis=1) / given_portfolio.columns.size).iloc[-1]
+    # gain from Day 1 to the last day, two rows of the window-return index
+    roi = access.window_returns(ids[None], [rows.start], [rows.stop - 1]).mean()
+
+    return roi, given_portfolio, spy_roi, universe_roi
+
+
+def quarter_step(date, cache=None, lookback=12, skip=0, top_n=10):
+    """Selects the momentum portfolio at a date and measures it over the following quarter.
+
+    This function is the unit of work shared by all momentum strategies, so results can be memoized per date and reused across overlapping runs.
+
+    Args:
+        date (datetime): The rebalancing date.
+        cache (dict, optional): Mapping of date and parameters to previously computed steps. Defaults to None.
+        lookback (int, optional): Momentum lookback in months. Defaults to 12.
+        skip (int, optional): Number of most recent months left out of the lookback. Defaults to 0.
+        top_n (int, optional): Number of stocks in the portfolio. Defaults to 10.
+
+    Returns:
+        tuple: A tuple containing three elements:
+        - ids (np.ndarray): IDs of the top momentum tickers selected at the date, see registry
+        - roi (float): Portfolio return over the next 63 business days
+        - spy_roi (float): S&P 500 benchmark return for the same period
+
+    Examples:
+        >>> start_date = pd.Timestamp('2022-01-03')
+        >>> ids, roi, spy_roi = quarter_step(start_date)
+    """
+    ids, roi, spy = quarter_steps(
+        pd.DatetimeIndex([date]), cache, lookback, skip, top_n
+    )
+    return ids[0], roi[0], spy[0]
+
+
+def quarter_steps(dates, cache=None, lookback=12, skip=0, top_n=10):
+    """Runs quarter_step at every rebalancing date of a strategy, in array operations.
+
+    The dates missing from the cache are scored, ranked and measured together, see strategies.
+
+    Args:
+        dates (pd.DatetimeIndex): The rebalancing dates.
+        cache (dict, optional): Mapping of date and parameters to previously computed steps, shared with quarter_step. Defaults to None.
+        lookback (int, optional): Momentum lookback in months. Defaults to 12.
+        skip (int, optional): Number of most recent months left out of the lookback. Defaults to 0.
+        top_n (int, optional): Number of stocks in the portfolio. Defaults to 10.
+
+    Returns:
+        tuple: A tuple containing three elements:
+        - ids (list): IDs of the top momentum tickers of each date, by descending ALFA
+        - roi (np.ndarray): Portfolio return over the quarter after each date
+        - spy (np.ndarray): S&P 500 benchmark return for the same quarters
+
+    Examples:
+        >>> dates = strategies.schedule(pd.Timestamp('2022-01-03').tz_localize('UTC'), 4)
+        >>> ids, roi, spy = quarter_steps(dates[:-1])
+    """
+    steps = {} if cache is None else cache
+    keys = [(date, lookback, skip, top_n) for date in dates]
+    missing = [i for i, key in enumerate(keys) if key not in steps]
+
+    if missing:
+        new = dates[missing]
+        signal = strategies.momentum_signal(new, lookback, skip)
+        positions = strategies.top_positions(signal, top_n)
+        roi, spy = strategies.holding_returns(
+            new, strategies.equal_weights(positions), strategies.QUARTER
+        )
+        ranked = strategies.holdings(positions, signal)
+        for i, ids, r, s in zip(missing, ranked, roi, spy):
+            steps[keys[i]] = (ids, r, s)
 
-    return roi, given_portfolio, spy_roi
+    ids, roi, spy = zip(*(steps[key] for key in keys)) if keys else ((), (), ())
+    return list(ids), np.array(roi, dtype=float), np.array(spy, dtype=float)
 
 
 # Strategy, no commission
-def m_strategy(date, n_quarters):
+def m_strategy(date, n_quarters, lookback=12, skip=0, top_n=10):
     """Implements a momentum-based investment strategy over multiple quarters.
 
     This function generates a portfolio strategy by selecting top-performing stocks based on momentum
@@ -111,6 +279,9 @@ def m_strategy(date, n_quarters):
     Args:
         date (datetime): The starting date for the investment strategy.
         n_quarters (int): Number of quarters to run the momentum strategy.
+        lookback (int, optional): Momentum lookback in months, see scores. Defaults to 12.
+        skip (int, optional): Number of most recent months left out of the lookback, 1 for 12-1 momentum. Defaults to 0.
+        top_n (int, optional): Number of stocks in the portfolio. Defaults to 10.
 
     Returns:
         pd.DataFrame: A DataFrame containing strategy performance metrics including:
@@ -120,73 +291,29 @@ def m_strategy(date, n_quarters):
         - SPY: S&P 500 return for the quarter
         - CROI: Cumulative portfolio return
         - CSPY: Cumulative S&P 500 return
+        - UNIVERSE: Equal-weight universe return for the quarter
+        - CUNIVERSE: Cumulative equal-weight universe return
+        - VOL, SHARPE, SORTINO, MAXDD, MAXDD_DAYS, BETA, ALPHA, TE: Quarterly risk metrics of CROI against CSPY, from the start to the date, see strategies.with_metrics
 
     Examples:
         >>> start_date = pd.Timestamp('2020-01-01')
         >>> strategy_results = m_strategy(start_date, 4)
     """
+    dates = strategies.schedule(date, n_quarters)
+    ids, r, s = quarter_steps(dates[:-1], None, lookback, skip, top_n)
 
-    strategy = pd.DataFrame(columns=["Date", "Portfolio", "ROI", "SPY", "CROI", "CSPY"])
-
-    # Init data in the DataFrame
-    strategy = pd.concat(
-        [
-            strategy,
-            pd.DataFrame(
-                {
-                    "Date": date,
-                    "Portfolio": [[""] * 10],
-                    "ROI": 1,
-                    "SPY": 1,
-                    "CROI": 1,
-                    "CSPY": 1,
-                }
-            ),
-        ],
-        ignore_index=True,
+    # no commission, so no cost and no cash out
+    positions = strategies.to_positions(ids)
+    strategy = strategies.performance(
+        dates, positions, r, s, 0, np.zeros(n_quarters), cash_out=False
     )
+    strategy["Portfolio"] = [[""] * top_n, *(registry.SYMBOLS[i] for i in ids)]
+    return strategies.with_metrics(strategy.drop(columns="COM"))
 
-    # Repeat the code 4 times
-    for _ in range(n_quarters):
-
-        m = moment(date, 1, 10)
-
-        r, p, s = momentum_portfolio(m.index, date, 63)
-
-        if strategy.empty:
-            cr = r
-            cs = s
-        else:
-            cr = r * strategy["CROI"].iloc[-1]
-            cs = s * strategy["CSPY"].iloc[-1]
-
-        # update date to the next quarter
-        date = date + pd.offsets.BDay(63)
-
-        # Append data to the DataFrame
-        strategy = pd.concat(
-            [
-                strategy,
-                pd.DataFrame(
-                    {
-                        "Date": date,
-                        "Portfolio": [m.index.values],
-                        "ROI": [r],
-                        "SPY": [s],
-                        "CROI": [cr],
-                        "CSPY": [cs],
-                    }
-                ),
-            ],
-            ignore_index=True,
-        )
-
-    strategy.set_index("Date", inplace=True)
-    strategy.index = pd.to_datetime(strategy.index)
-    return strategy
 
-
-def com_strategy(date, n_quarters, com):
+def com_strategy(
+    date, n_quarters, com, cache=None, lookback=12, skip=0, top_n=10, cost_model=None
+):
     """Implements a momentum-based investment strategy with transaction cost considerations.
 
     This function creates an investment strategy that selects top-performing stocks while accounting for transaction costs and portfolio turnover.
@@ -195,6 +322,11 @@ def com_strategy(date, n_quarters, com):
         date (datetime): The starting date for the investment strategy.
         n_quarters (int): Number of quarters to run the momentum strategy.
         com (float): Transaction cost rate per portfolio rebalancing.
+        cache (dict, optional): Shared quarter_step results, see rolling_simulate. Defaults to None.
+        lookback (int, optional): Momentum lookback in months, see scores. Defaults to 12.
+        skip (int, optional): Number of most recent months left out of the lookback, 1 for 12-1 momentum. Defaults to 0.
+        top_n (int, optional): Number of stocks in the portfolio. Defaults to 10.
+        cost_model (dict, optional): Charges the weights traded instead of com per replaced stock, see strategies.charge. Defaults to None.
 
     Returns:
         pd.DataFrame: A DataFrame containing strategy performance metrics including:
@@ -205,73 +337,40 @@ def com_strategy(date, n_quarters, com):
         - COM: Transaction costs
         - CROI: Cumulative portfolio return adjusted for transaction costs
         - CSPY: Cumulative S&P 500 return
+        - UNIVERSE: Equal-weight universe return for the quarter
+        - CUNIVERSE: Cumulative equal-weight universe return
+        - VOL, SHARPE, SORTINO, MAXDD, MAXDD_DAYS, BETA, ALPHA, TE: Quarterly risk metrics of CROI against CSPY, from the start to the date, see strategies.with_metrics
 
     Examples:
         >>> start_date = pd.Timestamp('2020-01-01')
         >>> strategy_results = com_strategy(start_date, 4, 0.01)
     """
-    strategy = [
-        {
-            "Date": date,
-            "Portfolio": {"_"},
-            "ROI": 1,
-            "SPY": 1,
-            "COM": com,
-            "CROI": 1 - com,
-            "CSPY": 1 - com,
-        }
-    ]
-    # Repeat the code 4 times
-    for _ in range(n_quarters):
-
-        m = moment(date, 1, 10)
-
-        r, p, s = momentum_portfolio(m.index, date, 63)
-
-        # Access the 'Portfolio' from the last dictionary in the strategy list
-        previous_portfolio = strategy[-1]["Portfolio"]
-        current_tickers = set(m.index.values)
-        remains = previous_portfolio.intersection(current_tickers)
-        # Get the number of overlapping elements
-        num_remains = len(remains)
-
-        # sell + buy except those remained
-        cm = 2 * com * (10 - num_remains) / 10
-
-        if len(strategy) < 2:
-            cm = com
-
-        cr = r * strategy[-1]["CROI"] - cm
-        cs = s * strategy[-1]["CSPY"]
-
-        # update date to the next quarter
-        date = date + pd.offsets.BDay(63)
-
-        strategy.append(
-            {
-                "Date": date,
-                "Portfolio": set(m.index.values),
-                "ROI": r,
-                "SPY": s,
-                "COM": cm,
-                "CROI": cr,
-                "CSPY": cs,
-            }
-        )
-
-    # final sell of protfolio to cash out
-    strategy[-1]["CROI"] = strategy[-1]["CROI"] - com
-    strategy[-1]["CSPY"] = strategy[-1]["CSPY"] - com
-
-    # Create the strategy DataFrame
-    strategy_df = pd.DataFrame(strategy)
-    strategy_df.set_index("Date", inplace=True)
-    strategy_df.index = pd.to_datetime(strategy_df.index)
-
-    return strategy_df
-
-
-def stop_strategy(date, n_quarters, com, loss_rate, restart_nb):
+    dates = strategies.schedule(date, n_quarters)
+    ids, r, s = quarter_steps(dates[:-1], cache, lookback, skip, top_n)
+
+    # sell + buy except those remained, the first portfolio and the final sell cost com
+    positions = strategies.to_positions(ids)
+    cm = strategies.commissions(positions, com, top_n)
+
+    strategy = strategies.performance(dates, positions, r, s, com, cm)
+    if cost_model is not None:
+        weights = strategies.equal_weights(positions)
+        strategy = strategies.charge(strategy, weights, cost_model)
+    return strategies.with_metrics(strategy)
+
+
+def stop_strategy(
+    date,
+    n_quarters,
+    com,
+    loss_rate,
+    restart_nb,
+    cache=None,
+    lookback=12,
+    skip=0,
+    top_n=10,
+    cost_model=None,
+):
     """Implements a momentum-based investment strategy with a stop-loss mechanism and portfolio recovery rules.
 
     This function creates an investment strategy that dynamically manages portfolio risk by implementing a stop-loss mechanism and defining conditions for portfolio restart.
@@ -282,6 +381,11 @@ def stop_strategy(date, n_quarters, com, loss_rate, restart_nb):
         com (float): Transaction cost rate per portfolio rebalancing.
         loss_rate (float): Threshold for portfolio loss that triggers stop-loss mechanism.
         restart_nb (int): Number of consecutive positive quarters required to restart portfolio.
+        cache (dict, optional): Shared quarter_step results, see rolling_simulate. Defaults to None.
+        lookback (int, optional): Momentum lookback in months, see scores. Defaults to 12.
+        skip (int, optional): Number of most recent months left out of the lookback, 1 for 12-1 momentum. Defaults to 0.
+        top_n (int, optional): Number of stocks in the portfolio. Defaults to 10.
+        cost_model (dict, optional): Charges the weights traded instead of com per replaced stock, see strategies.charge. Defaults to None.
 
     Returns:
         pd.DataFrame: A DataFrame containing strategy performance metrics including:
@@ -292,6 +396,9 @@ def stop_strategy(date, n_quarters, com, loss_rate, restart_nb):
         - COM: Transaction costs
         - CROI: Cumulative portfolio return adjusted for transaction costs
         - CSPY: Cumulative S&P 500 return
+        - UNIVERSE: Equal-weight universe return for the quarter
+        - CUNIVERSE: Cumulative equal-weight universe return
+        - VOL, SHARPE, SORTINO, MAXDD, MAXDD_DAYS, BETA, ALPHA, TE: Quarterly risk metrics of CROI against CSPY, from the start to the date, see strategies.with_metrics
         - STOP: Boolean indicating if stop-loss is active
         - N_STOP: Number of consecutive stop-loss periods
         - N_POSITIVE: Number of consecutive positive return periods
@@ -300,147 +407,459 @@ def stop_strategy(date, n_quarters, com, loss_rate, restart_nb):
         >>> start_date = pd.Timestamp('2020-01-01')
         >>> strategy_results = stop_strategy(start_date, 4, 0.01, 0.1, 2)
     """
-    stop = False
-    n_positive = 0
-    n_stop = 0
-
-    strategy = [
-        {
-            "Date": date,
-            "Portfolio": {"_"},
-            "ROI": 1,
-            "SPY": 1,
-            "COM": com,
-            "CROI": 1 - com,
-            "CSPY": 1 - com,
-            "STOP": stop,
-            "N_STOP": n_stop,
-            "N_POSITIVE": n_positive,
-        }
+    dates = strategies.schedule(date, n_quarters)
+    ids, r, s = quarter_steps(dates[:-1], cache, lookback, skip, top_n)
+    stop, n_stop, n_positive, sell, waiting = strategies.stop_loss(
+        r, loss_rate, restart_nb
+    )
+
+    # nothing is held while waiting to restart
+    positions = strategies.to_positions(ids)
+    positions[waiting] = False
+
+    # sell or buy everything on stop and restart, nothing to pay while waiting
+    cm = strategies.commissions(positions, com, top_n)
+    cm = np.where(waiting, 0, np.where(sell, com, cm))
+
+    strategy = strategies.performance(
+        dates,
+        positions,
+        r,
+        s,
+        com,
+        cm,
+        growth=np.where(waiting, 1, r),
+        cash_out=not stop[-1:].any(),
+    )
+    if cost_model is not None:
+        weights = strategies.equal_weights(positions)
+        strategy = strategies.charge(strategy, weights, cost_model)
+    strategy = strategies.with_metrics(strategy)
+    strategy["Portfolio"] = [p or {"_"} for p in strategy["Portfolio"]]
+    strategy["STOP"] = np.concatenate([[False], stop])
+    strategy["N_STOP"] = np.concatenate([[0], n_stop])
+    strategy["N_POSITIVE"] = np.concatenate([[0], n_positive])
+    return strategy
+
+
+def mom_simulate(
+    startY,
+    endY,
+    n_quarters,
+    com,
+    loss_rate,
+    restart_nb,
+    lookback=12,
+    skip=0,
+    top_n=10,
+    executor=None,
+):
+    """Simulates momentum investment strategies across multiple years with stop-loss mechanism.
+
+    This function runs a momentum-based investment strategy for each year, tracking portfolio performance and comparing it against the S&P 500 benchmark.
+
+    Args:
+        startY (int): The starting year for the simulation.
+        endY (int): The ending year for the simulation.
+        n_quarters (int): Number of quarters to run each strategy.
+        com (float): Transaction cost rate per portfolio rebalancing.
+        loss_rate (float): Threshold for portfolio loss that triggers stop-loss mechanism.
+        restart_nb (int): Number of consecutive positive quarters required to restart portfolio.
+        lookback (int, optional): Momentum lookback in months, see scores. Defaults to 12.
+        skip (int, optional): Number of most recent months left out of the lookback, 1 for 12-1 momentum. Defaults to 0.
+        top_n (int, optional): Number of stocks in the portfolio. Defaults to 10.
+        executor (SerialExecutor, optional): Runs the strategies, see executors. Defaults to None, in the current process.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing performance metrics for each simulated period, including:
+        - Year: The year range of the strategy
+        - Final_CROI: Cumulative return of the investment strategy
+        - Final_CSPY: Cumulative return of the S&P 500 benchmark
+        - VOL, SHARPE, SORTINO, MAXDD, MAXDD_DAYS, BETA, ALPHA, TE: Quarterly risk metrics of the strategy, see metrics.risk_metrics
+
+    Examples:
+        >>> results = mom_simulate(2000, 2022, 4, 0.01, 0.1, 2)
+    """
+    results = []  # To store the final CROI values
+    paths = []  # CROI and CSPY of each run, for the risk metrics
+
+    years = range(2000, 2023)
+    tasks = [
+        (
+            pd.Timestamp(datetime.datetime(year, 1, 1)).tz_localize("UTC"),
+            n_quarters,
+            com,
+            loss_rate,
+            restart_nb,
+            lookback,
+            skip,
+            top_n,
+        )
+        for year in years
     ]
-    # Repeat the code 4 times
-    for _ in range(n_quarters):
+    runs = (executor or SerialExecutor()).map(strategy_path, tasks)
 
-        m = moment(date, 1, 10)
+    for year, path in zip(years, runs):
+        paths.append(path)
+        results.append(
+            {
+                "Year": f"{year}-{year+n_quarters/4}",
+                "Final_CROI": path[-1, 0],  # Get the final CROI value
+                "Final_CSPY": path[-1, 1],  # Get the final CSPY value
+            }
+        )  # Store the result
 
-        r, p, s = momentum_portfolio(m.index, date, 63)
+    return _with_metrics(pd.DataFrame(results), paths)
 
-        portforlio_record = set(m.index.values)
 
-        if r < (1 - loss_rate):
-            stop = True
-            n_positive = 0
-        else:
-            n_positive += 1
+def rolling_simulate(
+    start,
+    end,
+    n_quarters,
+    com,
+    loss_rate=None,
+    restart_nb=None,
+    step=1,
+    lookback=12,
+    skip=0,
+    top_n=10,
+    executor=None,
+):
+    """Simulates a momentum strategy started from every Nth trading day in a date range.
 
-        if stop:
-            n_stop += 1
+    This function evaluates the same strategy from many rolling origins to show how much the result depends on the start day. The origins run in batches, see rolling_paths: the rebalancing dates of a whole batch are scored and measured at once, and its strategies are compounded in array operations.
 
-        if stop and n_stop == 1:  # first stop, sell everything, all the portfolio
-            cm = com
+    Args:
+        start (datetime): The first possible origin.
+        end (datetime): The last possible origin.
+        n_quarters (int): Number of quarters to run each strategy.
+        com (float): Transaction cost rate per portfolio rebalancing.
+        loss_rate (float, optional): Stop-loss threshold. When None, com_strategy is used instead of stop_strategy. Defaults to None.
+        restart_nb (int, optional): Number of consecutive positive quarters required to restart portfolio. Defaults to None.
+        step (int, optional): Use every step-th trading day as an origin. Defaults to 1.
+        lookback (int, optional): Momentum lookback in months, see scores. Defaults to 12.
+        skip (int, optional): Number of most recent months left out of the lookback, 1 for 12-1 momentum. Defaults to 0.
+        top_n (int, optional): Number of stocks in the portfolio. Defaults to 10.
+        executor (SerialExecutor, optional): Runs the strategies, see executors. Defaults to None, in the current process.
 
-        # normal situation, calcualte overlaps in portfolio and calculate commission
-        if not stop:
-            # Access the 'Portfolio' from the last dictionary in the strategy list
-            previous_portfolio = strategy[-1]["Portfolio"]
-            current_tickers = portforlio_record
-            remains = previous_portfolio.intersection(current_tickers)
-            # Get the number of overlapping elements
-            num_remains = len(remains)
+    Returns:
+        pd.DataFrame: A DataFrame indexed by Origin with one row per start day, including:
+        - Final_CROI: Final cumulative return of the investment strategy
+        - Final_CSPY: Final cumulative return of the S&P 500 benchmark
+        - VOL, SHARPE, SORTINO, MAXDD, MAXDD_DAYS, BETA, ALPHA, TE: Quarterly risk metrics of the strategy, see metrics.risk_metrics
 
-            # sell + buy except those remained, assume that there are 10 stocks in the portforlio
-            cm = 2 * com * (10 - num_remains) / 10
+    Examples:
+        >>> start = pd.Timestamp('2010-01-01').tz_localize('UTC')
+        >>> end = pd.Timestamp('2012-01-01').tz_localize('UTC')
+        >>> results = rolling_simulate(start, end, 4, 0.007, 0.1, 2, step=5)
+        >>> results.describe()
+    """
+    trading_days = sp500_data.index
+    origins = trading_days[(trading_days >= start) & (trading_days <= end)][::step]
+
+    # batches of consecutive origins, scored and compounded together
+    runner = functools.partial(rolling_paths, cache={})
+    tasks = [
+        (batch, n_quarters, com, loss_rate, restart_nb, lookback, skip, top_n)
+        for batch in _batches(origins)
+    ]
+    paths = [
+        path
+        for batch in (executor or SerialExecutor()).map(runner, tasks)
+        for path in batch
+    ]
 
-            if len(strategy) < 2:  # fixing recorded numbers for the first round
-                cm = com
+    results = [
+        {"Origin": origin, "Final_CROI": path[-1, 0], "Final_CSPY": path[-1, 1]}
+        for origin, path in zip(origins, paths)
+    ]
 
-        # detect restarting situation. Stop happened previously.
-        # Sufficient number of positive quarters, buy a portfolio, pay full commission
-        if stop and n_positive == restart_nb + 1:
-            cm = com
-            stop = False
-            n_stop = 0
+    return _with_metrics(pd.DataFrame(results), paths).set_index("Origin")
 
-        cr = r * strategy[-1]["CROI"] - cm
-        cs = s * strategy[-1]["CSPY"]
 
-        if stop and n_stop > 1:  # noting to sell, just waiting
-            cm = 0
-            portforlio_record = {"_"}
-            cr = strategy[-1]["CROI"]
+def strategy_path(
+    date,
+    n_quarters,
+    com,
+    loss_rate=None,
+    restart_nb=None,
+    lookback=12,
+    skip=0,
+    top_n=10,
+    cache=None,
+):
+    """Runs one momentum strategy and keeps its cumulative returns, the task the simulations send to executors.
 
-        # update date to the next quarter
-        date = date + pd.offsets.BDay(63)
+    Args:
+        date (datetime): The starting date for the investment strategy.
+        n_quarters (int): Number of quarters to run the momentum strategy.
+        com (float): Transaction cost rate per portfolio rebalancing.
+        loss_rate (float, optional): Stop-loss threshold. When None, com_strategy is used instead of stop_strategy. Defaults to None.
+        restart_nb (int, optional): Number of consecutive positive quarters required to restart portfolio. Defaults to None.
+        lookback (int, optional): Momentum lookback in months. Defaults to 12.
+        skip (int, optional): Number of most recent months left out of the lookback. Defaults to 0.
+        top_n (int, optional): Number of stocks in the portfolio. Defaults to 10.
+        cache (dict, optional): Shared quarter_step results. Defaults to None.
 
-        strategy.append(
-            {
-                "Date": date,
-                "Portfolio": portforlio_record,
-                "ROI": r,
-                "SPY": s,
-                "COM": cm,
-                "CROI": cr,
-                "CSPY": cs,
-                "STOP": stop,
-                "N_STOP": n_stop,
-                "N_POSITIVE": n_positive,
-            }
+    Returns:
+        np.ndarray: A (n_quarters + 1) x 2 array of the CROI and CSPY columns of the strategy.
+    """
+    if loss_rate is None:
+        strategy = com_strategy(date, n_quarters, com, cache, lookback, skip, top_n)
+    else:
+        strategy = stop_strategy(
+            date,
+            n_quarters,
+            com,
+            loss_rate,
+            restart_nb,
+            cache,
+            lookback,
+            skip,
+            top_n,
         )
+    return strategy[["CROI", "CSPY"]].to_numpy(dtype=float)
+
 
-    # final sell of protfolio to cash out
-    if not stop:
-        strategy[-1]["CROI"] = strategy[-1]["CROI"] - com
+def rolling_paths(
+    origins,
+    n_quarters,
+    com,
+    loss_rate=None,
+    restart_nb=None,
+    lookback=12,
+    skip=0,
+    top_n=10,
+    cache=None,
+):
+    """Runs one momentum strategy from each of several origins at once, the batched strategy_path.
 
-    strategy[-1]["CSPY"] = strategy[-1]["CSPY"] - com
+    The rebalancing dates of all the origins are scored and measured in one quarter_steps call, each date once, then every strategy is compounded in array operations, see costs.cumulate. Only the stop-loss rules run origin by origin, on scalars.
 
-    # Create the strategy DataFrame
-    strategy_df = pd.DataFrame(strategy)
-    strategy_df.set_index("Date", inplace=True)
-    strategy_df.index = pd.to_datetime(strategy_df.index)
+    Args:
+        origins (pd.DatetimeIndex): The starting dates.
+        n_quarters (int): Number of quarters to run each strategy.
+        com (float): Transaction cost rate per portfolio rebalancing.
+        loss_rate (float, optional): Stop-loss threshold. When None, the rules of com_strategy are used instead of stop_strategy. Defaults to None.
+        restart_nb (int, optional): Number of consecutive positive quarters required to restart portfolio. Defaults to None.
+        lookback (int, optional): Momentum lookback in months. Defaults to 12.
+        skip (int, optional): Number of most recent months left out of the lookback. Defaults to 0.
+        top_n (int, optional): Number of stocks in the portfolio. Defaults to 10.
+        cache (dict, optional): Shared quarter_step results. Defaults to None.
 
-    return strategy_df
+    Returns:
+        np.ndarray: An origins x (n_quarters + 1) x 2 array of the CROI and CSPY columns of each strategy.
 
+    Examples:
+        >>> origins = pd.bdate_range('2010-01-04', periods=20, tz='UTC')
+        >>> paths = rolling_paths(origins, 4, 0.007)
+    """
+    n = len(origins)
+    if not n:
+        return np.empty((0, n_quarters + 1, 2))
+    dates = [strategies.schedule(origin, n_quarters)[:-1].asi8 for origin in origins]
+    flat = np.concatenate([np.empty(0, dtype=np.int64), *dates])
+    unique, inverse = np.unique(flat, return_inverse=True)
+
+    ids, r, s = quarter_steps(
+        pd.to_datetime(unique, utc=True), cache, lookback, skip, top_n
+    )
+    r, s = r[inverse].reshape(n, n_quarters), s[inverse].reshape(n, n_quarters)
+    positions = strategies.to_positions([ids[i] for i in inverse])
+    positions = positions.reshape(n, n_quarters, registry.SYMBOLS.size)
+
+    # sell + buy except those remained, the first portfolio and the final sell cost com
+    cm = strategies.commissions(positions, com, top_n)
+    growth, cash_out = r, np.ones(n, dtype=bool)
+    if loss_rate is not None:
+        rules = [strategies.stop_loss(roi, loss_rate, restart_nb) for roi in r]
+        stop, _, _, sell, waiting = (
+            np.array(rule).reshape(n, n_quarters) for rule in zip(*rules)
+        )
+        positions[waiting] = False
+        cm = strategies.commissions(positions, com, top_n)
+        cm = np.where(waiting, 0, np.where(sell, com, cm))
+        growth = np.where(waiting, 1, r)
+        cash_out = ~stop[:, -1:].any(axis=1)
+
+    start = np.full((n, 1), 1 - com)
+    croi = np.concatenate([start, costs.cumulate(growth, cm, 1 - com)], axis=1)
+    cspy = np.cumprod(np.concatenate([start, s], axis=1), axis=1)
+    croi[cash_out, -1] -= com
+    cspy[:, -1] -= com
+    return np.stack([croi, cspy], axis=2)
+
+
+def _batches(origins):
+    # consecutive origins, so a batch shares most of its rebalancing dates
+    return [
+        origins[i : i + ORIGINS_PER_TASK]
+        for i in range(0, len(origins), ORIGINS_PER_TASK)
+    ]
 
-def mom_simulate(startY, endY, n_quarters, com, loss_rate, restart_nb):
-    """Simulates momentum investment strategies across multiple years with stop-loss mechanism.
 
-    This function runs a momentum-based investment strategy for each year, tracking portfolio performance and comparing it against the S&P 500 benchmark.
+def sweep(
+    start,
+    end,
+    n_quarters,
+    com,
+    lookbacks=scores.LOOKBACKS,
+    skips=(0,),
+    top_ns=(10,),
+    loss_rate=None,
+    restart_nb=None,
+    step=21,
+    executor=None,
+):
+    """Runs a momentum strategy for every combination of rolling origins and momentum parameters.
+
+    This function is the large study behind rolling_simulate: every lookback, skip and portfolio size is run from every origin, as one batch of tasks for the executor.
 
     Args:
-        startY (int): The starting year for the simulation.
-        endY (int): The ending year for the simulation.
+        start (datetime): The first possible origin.
+        end (datetime): The last possible origin.
         n_quarters (int): Number of quarters to run each strategy.
         com (float): Transaction cost rate per portfolio rebalancing.
-        loss_rate (float): Threshold for portfolio loss that triggers stop-loss mechanism.
-        restart_nb (int): Number of consecutive positive quarters required to restart portfolio.
+        lookbacks (tuple, optional): Momentum lookbacks in months. Defaults to scores.LOOKBACKS.
+        skips (tuple, optional): Numbers of most recent months left out of the lookback. Defaults to (0,).
+        top_ns (tuple, optional): Numbers of stocks in the portfolio. Defaults to (10,).
+        loss_rate (float, optional): Stop-loss threshold. When None, com_strategy is used instead of stop_strategy. Defaults to None.
+        restart_nb (int, optional): Number of consecutive positive quarters required to restart portfolio. Defaults to None.
+        step (int, optional): Use every step-th trading day as an origin. Defaults to 21.
+        executor (SerialExecutor, optional): Runs the strategies, see executors. Defaults to None, in the current process.
 
     Returns:
-        pd.DataFrame: A DataFrame containing performance metrics for each simulated period, including:
-        - Year: The year range of the strategy
-        - Final_CROI: Cumulative return of the investment strategy
-        - Final_CSPY: Cumulative return of the S&P 500 benchmark
+        pd.DataFrame: A DataFrame indexed by Lookback, Skip, Top_N and Origin, with the columns of rolling_simulate.
 
     Examples:
-        >>> results = mom_simulate(2000, 2022, 4, 0.01, 0.1, 2)
+        >>> start = pd.Timestamp('2005-01-01').tz_localize('UTC')
+        >>> end = pd.Timestamp('2015-01-01').tz_localize('UTC')
+        >>> results = sweep(start, end, 8, 0.007, skips=(0, 1), executor=ProcessExecutor())
+        >>> results.groupby(level=["Lookback", "Skip"]).median()
     """
-    results = []  # To store the final CROI values
+    trading_days = sp500_data.index
+    origins = trading_days[(trading_days >= start) & (trading_days <= end)][::step]
+
+    # one task per batch of origins of the same parameters, see rolling_paths
+    params = [
+        (lookback, skip, top_n)
+        for lookback in lookbacks
+        for skip in skips
+        for top_n in top_ns
+    ]
+    keys = [(*param, origin) for param in params for origin in origins]
+    tasks = [
+        (batch, n_quarters, com, loss_rate, restart_nb, lookback, skip, top_n)
+        for lookback, skip, top_n in params
+        for batch in _batches(origins)
+    ]
+    runner = functools.partial(rolling_paths, cache={})
+    paths = [
+        path
+        for batch in (executor or SerialExecutor()).map(runner, tasks)
+        for path in batch
+    ]
+
+    results = pd.DataFrame(
+        [(*key, path[-1, 0], path[-1, 1]) for key, path in zip(keys, paths)],
+        columns=["Lookback", "Skip", "Top_N", "Origin", "Final_CROI", "Final_CSPY"],
+    )
+    return _with_metrics(results, paths).set_index(
+        ["Lookback", "Skip", "Top_N", "Origin"]
+    )
+
+
+def paths_simulate(paths, n_quarters, com, lookback=12, skip=0, top_n=10):
+    """Runs the momentum strategy with transaction costs on synthetic price paths.
+
+    This function applies the com_strategy rules to every path of every batch at once, so thousands of alternative histories are tested in a few array operations. The first lookback months of each path are used to score the first quarter.
+
+    Args:
+        paths (iterable): Batches of synthetic paths, see bootstrap.synthetic_paths.
+        n_quarters (int): Number of quarters to run the momentum strategy.
+        com (float): Transaction cost rate per portfolio rebalancing.
+        lookback (int, optional): Momentum lookback in months. Defaults to 12.
+        skip (int, optional): Number of most recent months left out of the lookback. Defaults to 0.
+        top_n (int, optional): Number of stocks in the portfolio. Defaults to 10.
+
+    Returns:
+        pd.DataFrame: A DataFrame indexed by Path with one row per synthetic path, including:
+        - Final_CROI: Final cumulative return of the investment strategy
+        - Final_CSPY: Final cumulative return of SPY
+        - VOL, SHARPE, SORTINO, MAXDD, MAXDD_DAYS, BETA, ALPHA, TE: Quarterly risk metrics of the strategy, see metrics.risk_metrics
+
+    Raises:
+        ValueError: If the paths are too short for the lookback and the quarters.
+
+    Notes:
+        - The universe is fixed, and the portfolio is held in cash in quarters where no stock beats SPY
+
+    Examples:
+        >>> n_days = 12 * scores.MONTH + 8 * 63
+        >>> results = paths_simulate(synthetic_paths(2000, 20, 1000, n_days), 8, 0.007)
+    """
+    window = scores.MONTH * lookback
+    results = []
+    runs = []
+    for ids, prices, spy in paths:
+        n, n_days = spy.shape
+        if n_days <= window + 63 * n_quarters:
+            raise ValueError(
+                f"paths of {n_days} days are too short, {window + 63 * n_quarters + 1} needed"
+            )
+        k = min(top_n, ids.size)
+
+        croi = np.empty((n, n_quarters + 1))
+        cspy = np.empty((n, n_quarters + 1))
+        croi[:, 0] = cspy[:, 0] = 1 - com
+        held = np.zeros((n, ids.size), dtype=bool)
+
+        for q in range(n_quarters):
+            t = window + 63 * q
+            roi = prices[:, t - scores.MONTH * skip] / prices[:, t - window]
+            spy_score = spy[:, t - scores.MONTH * skip] / spy[:, t - window]
+            alfa = roi - spy_score[:, None]
+
+            # top stocks of each path beating SPY
+            top = np.argpartition(-alfa, k - 1, axis=1)[:, :k]
+            current = np.zeros_like(held)
+            np.put_along_axis(
+                current, top, np.take_along_axis(alfa, top, axis=1) > 0, axis=1
+            )
+
+            # equal weights over the quarter, cash if nothing is selected
+            growth = np.where(current, prices[:, t + 63] / prices[:, t], 0)
+            count = current.sum(axis=1)
+            total = growth.sum(axis=1, dtype=np.float64)
+            r = np.where(count > 0, total / np.maximum(count, 1), 1)
+            s = spy[:, t + 63] / spy[:, t]
+
+            # sell + buy except those remained
+            num_remains = (held & current).sum(axis=1)
+            cm = com if q == 0 else 2 * com * (top_n - num_remains) / top_n
+            held = current
+
+            croi[:, q + 1] = r * croi[:, q] - cm
+            cspy[:, q + 1] = s * cspy[:, q]
+
+        # final sell of protfolio to cash out
+        croi[:, -1] -= com
+        cspy[:, -1] -= com
 
-    for year in range(2000, 2023):
-        start_date = pd.Timestamp(datetime.datetime(year, 1, 1)).tz_localize("UTC")
-        strategy_results = stop_strategy(
-            start_date, n_quarters, com, loss_rate, restart_nb
-        )  # Assuming com_strategy is your function
-        final_croi = strategy_results["CROI"].iloc[-1]  # Get the final CROI value
-        final_cspy = strategy_results["CSPY"].iloc[-1]  # Get the final CSPY value
         results.append(
-            {
-                "Year": f"{year}-{year+n_quarters/4}",
-                "Final_CROI": final_croi,
-                "Final_CSPY": final_cspy,
-            }
-        )  # Store the result
+            pd.DataFrame({"Final_CROI": croi[:, -1], "Final_CSPY": cspy[:, -1]})
+        )
+        runs.extend(np.stack([croi, cspy], axis=2))
 
-    return pd.DataFrame(results)
+    results = pd.concat(results, ignore_index=True)
+    return _with_metrics(results, runs).rename_axis("Path")
+
+
+def _with_metrics(results, paths):
+    # quarterly risk metrics of all runs at once, runs x quarters arrays
+    paths = np.stack(paths)
+    stats = risk_metrics(paths[:, :, 0], paths[:, :, 1], periods=4)
+    return pd.concat([results, stats], axis=1)
 
 
 # DEBUGGING
@@ -461,9 +880,10 @@ def mom_simulate(startY, endY, n_quarters, com, loss_rate, restart_nb):
 # date = pd.Timestamp(datetime.datetime(2024, 8, 1)).tz_localize("UTC")
 # print(f"Date: {date}")
 # m = moment(date, 1, 63)
-# r1, p, s1 = momentum_portfolio(m.index, date, 63)
+# r1, p, s1, u1 = momentum_portfolio(m.index, date, 63)
 # print(f"ROI 1: {r1}")
 # print(f"SPY 1: {s1}")
+# print(f"Universe 1: {u1}")
 
 # 4. Strategy with no commission
 # n_quarters = 17
@@ -493,3 +913,28 @@ def mom_simulate(startY, endY, n_quarters, com, loss_rate, restart_nb):
 # com = 0.007
 # stats = mom_simulate(2000, 2023, n_quarters, com, loss_rate, restart_nb)
 # print(stats)
+
+# 8. Rolling origins
+# start = pd.Timestamp(datetime.datetime(2007, 1, 1)).tz_localize("UTC")
+# end = pd.Timestamp(datetime.datetime(2008, 1, 1)).tz_localize("UTC")
+# stats = rolling_simulate(start, end, 4, 0.007, 0.1, 2, step=5)
+# print(stats.describe())
+
+# 9. 12-1 momentum, top 20
+# n_quarters = 8
+# date = pd.Timestamp(datetime.datetime(2007, 6, 1)).tz_localize("UTC")
+# mystra = com_strategy(date, n_quarters, 0.007, lookback=12, skip=1, top_n=20)
+# print(mystra)
+
+# 10. Stress test on synthetic paths
+# from bootstrap import synthetic_paths
+# n_days = 12 * scores.MONTH + 8 * 63
+# stats = paths_simulate(synthetic_paths(2000, 20, 1000, n_days), 8, 0.007)
+# print(stats.describe())
+
+# 11. Parameter sweep on local processes
+# from executors import ProcessExecutor
+# start = pd.Timestamp(datetime.datetime(2005, 1, 1)).tz_localize("UTC")
+# end = pd.Timestamp(datetime.datetime(2015, 1, 1)).tz_localize("UTC")
+# stats = sweep(start, end, 8, 0.007, skips=(0, 1), executor=ProcessExecutor())
+# print(stats.groupby(level=["Lookback", "Skip"]).median())
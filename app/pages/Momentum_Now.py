@@ -1,10 +1,15 @@
 import streamlit as st
 import pandas as pd
 import datetime
-import plotly.express as px
 
+from charts import line_chart
 from momentum import stop_strategy
 from momentum import com_strategy
+from momentum import MomentumRank
+from load_data import sp500_data
+from signals import load_snapshot, DEFAULT_COM
+
+snapshot = load_snapshot()
 
 st.set_page_config(page_title="Momentum Now", page_icon="📈")
 
@@ -14,7 +19,7 @@ st.title("Momentum : Checking backwards 📈")
 date_input = st.date_input(
     "Enter a **starting** date:",
     min_value=datetime.date(2000, 1, 1),
-    value="today",
+    value=snapshot["asof"].date() if snapshot else "today",
     max_value="today",
     help="2007/1/1",
 )
@@ -32,20 +37,32 @@ com = st.number_input(
     label="Transaction cost rate per portfolio rebalancing",
     step=0.01,
     format="%.4f",
-    value=0.007,
+    value=DEFAULT_COM,
 )
 st.write("Transaction commission", com)
 
 
-date = pd.Timestamp(date_input).tz_localize("UTC") - pd.offsets.BDay(n_quarters * 63)
+# the quarters cannot run past the data, the strategy ends on its last session
+end = pd.Timestamp(date_input).tz_localize("UTC")
+if end > sp500_data.index[-1]:
+    end = sp500_data.index[-1]
+    st.warning(f"No data after {end.date()}, the strategy ends on that day")
+date = end - pd.offsets.BDay(n_quarters * 63)
 
-comstra = com_strategy(date, n_quarters, com)
+# precomputed at ingest for the default parameters
+if (
+    snapshot
+    and date_input == snapshot["asof"].date()
+    and com == DEFAULT_COM
+    and n_quarters in snapshot["strategies"]
+):
+    comstra = snapshot["strategies"][n_quarters]
+else:
+    comstra = com_strategy(date, n_quarters, com)
 
-# Create the plot using plotly.express
-fig_com = px.line(
-    comstra,
-    x=comstra.index,
-    y=["ROI", "SPY"],
+# Create the plot, downsampled to the screen width
+fig_com = line_chart(
+    comstra[["ROI", "SPY"]],
     title="MOMENTUM: ROI vs SPY Return for a given quarter",
 )
 
@@ -54,3 +71,9 @@ st.plotly_chart(fig_com)
 
 st.write("**Momentum-based investment strategy with transaction cost considerations:**")
 st.write(comstra)
+
+# the ranking follows the date input, each move only rescans the rows that changed
+if "rank" not in st.session_state:
+    st.session_state.rank = (snapshot or {}).get("rank") or MomentumRank()
+ranking = st.session_state.rank.update(pd.Timestamp(date_input).tz_localize("UTC"))
+st.write(f"**Top momentum stocks on {date_input}:**", ranking.frame())
@@ -3,8 +3,10 @@ import pandas as pd
 import datetime
 import plotly.express as px
 
+from charts import line_chart
 from momentum import stop_strategy
 from momentum import com_strategy
+from momentum import rolling_simulate
 
 st.set_page_config(page_title="Momentum Portfolio", page_icon="📈")
 
@@ -51,15 +53,40 @@ restart_nb = st.number_input(
 )
 st.write(f"Restart after {restart_nb} positive quarters.")
 
+# lookback and skipped months of the momentum score
+variants = {
+    "12 months": (12, 0),
+    "12-1 months (skip the last month)": (12, 1),
+    "9 months": (9, 0),
+    "6 months": (6, 0),
+    "3 months": (3, 0),
+}
+variant = st.selectbox("Momentum **lookback**:", list(variants))
+lookback, skip = variants[variant]
+
+top_n = st.number_input(
+    label="Number of stocks in the portfolio",
+    min_value=1,
+    value=10,
+    step=1,
+)
+
 
 date = pd.Timestamp(date_input).tz_localize("UTC")
-stopstra = stop_strategy(date, n_quarters, com, loss_rate, restart_nb)
+stopstra = stop_strategy(
+    date,
+    n_quarters,
+    com,
+    loss_rate,
+    restart_nb,
+    lookback=lookback,
+    skip=skip,
+    top_n=top_n,
+)
 
-# Create the plot using plotly.express
-fig_stop = px.line(
-    stopstra,
-    x=stopstra.index,
-    y=["CROI", "CSPY"],
+# Create the plot, downsampled to the screen width
+fig_stop = line_chart(
+    stopstra[["CROI", "CSPY", "CUNIVERSE"]],
     title="STOP-LOSS: Cumulative ROI vs Cumulative SPY Return",
 )
 
@@ -71,13 +98,11 @@ st.write(
 )
 st.write(stopstra)
 
-comstra = com_strategy(date, n_quarters, com)
+comstra = com_strategy(date, n_quarters, com, lookback=lookback, skip=skip, top_n=top_n)
 
-# Create the plot using plotly.express
-fig_com = px.line(
-    comstra,
-    x=comstra.index,
-    y=["CROI", "CSPY"],
+# Create the plot, downsampled to the screen width
+fig_com = line_chart(
+    comstra[["CROI", "CSPY", "CUNIVERSE"]],
     title="MOMENTUM: Cumulative ROI vs Cumulative SPY Return",
 )
 
@@ -86,3 +111,47 @@ st.plotly_chart(fig_com)
 
 st.write("**Momentum-based investment strategy with transaction cost considerations:**")
 st.write(comstra)
+
+st.write("**Rolling origins:** how much does the result depend on the start day?")
+
+rolling_end = st.date_input(
+    "Start strategies from every trading day up to:",
+    min_value=date_input,
+    value=date_input + datetime.timedelta(days=365),
+    max_value=datetime.date(2024, 12, 1),
+)
+
+step = st.number_input(
+    label="Use every Nth trading day as a start day",
+    min_value=1,
+    value=5,
+    step=1,
+)
+
+_but = st.button("Run rolling simulation")
+
+if _but:
+    with st.spinner("Wait for it..."):
+        rolling = rolling_simulate(
+            date,
+            pd.Timestamp(rolling_end).tz_localize("UTC"),
+            n_quarters,
+            com,
+            loss_rate,
+            restart_nb,
+            step=step,
+            lookback=lookback,
+            skip=skip,
+            top_n=top_n,
+        )
+
+    fig_rolling = px.histogram(
+        rolling,
+        title="STOP-LOSS: Final CROI vs Final CSPY per start day",
+        opacity=0.5,
+        color_discrete_sequence=px.colors.qualitative.G10,
+        barmode="overlay",
+    )
+    st.plotly_chart(fig_rolling)
+
+    st.write(rolling.describe())
@@ -1,7 +1,8 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from backtester import simulate as simulate
+from backtester import roi_distribution as roi_distribution
+from bootstrap import synthetic_paths as synthetic_paths
 
 st.set_page_config(page_title="Random Portfolio Strategy Simulator", page_icon="📊")
 
@@ -44,10 +45,49 @@ nb_trials = st.slider(
     help="100",
 )
 
+synthetic = st.checkbox(
+    "Stress test on **synthetic** paths",
+    help="Each portfolio is held on its own path, bootstrapped in blocks of days from the history of the period",
+)
+
+block = st.number_input(
+    label="Mean block length of the bootstrap in days",
+    min_value=1,
+    value=21,
+    step=1,
+    disabled=not synthetic,
+)
+
+# closed-form ROI distribution of the historical portfolios, no trial to run
+try:
+    distribution = roi_distribution(startY, nb_years, nb_stocks)
+except ValueError as e:
+    st.warning(f"No analytic distribution: {e}")
+else:
+    st.write(
+        f"**Expected** _Return on Investment_ for {nb_years} years of random {nb_stocks} stocks portfolios:",
+        distribution["MEAN"],
+    )
+    st.write(
+        f"**Median** ROI, and 90% of the portfolios between {distribution['Q5']:.3f} and {distribution['Q95']:.3f}:",
+        distribution["Q50"],
+    )
+    st.write("SP500 index perfromance:", distribution["SPY"])
+    st.write("**Analytic** distribution:", distribution)
+
 _but = st.button("Run simulation")
 
 if _but:
-    stats, med = simulate(startY, nb_years, nb_stocks, nb_trials)
+    import plotly.express as px
+
+    paths = None
+    if synthetic:
+        paths = synthetic_paths(startY, nb_years, nb_trials, nb_years * 252, block)
+    try:
+        stats, med = simulate(startY, nb_years, nb_stocks, nb_trials, paths)
+    except ValueError as e:
+        st.error(f"No simulation: {e}")
+        st.stop()
 
     st.write(
         f"**Median** _Return on Investment_ for {nb_years} years for {nb_trials} random stocks portfolios:",
@@ -58,6 +98,8 @@ if _but:
 
     st.write("SP500 index perfromance:", med["SPY"])
 
+    st.write("Equal-weight **universe** performance:", med["UNIVERSE"])
+
     df1 = pd.Series(stats["ROI"]).to_frame()
     df1 = df1.rename(columns={"ROI": "perf"})
     df2 = pd.Series(stats["REBALANCED"]).to_frame()
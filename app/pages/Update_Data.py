@@ -1,5 +1,6 @@
 import streamlit as st
 from load_data import download_sp500 as download_sp500
+from load_data import materialize_signals as materialize_signals
 from load_data import spy_data as spy_data
 from load_data import sp500_data as sp500_data
 
@@ -14,4 +15,5 @@ _but = st.button("Update data")
 if _but:
     with st.spinner("Wait for it..."):
         spy_data, sp500_data = download_sp500()
+        materialize_signals()
     st.success("Done!")
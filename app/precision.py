@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pandas as pd
+
+# largest relative deviation of the float32 mode accepted by check
+TOLERANCE = 1e-4
+
+# the runs compared by check, on the historical data
+SIMULATION = {"startY": 2010, "nb_years": 5, "nb_stocks": 10, "nb_trials": 20}
+STRATEGY = {"date": "2015-01-02", "n_quarters": 8, "com": 0.007}
+
+
+def results(seed=0):
+    """Runs the reference simulation and strategy in the current storage mode.
+
+    Args:
+        seed (int, optional): Seed of the random portfolios, the same in both modes. Defaults to 0.
+
+    Returns:
+        dict: Lists of the ROI and REBALANCED of every trial of simulate, and of the CROI of every quarter of com_strategy.
+    """
+    from backtester import simulate
+    from momentum import com_strategy
+
+    random.seed(seed)
+    stats, med = simulate(**SIMULATION)
+    date = pd.Timestamp(STRATEGY["date"]).tz_localize("UTC")
+    strategy = com_strategy(date, STRATEGY["n_quarters"], STRATEGY["com"])
+    return {
+        "ROI": stats["ROI"].astype(float).tolist(),
+        "REBALANCED": stats["REBALANCED"].astype(float).tolist(),
+        "CROI": strategy["CROI"].astype(float).tolist(),
+    }
+
+
+def _results_in(dtype, seed):
+    # a process per mode, the storage type is fixed when the dataset is mapped
+    env = dict(os.environ, PORTFOLIO_PRICE_DTYPE=dtype)
+    done = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--results", str(seed)],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return json.loads(done.stdout.splitlines()[-1])
+
+
+def check(dtype="float32", seed=0):
+    """Measures the deviation of a storage mode against the float64 reference.
+
+    Args:
+        dtype (str, optional): The storage type to check, see load_data.PRICE_DTYPE. Defaults to "float32".
+        seed (int, optional): Seed of the random portfolios. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: The maximum absolute and relative deviation of ROI, REBALANCED and CROI.
+
+    Notes:
+        - Each mode runs in its own process and publishes its own segment, see shared_data.publish
+        - Run it from the folder of the CSV files, like the app
+
+    Examples:
+        >>> report = check()
+        >>> ok = (report["Relative"] <= TOLERANCE).all()
+    """
+    reference = _results_in("float64", seed)
+    compact = _results_in(dtype, seed)
+
+    rows = {}
+    for measure, values in reference.items():
+        expected = pd.Series(values)
+        error = (pd.Series(compact[measure]) - expected).abs()
+        rows[measure] = {
+            "Absolute": error.max(),
+            "Relative": (error / expected.abs()).max(),
+        }
+    return pd.DataFrame(rows).T
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deviation of the float32 mode")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--results", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.results is not None:
+        print(json.dumps(results(args.results)))
+        sys.exit()
+
+    report = check(seed=args.seed)
+    print(report.to_string(float_format="{:.2e}".format))
+    sys.exit(0 if (report["Relative"] <= TOLERANCE).all() else 1)
+
+
+# DEBUGGING
+
+# 1. Deviation of the float32 mode on another draw of portfolios
+# print(check(seed=1))
@@ -0,0 +1,51 @@
+import numpy as np
+
+# Window-return index of the price matrix, computed once when the segment is built. Log prices
+# are cumulative log returns, so the return of a ticker over rows [i, j] is exp(L[j] - L[i]).
+# Gaps stay NaN, and the rows of the next and last price of every ticker find the first and
+# last rows of a window where a whole set of tickers has a price, see access.complete_rows.
+
+
+def prefix_index(prices, dtype="float64"):
+    """Computes the window-return index of a price matrix.
+
+    Args:
+        prices (np.ndarray): A dates x tickers array of prices, NaN where there is none.
+        dtype (str, optional): Type of the log prices, see load_data.PRICE_DTYPE. Defaults to "float64".
+
+    Returns:
+        dict: A dictionary of dates x tickers arrays:
+        - log_prices: Log of the prices, NaN where there is none
+        - next_priced: Row of the first price at or after each row, the number of dates if there is none
+        - last_priced: Row of the last price at or before each row, -1 if there is none
+
+    Examples:
+        >>> index = prefix_index(sp500_data.to_numpy())
+        >>> growth = np.exp(index["log_prices"][j] - index["log_prices"][i])
+    """
+    prices = np.asarray(prices, dtype=dtype)
+    priced = np.isfinite(prices)
+    rows = np.arange(len(prices), dtype=np.int32)[:, None]
+
+    last = np.maximum.accumulate(np.where(priced, rows, -1), axis=0)
+    after = np.where(priced, rows, len(prices))[::-1]
+    following = np.minimum.accumulate(after, axis=0)[::-1]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        log_prices = np.log(prices)
+    return {
+        "log_prices": log_prices,
+        "next_priced": following.astype(np.int32),
+        "last_priced": last.astype(np.int32),
+    }
+
+
+# DEBUGGING
+
+# 1. Return of AAPL over its whole history
+# import registry
+# from load_data import sp500_data
+# index = prefix_index(sp500_data.to_numpy())
+# t = registry.to_ids(["AAPL"])[0]
+# i, j = index["next_priced"][0, t], index["last_priced"][-1, t]
+# print(np.exp(index["log_prices"][j, t] - index["log_prices"][i, t]))
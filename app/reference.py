@@ -0,0 +1,710 @@
+import datetime
+import random
+import pandas as pd
+
+from load_data import spy_data as spy_data
+from load_data import sp500_data as sp500_data
+
+# Frozen reference engines, checked against the fast paths by verify.py: the functions of
+# backtester.py and momentum.py as they were before any optimization, copied verbatim.
+# Do not edit them: a change here changes what the engines are verified against.
+
+# backtester.py
+
+
+def random_portfolio(startY, nb_years, nb_tickers):
+    """Generates a random portfolio of stocks for backtesting investment strategies.
+
+    This function creates a portfolio by randomly selecting a specified number of stock tickers from a given time period.
+
+    Args:
+        startY (int): The starting year for stock selection.
+        nb_years (int): Number of years to consider for stock selection.
+        nb_tickers (int): Number of stock tickers to include in the portfolio.
+
+    Returns:
+        pd.DataFrame: A portfolio performance DataFrame with selected random stocks.
+
+    Examples:
+        >>> random_portfolio_results = random_portfolio(2010, 5, 10)
+    """
+    return given_portfolio(random_ticks(startY, nb_years, nb_tickers), startY, nb_years)
+
+
+def rebalance(portfolio, period):
+    """Rebalances a portfolio at specified intervals.
+
+    This function redistributes portfolio weights at regular intervals to maintain a consistent investment strategy.
+
+    Args:
+        portfolio (pd.DataFrame): The input portfolio performance data.
+        period (int): Number of periods between portfolio rebalancing.
+
+    Returns:
+        pd.DataFrame: A rebalanced portfolio with adjusted weights.
+
+    Notes:
+        - Calculates the number of rebalancing periods based on total portfolio size
+        - Helps maintain consistent portfolio allocation over time
+
+    Examples:
+        >>> rebalanced_portfolio = rebalance(original_portfolio, 63)
+    """
+    # rounding up or down :/
+    nperiods = round(portfolio.index.size / period, 0)
+
+    n = 0
+    cumul = portfolio / portfolio.iloc[0]
+    cumul = cumul / cumul.columns.size
+    sum = cumul.sum(axis=1)
+    while n < nperiods:
+        gain = sum.iloc[n * period]  # portfolio total at period
+        reinvest = round(
+            gain / cumul.columns.size, 6
+        )  # balancing, deviding total among all possitions
+        # re-starting cumulating from new reinvestment till the end
+        cumul[n * period :] = (
+            reinvest * portfolio[n * period :] / portfolio.iloc[n * period]
+        )
+        sum[n * period :] = cumul[n * period :].sum(axis=1)
+        n += 1
+    return sum, cumul
+
+
+def given_portfolio(tickers, startY, nb_years):
+    """Generates and analyzes a portfolio performance for specified stock tickers.
+
+    This function creates a portfolio from selected stock tickers, calculates cumulative returns, and compares performance against the S&P 500 benchmark.
+
+    Args:
+        tickers (str): Hyphen-separated list of stock ticker symbols.
+        startY (int): The starting year for portfolio analysis.
+        nb_years (int): Number of years to analyze portfolio performance.
+
+    Returns:
+        tuple: A tuple containing three elements:
+        - banch (pd.DataFrame): Performance metrics including benchmark comparison
+        - given_portfolio (pd.DataFrame): Raw portfolio stock prices
+        - rebalanced_portfolio (pd.DataFrame): Portfolio with periodic rebalancing
+
+    Notes:
+        - Filters out stocks with insufficient data
+        - Calculates cumulative returns
+        - Performs portfolio rebalancing at yearly intervals
+
+    Examples:
+        >>> performance, raw_data, rebalanced = given_portfolio('AAPL-GOOGL-MSFT', 2010, 5)
+    """
+    # init dates
+    start = pd.Timestamp(datetime.datetime(startY, 1, 1))
+    start = start.tz_localize("UTC")
+    end = pd.Timestamp(datetime.datetime(startY + nb_years, 1, 1))
+    end = end.tz_localize("UTC")
+
+    # Slice stocks data
+    timeslice = sp500_data.loc[start:end]
+    notnaslice = timeslice.dropna(axis=1, how="all").dropna(thresh=50)
+    # is that valid? or a bias, since dropping some values
+    # that do not exist for the whole period
+
+    # Prepare banchmark set
+    spy = spy_data.loc[notnaslice.index[0] : notnaslice.index[-1]]
+
+    ticker_names = tickers.split("-")
+
+    given_portfolio = notnaslice[ticker_names].dropna()
+    given_portfolio.sort_index(axis=1, inplace=True)
+
+    # cumulative returns  = %difference data to day from the begining of investment
+    banch = (
+        spy / spy.iloc[0]
+    )  # SP500 performance in %, since the start day of investment
+
+    cumulative = given_portfolio / given_portfolio.iloc[0]
+    # calculating cumulative gain from Day 1
+
+    banch["ROI"] = cumulative.sum(axis=1) / cumulative.columns.size
+    # Summing all partfolio tickers performance and normalizing, since we want to compare with single SPY gains.
+
+    banch["REBALANCED"], rebalanced_portfolio = rebalance(
+        given_portfolio, 252
+    )  # another sample, rebalanacing afer 252 days
+
+    # record stats for various tests
+
+    banch = banch.dropna()
+
+    return banch, given_portfolio, rebalanced_portfolio
+
+
+def SP500_tickers(startY, nb_years):
+    """Retrieves a list of valid S&P 500 stock tickers for a specified time period.
+
+    This function filters and returns stock tickers that have sufficient data within the given date range.
+
+    Args:
+        startY (int): The starting year for ticker selection.
+        nb_years (int): Number of years to consider for ticker availability.
+
+    Returns:
+        str: A hyphen-separated string of stock ticker symbols sorted alphabetically.
+
+    Notes:
+        - Filters out stocks with insufficient data
+        - Requires at least 50 non-null data points
+        - Returns tickers sorted alphabetically
+
+    Examples:
+        >>> tickers = SP500_tickers(2010, 5)
+    """
+    # init dates
+    start = pd.Timestamp(datetime.datetime(startY, 1, 1))
+    start = start.tz_localize("UTC")
+    end = pd.Timestamp(datetime.datetime(startY + nb_years, 1, 1))
+    end = end.tz_localize("UTC")
+    # Slice stocks data
+    timeslice = sp500_data.loc[start:end]
+    notnaslice = timeslice.dropna(axis=1, how="all").dropna(thresh=50)
+
+    all_ticks = sorted(list(notnaslice.columns))
+
+    return "-".join(all_ticks)
+
+
+def random_ticks(startY, nb_years, nb_stocks):
+    """Generates a random subset of stock tickers from the S&P 500 for a specified time period.
+
+    This function selects a specified number of unique stock tickers from available S&P 500 stocks within a given date range.
+
+    Args:
+        startY (int): The starting year for stock selection.
+        nb_years (int): Number of years to consider for stock availability.
+        nb_stocks (int): Number of stock tickers to randomly select.
+
+    Returns:
+        str: A hyphen-separated string of randomly selected stock ticker symbols, sorted alphabetically.
+
+    Notes:
+        - Uses SP500_tickers to get available stocks
+        - Randomly samples from available tickers
+        - Returns tickers sorted alphabetically
+
+    Examples:
+        >>> random_tickers = random_ticks(2010, 5, 10)
+    """
+    sp_ticks = SP500_tickers(startY, nb_years).split("-")
+    rand_ticks = random.sample(sp_ticks, nb_stocks)
+    return "-".join(sorted(rand_ticks))
+
+
+def simulate(startY, nb_years, nb_stocks, nb_trials):
+    """Conducts a Monte Carlo simulation of portfolio performance using random stock selections.
+
+    This function generates multiple random portfolios to analyze investment strategy performance and compare against benchmark returns.
+
+    Args:
+        startY (int): The starting year for portfolio simulation.
+        nb_years (int): Number of years to simulate portfolio performance.
+        nb_stocks (int): Number of stocks to include in each random portfolio.
+        nb_trials (int): Number of random portfolio simulations to run.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing performance statistics for simulated portfolios, including:
+        - TICKERS: Selected stock ticker symbols
+        - START: Starting year
+        - NYEARS: Number of years simulated
+        - ROI: Portfolio return
+        - REBALANCED: Rebalanced portfolio performance
+        - SPY: S&P 500 benchmark performance
+        - RBDAYS: Rebalancing interval
+
+    Notes:
+        - Uses random stock selection for each trial
+        - Calculates portfolio performance with and without rebalancing
+        - Compares portfolio performance to S&P 500 benchmark
+
+    Examples:
+        >>> simulation_results = simulate(2010, 5, 10, 100)
+    """
+    # init stats
+    stats = pd.DataFrame(
+        columns=[
+            "TICKERS",
+            "START",
+            "NYEARS",
+            "ROI",
+            "REBALANCED",
+            "SPY",
+            "RBDAYS",
+            # "ROI1Y",
+            # "SPY1Y",
+        ]
+    )
+
+    for _ in range(nb_trials):
+        rand = random_ticks(startY, nb_years, nb_stocks)
+        banch, portfolio, rebalanced_portfolio = given_portfolio(rand, startY, nb_years)
+        stats = stats._append(
+            {
+                "TICKERS": rand,
+                "START": startY,
+                "NYEARS": nb_years,
+                "RBDAYS": 252,
+                # "ROI1Y": banch["ROI"].iloc[252],  # portfolio perf after 1Y
+                # "SPY1Y": banch["SPY"].iloc[252],  # SP500 perf after 1Y
+                "ROI": banch["ROI"].iloc[-1],  # portfolio perf
+                "REBALANCED": banch["REBALANCED"].iloc[-1],  # rebalanced portfolio perf
+                "SPY": banch["SPY"].iloc[-1],  # SP500 perf after 3Y
+            },
+            ignore_index=True,
+        )
+    med = stats[
+        [
+            # "ROI1Y", "SPY1Y",
+            "ROI",
+            "REBALANCED",
+            "SPY",
+        ]
+    ].median()
+    return stats, med
+
+
+# momentum.py
+
+
+def moment(date, NY, top_n):
+    """Calculates momentum scores for stocks based on their performance relative to a benchmark.
+
+    This function identifies top-performing stocks by comparing their returns to the S&P 500 over a specified time period.
+
+    Args:
+        date (datetime): The end date for performance calculation.
+        NY (int): Number of years to look back for performance analysis.
+        top_n (int): Number of top-performing stocks to select.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the top stocks with their:
+        - ROI (Return on Investment)
+        - ALFA (Abnormal Return relative to benchmark)
+        Sorted by ALFA in descending order, limited to top_n stocks.
+
+    Examples:
+        >>> end_date = pd.Timestamp('2022-12-31')
+        >>> top_momentum_stocks = moment(end_date, NY=1, top_n=10)
+    """
+    end = date
+    start = end - pd.offsets.BDay(252 * NY)
+
+    # Calculate value of initial investment of 10K in the Portfolio
+    # initial_investment = 10000, not needed for tests
+
+    # Slice stocks data
+    timeslice = sp500_data.loc[start:end]
+    notnaslice = timeslice.dropna(axis=1, how="all").dropna(thresh=50)  # valid
+
+    # Prepare banchmark set
+    spy = spy_data.loc[notnaslice.index[0] : notnaslice.index[-1]]
+    spy_score = spy.iloc[-1] / spy.iloc[0]
+
+    # Create DataFrame with tickers as columns and ROI and ALFA as rows
+    score = pd.DataFrame(index=["ROI", "ALFA"], columns=sp500_data.columns)
+    score.loc["ROI"] = notnaslice.iloc[-1] / notnaslice.iloc[0]
+    score.loc["ALFA"] = score.loc["ROI"] - spy_score.values[0]
+
+    calculated_moment = score.loc[:, score.loc["ALFA"] > 0]
+
+    # print(f"calculated_moment: {calculated_moment.head()}")
+
+    # Sort by momentum score and select top_n, including scores
+    # Transpose to have tickers as index and ROI, ALFA as columns, then sort and select top_n
+    top_tickers_with_scores = (
+        calculated_moment.T[["ROI", "ALFA"]]
+        .sort_values(by="ALFA", ascending=False)
+        .head(top_n)
+    )
+
+    return top_tickers_with_scores  # Return top_n tickers
+
+
+def momentum_portfolio(tickers, start, period):
+    """Calculates portfolio performance for selected stocks over a specified time period.
+
+    This function evaluates the performance of a given set of stocks against the S&P 500 benchmark over a defined investment period.
+
+    Args:
+        tickers (list): List of stock ticker symbols to include in the portfolio.
+        start (datetime): The start date of the investment period.
+        period (int): Number of business days to analyze the portfolio performance.
+
+    Returns:
+        tuple: A tuple containing three elements:
+        - roi (float): Portfolio return as a percentage
+        - given_portfolio (pd.DataFrame): Normalized portfolio performance data
+        - spy_roi (float): S&P 500 benchmark return for the same period
+
+    Examples:
+        >>> start_date = pd.Timestamp('2022-01-01')
+        >>> portfolio_tickers = ['AAPL', 'GOOGL', 'MSFT']
+        >>> portfolio_roi, portfolio_data, benchmark_roi = momentum_portfolio(portfolio_tickers, start_date, 63)
+    """
+    end = start + pd.offsets.BDay(period)
+    # Slice stocks data
+    timeslice = sp500_data.loc[start:end]
+    notnaslice = timeslice.dropna(axis=1, how="all").dropna(thresh=50)  # valid
+
+    # Prepare banchmark set
+    spy = spy_data.loc[notnaslice.index[0] : notnaslice.index[-1]]
+    spy_roi = spy.iloc[-1]["SPY"] / spy.iloc[0]["SPY"]
+
+    given_portfolio = notnaslice[tickers].dropna()
+    given_portfolio.sort_index(axis=1, inplace=True)
+
+    # cumulative returns  = %difference data to day from the begining of investment
+    # SP500 performance in %, since the start day of investment
+    given_portfolio = given_portfolio / given_portfolio.iloc[0]
+    # calculating cumulative gain from Day 1
+    roi = (given_portfolio.sum(axis=1) / given_portfolio.columns.size).iloc[-1]
+
+    return roi, given_portfolio, spy_roi
+
+
+# Strategy, no commission
+def m_strategy(date, n_quarters):
+    """Implements a momentum-based investment strategy over multiple quarters.
+
+    This function generates a portfolio strategy by selecting top-performing stocks based on momentum
+    and tracking their performance against the S&P 500 over a specified number of quarters.
+
+    Args:
+        date (datetime): The starting date for the investment strategy.
+        n_quarters (int): Number of quarters to run the momentum strategy.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing strategy performance metrics including:
+        - Date: Quarterly dates
+        - Portfolio: Selected stock tickers
+        - ROI: Portfolio return for the quarter
+        - SPY: S&P 500 return for the quarter
+        - CROI: Cumulative portfolio return
+        - CSPY: Cumulative S&P 500 return
+
+    Examples:
+        >>> start_date = pd.Timestamp('2020-01-01')
+        >>> strategy_results = m_strategy(start_date, 4)
+    """
+
+    strategy = pd.DataFrame(columns=["Date", "Portfolio", "ROI", "SPY", "CROI", "CSPY"])
+
+    # Init data in the DataFrame
+    strategy = pd.concat(
+        [
+            strategy,
+            pd.DataFrame(
+                {
+                    "Date": date,
+                    "Portfolio": [[""] * 10],
+                    "ROI": 1,
+                    "SPY": 1,
+                    "CROI": 1,
+                    "CSPY": 1,
+                }
+            ),
+        ],
+        ignore_index=True,
+    )
+
+    # Repeat the code 4 times
+    for _ in range(n_quarters):
+
+        m = moment(date, 1, 10)
+
+        r, p, s = momentum_portfolio(m.index, date, 63)
+
+        if strategy.empty:
+            cr = r
+            cs = s
+        else:
+            cr = r * strategy["CROI"].iloc[-1]
+            cs = s * strategy["CSPY"].iloc[-1]
+
+        # update date to the next quarter
+        date = date + pd.offsets.BDay(63)
+
+        # Append data to the DataFrame
+        strategy = pd.concat(
+            [
+                strategy,
+                pd.DataFrame(
+                    {
+                        "Date": date,
+                        "Portfolio": [m.index.values],
+                        "ROI": [r],
+                        "SPY": [s],
+                        "CROI": [cr],
+                        "CSPY": [cs],
+                    }
+                ),
+            ],
+            ignore_index=True,
+        )
+
+    strategy.set_index("Date", inplace=True)
+    strategy.index = pd.to_datetime(strategy.index)
+    return strategy
+
+
+def com_strategy(date, n_quarters, com):
+    """Implements a momentum-based investment strategy with transaction cost considerations.
+
+    This function creates an investment strategy that selects top-performing stocks while accounting for transaction costs and portfolio turnover.
+
+    Args:
+        date (datetime): The starting date for the investment strategy.
+        n_quarters (int): Number of quarters to run the momentum strategy.
+        com (float): Transaction cost rate per portfolio rebalancing.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing strategy performance metrics including:
+        - Date: Quarterly dates
+        - Portfolio: Selected stock tickers
+        - ROI: Portfolio return for the quarter
+        - SPY: S&P 500 return for the quarter
+        - COM: Transaction costs
+        - CROI: Cumulative portfolio return adjusted for transaction costs
+        - CSPY: Cumulative S&P 500 return
+
+    Examples:
+        >>> start_date = pd.Timestamp('2020-01-01')
+        >>> strategy_results = com_strategy(start_date, 4, 0.01)
+    """
+    strategy = [
+        {
+            "Date": date,
+            "Portfolio": {"_"},
+            "ROI": 1,
+            "SPY": 1,
+            "COM": com,
+            "CROI": 1 - com,
+            "CSPY": 1 - com,
+        }
+    ]
+    # Repeat the code 4 times
+    for _ in range(n_quarters):
+
+        m = moment(date, 1, 10)
+
+        r, p, s = momentum_portfolio(m.index, date, 63)
+
+        # Access the 'Portfolio' from the last dictionary in the strategy list
+        previous_portfolio = strategy[-1]["Portfolio"]
+        current_tickers = set(m.index.values)
+        remains = previous_portfolio.intersection(current_tickers)
+        # Get the number of overlapping elements
+        num_remains = len(remains)
+
+        # sell + buy except those remained
+        cm = 2 * com * (10 - num_remains) / 10
+
+        if len(strategy) < 2:
+            cm = com
+
+        cr = r * strategy[-1]["CROI"] - cm
+        cs = s * strategy[-1]["CSPY"]
+
+        # update date to the next quarter
+        date = date + pd.offsets.BDay(63)
+
+        strategy.append(
+            {
+                "Date": date,
+                "Portfolio": set(m.index.values),
+                "ROI": r,
+                "SPY": s,
+                "COM": cm,
+                "CROI": cr,
+                "CSPY": cs,
+            }
+        )
+
+    # final sell of protfolio to cash out
+    strategy[-1]["CROI"] = strategy[-1]["CROI"] - com
+    strategy[-1]["CSPY"] = strategy[-1]["CSPY"] - com
+
+    # Create the strategy DataFrame
+    strategy_df = pd.DataFrame(strategy)
+    strategy_df.set_index("Date", inplace=True)
+    strategy_df.index = pd.to_datetime(strategy_df.index)
+
+    return strategy_df
+
+
+def stop_strategy(date, n_quarters, com, loss_rate, restart_nb):
+    """Implements a momentum-based investment strategy with a stop-loss mechanism and portfolio recovery rules.
+
+    This function creates an investment strategy that dynamically manages portfolio risk by implementing a stop-loss mechanism and defining conditions for portfolio restart.
+
+    Args:
+        date (datetime): The starting date for the investment strategy.
+        n_quarters (int): Number of quarters to run the momentum strategy.
+        com (float): Transaction cost rate per portfolio rebalancing.
+        loss_rate (float): Threshold for portfolio loss that triggers stop-loss mechanism.
+        restart_nb (int): Number of consecutive positive quarters required to restart portfolio.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing strategy performance metrics including:
+        - Date: Quarterly dates
+        - Portfolio: Selected stock tickers
+        - ROI: Portfolio return for the quarter
+        - SPY: S&P 500 return for the quarter
+        - COM: Transaction costs
+        - CROI: Cumulative portfolio return adjusted for transaction costs
+        - CSPY: Cumulative S&P 500 return
+        - STOP: Boolean indicating if stop-loss is active
+        - N_STOP: Number of consecutive stop-loss periods
+        - N_POSITIVE: Number of consecutive positive return periods
+
+    Examples:
+        >>> start_date = pd.Timestamp('2020-01-01')
+        >>> strategy_results = stop_strategy(start_date, 4, 0.01, 0.1, 2)
+    """
+    stop = False
+    n_positive = 0
+    n_stop = 0
+
+    strategy = [
+        {
+            "Date": date,
+            "Portfolio": {"_"},
+            "ROI": 1,
+            "SPY": 1,
+            "COM": com,
+            "CROI": 1 - com,
+            "CSPY": 1 - com,
+            "STOP": stop,
+            "N_STOP": n_stop,
+            "N_POSITIVE": n_positive,
+        }
+    ]
+    # Repeat the code 4 times
+    for _ in range(n_quarters):
+
+        m = moment(date, 1, 10)
+
+        r, p, s = momentum_portfolio(m.index, date, 63)
+
+        portforlio_record = set(m.index.values)
+
+        if r < (1 - loss_rate):
+            stop = True
+            n_positive = 0
+        else:
+            n_positive += 1
+
+        if stop:
+            n_stop += 1
+
+        if stop and n_stop == 1:  # first stop, sell everything, all the portfolio
+            cm = com
+
+        # normal situation, calcualte overlaps in portfolio and calculate commission
+        if not stop:
+            # Access the 'Portfolio' from the last dictionary in the strategy list
+            previous_portfolio = strategy[-1]["Portfolio"]
+            current_tickers = portforlio_record
+            remains = previous_portfolio.intersection(current_tickers)
+            # Get the number of overlapping elements
+            num_remains = len(remains)
+
+            # sell + buy except those remained, assume that there are 10 stocks in the portforlio
+            cm = 2 * com * (10 - num_remains) / 10
+
+            if len(strategy) < 2:  # fixing recorded numbers for the first round
+                cm = com
+
+        # detect restarting situation. Stop happened previously.
+        # Sufficient number of positive quarters, buy a portfolio, pay full commission
+        if stop and n_positive == restart_nb + 1:
+            cm = com
+            stop = False
+            n_stop = 0
+
+        cr = r * strategy[-1]["CROI"] - cm
+        cs = s * strategy[-1]["CSPY"]
+
+        if stop and n_stop > 1:  # noting to sell, just waiting
+            cm = 0
+            portforlio_record = {"_"}
+            cr = strategy[-1]["CROI"]
+
+        # update date to the next quarter
+        date = date + pd.offsets.BDay(63)
+
+        strategy.append(
+            {
+                "Date": date,
+                "Portfolio": portforlio_record,
+                "ROI": r,
+                "SPY": s,
+                "COM": cm,
+                "CROI": cr,
+                "CSPY": cs,
+                "STOP": stop,
+                "N_STOP": n_stop,
+                "N_POSITIVE": n_positive,
+            }
+        )
+
+    # final sell of protfolio to cash out
+    if not stop:
+        strategy[-1]["CROI"] = strategy[-1]["CROI"] - com
+
+    strategy[-1]["CSPY"] = strategy[-1]["CSPY"] - com
+
+    # Create the strategy DataFrame
+    strategy_df = pd.DataFrame(strategy)
+    strategy_df.set_index("Date", inplace=True)
+    strategy_df.index = pd.to_datetime(strategy_df.index)
+
+    return strategy_df
+
+
+def mom_simulate(startY, endY, n_quarters, com, loss_rate, restart_nb):
+    """Simulates momentum investment strategies across multiple years with stop-loss mechanism.
+
+    This function runs a momentum-based investment strategy for each year, tracking portfolio performance and comparing it against the S&P 500 benchmark.
+
+    Args:
+        startY (int): The starting year for the simulation.
+        endY (int): The ending year for the simulation.
+        n_quarters (int): Number of quarters to run each strategy.
+        com (float): Transaction cost rate per portfolio rebalancing.
+        loss_rate (float): Threshold for portfolio loss that triggers stop-loss mechanism.
+        restart_nb (int): Number of consecutive positive quarters required to restart portfolio.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing performance metrics for each simulated period, including:
+        - Year: The year range of the strategy
+        - Final_CROI: Cumulative return of the investment strategy
+        - Final_CSPY: Cumulative return of the S&P 500 benchmark
+
+    Examples:
+        >>> results = mom_simulate(2000, 2022, 4, 0.01, 0.1, 2)
+    """
+    results = []  # To store the final CROI values
+
+    for year in range(2000, 2023):
+        start_date = pd.Timestamp(datetime.datetime(year, 1, 1)).tz_localize("UTC")
+        strategy_results = stop_strategy(
+            start_date, n_quarters, com, loss_rate, restart_nb
+        )  # Assuming com_strategy is your function
+        final_croi = strategy_results["CROI"].iloc[-1]  # Get the final CROI value
+        final_cspy = strategy_results["CSPY"].iloc[-1]  # Get the final CSPY value
+        results.append(
+            {
+                "Year": f"{year}-{year+n_quarters/4}",
+                "Final_CROI": final_croi,
+                "Final_CSPY": final_cspy,
+            }
+        )  # Store the result
+
+    return pd.DataFrame(results)
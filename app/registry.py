@@ -0,0 +1,80 @@
+import numpy as np
+
+from load_data import sp500_data as sp500_data
+
+# dense integer IDs: the ID of a ticker is its column position in sp500_data
+SYMBOLS = np.asarray(sp500_data.columns, dtype=object)
+ALPHABETICAL = np.argsort(SYMBOLS, kind="stable")  # IDs in ticker order
+
+_IDS = {symbol: i for i, symbol in enumerate(SYMBOLS)}
+
+
+def to_ids(symbols):
+    """Maps ticker symbols to their integer IDs.
+
+    Args:
+        symbols (list): Stock ticker symbols, or an integer array which is returned as is.
+
+    Returns:
+        np.ndarray: Integer IDs of the tickers, in the same order.
+
+    Raises:
+        KeyError: If a symbol is not in the dataset.
+
+    Examples:
+        >>> ids = to_ids(['AAPL', 'MSFT'])
+    """
+    if isinstance(symbols, np.ndarray) and symbols.dtype.kind in "iu":
+        return symbols
+    missing = [symbol for symbol in symbols if symbol not in _IDS]
+    if missing:
+        raise KeyError(f"{missing} not in index")
+    return np.fromiter((_IDS[symbol] for symbol in symbols), dtype=np.intp)
+
+
+def to_symbols(ids):
+    """Maps integer IDs back to ticker symbols.
+
+    Args:
+        ids (np.ndarray): Integer IDs of the tickers.
+
+    Returns:
+        list: Stock ticker symbols, in the same order.
+
+    Examples:
+        >>> to_symbols(to_ids(['AAPL', 'MSFT']))
+        ['AAPL', 'MSFT']
+    """
+    return SYMBOLS[ids].tolist()
+
+
+def parse(tickers):
+    """Parses a hyphen-separated list of tickers into integer IDs.
+
+    Args:
+        tickers (str): Hyphen-separated list of stock ticker symbols.
+
+    Returns:
+        np.ndarray: Integer IDs of the tickers.
+
+    Examples:
+        >>> ids = parse('AAPL-GOOGL-MSFT')
+    """
+    return to_ids(tickers.split("-"))
+
+
+def join(ids):
+    """Formats integer IDs as a hyphen-separated list of tickers, sorted alphabetically.
+
+    Args:
+        ids (np.ndarray): Integer IDs of the tickers.
+
+    Returns:
+        str: Hyphen-separated list of stock ticker symbols.
+
+    Examples:
+        >>> join(parse('MSFT-AAPL'))
+        'AAPL-MSFT'
+    """
+    return "-".join(sorted(to_symbols(ids)))
+
@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+
+from load_data import segment as segment
+from load_data import spy_data as spy_data
+from load_data import sp500_data as sp500_data
+
+MONTH = 21  # business days in a month, 12 months is the 252 days of a year
+LOOKBACKS = (3, 6, 9, 12)  # standard lookbacks in months
+
+# log prices shared by all lookbacks, a window return is a difference of two rows,
+# mapped from the segment instead of computed by every process, see prefix
+LOG_PRICES = segment["arrays"]["log_prices"]
+LOG_SPY = np.log(spy_data["SPY"].to_numpy())
+
+# every business day of the dataset, the dates axis of the score tensor
+GRID = pd.bdate_range(sp500_data.index[0], sp500_data.index[-1])
+
+_TENSOR = {}  # lookback in months -> (stock scores, spy scores) on GRID
+_ROWS = {}  # lookback in months -> first rows of the windows ending on GRID
+
+
+def window_rows(dates, lookback):
+    """Finds the first and last rows of the lookback windows ending at some dates.
+
+    The windows are the ones of the original momentum score: from lookback months of business days before the date, to the date.
+
+    Args:
+        dates (pd.DatetimeIndex): End dates of the windows.
+        lookback (int): Length of the windows in months.
+
+    Returns:
+        tuple: A tuple containing two np.ndarray:
+        - first: First row of each window in sp500_data
+        - last: Last row of each window in sp500_data
+    """
+    index = sp500_data.index
+    start = dates - pd.offsets.BDay(MONTH * lookback)
+    first = index.searchsorted(start, side="left")
+    last = index.searchsorted(dates, side="right") - 1
+    return np.minimum(first, index.size - 1), np.maximum(last, 0)
+
+
+def rows_at(date, lookback):
+    """Finds the first and last rows of the lookback window ending at one date.
+
+    Same as window_rows for a single date, with the rows of the business days looked up instead of computed.
+
+    Args:
+        date (datetime): End date of the window.
+        lookback (int): Length of the window in months.
+
+    Returns:
+        tuple: First and last row of the window in sp500_data.
+    """
+    g = GRID.asi8.searchsorted(date.value)
+    if g == GRID.size or GRID.asi8[g] != date.value:
+        first, last = window_rows(pd.DatetimeIndex([date]), lookback)
+        return first[0], last[0]
+
+    if lookback not in _ROWS:
+        _ROWS[lookback] = window_rows(GRID, lookback)
+    first, last = _ROWS[lookback]
+    return first[g], last[g]
+
+
+def spy_rows(rows, side):
+    """Matches rows of sp500_data to rows of spy_data, which has its own calendar.
+
+    Args:
+        rows (np.ndarray): Rows of sp500_data.
+        side (str): "left" for the first SPY row at or after the sessions, "right" for the last one at or before.
+
+    Returns:
+        np.ndarray: Rows of spy_data.
+    """
+    found = spy_data.index.searchsorted(sp500_data.index[rows], side=side)
+    return found if side == "left" else found - 1
+
+
+def _scores(dates, lookbacks):
+    # lookbacks x dates x tickers log returns, the last rows are shared
+    _, last = window_rows(dates, 0)
+    spy_last = LOG_SPY[spy_rows(last, "right")]
+    stocks = np.empty((len(lookbacks), dates.size, LOG_PRICES.shape[1]))
+    spy = np.empty((len(lookbacks), dates.size))
+    for k, lookback in enumerate(lookbacks):
+        first, _ = window_rows(dates, lookback)
+        np.subtract(LOG_PRICES[last], LOG_PRICES[first], out=stocks[k])
+        spy[k] = spy_last - LOG_SPY[spy_rows(first, "left")]
+    return stocks, spy
+
+
+def score_tensor(lookbacks=LOOKBACKS):
+    """Computes the log momentum scores of all stocks, for several lookbacks, at every business day.
+
+    Lookbacks already computed are kept, so strategies exploring other parameters slice the same tensor instead of scoring again.
+
+    Args:
+        lookbacks (tuple, optional): Lookbacks in months. Defaults to LOOKBACKS.
+
+    Returns:
+        tuple: A tuple containing two np.ndarray:
+        - stocks: A lookbacks x GRID x tickers array of log returns, NaN where a price is missing
+        - spy: A lookbacks x GRID array of S&P 500 log returns over the same windows
+
+    Examples:
+        >>> stocks, spy = score_tensor((1, 3, 6, 12))
+        >>> twelve_minus_one = stocks[3] - stocks[0]
+    """
+    missing = [lookback for lookback in lookbacks if lookback not in _TENSOR]
+    if missing:
+        stocks, spy = _scores(GRID, missing)
+        for k, lookback in enumerate(missing):
+            _TENSOR[lookback] = (stocks[k], spy[k])
+
+    return (
+        np.stack([_TENSOR[lookback][0] for lookback in lookbacks]),
+        np.stack([_TENSOR[lookback][1] for lookback in lookbacks]),
+    )
+
+
+def momentum_scores(date, lookback=12, skip=0):
+    """Log momentum scores of all stocks at a date.
+
+    The score of a lookback skipping the last months is the difference of two lookbacks, e.g. 12-1 momentum is the 12 months score minus the 1 month score. Only the rows of the window are read, the score tensor is not built, see score_tensor.
+
+    Args:
+        date (datetime): The end date of the lookback window.
+        lookback (int, optional): Length of the lookback window in months. Defaults to 12.
+        skip (int, optional): Number of most recent months left out of the window. Defaults to 0.
+
+    Returns:
+        tuple: A tuple containing three elements:
+        - stocks (np.ndarray): Log return of every stock over the window, by ticker ID
+        - spy (float): S&P 500 log return over the window
+        - last (int): Row of the date in sp500_data
+
+    Examples:
+        >>> date = pd.Timestamp('2022-12-30').tz_localize('UTC')
+        >>> stocks, spy, last = momentum_scores(date, 12, 1)
+    """
+    # one row of each lookback, O(tickers) from the shared log prices
+    stocks, spy, last = momentum_matrix(pd.DatetimeIndex([date]), lookback, skip)
+    return stocks[0], spy[0], last[0]
+
+
+def momentum_matrix(dates, lookback=12, skip=0):
+    """Log momentum scores of all stocks at several dates, the array version of momentum_scores.
+
+    Args:
+        dates (pd.DatetimeIndex): End dates of the lookback windows, on or off the business days grid.
+        lookback (int, optional): Length of the lookback window in months. Defaults to 12.
+        skip (int, optional): Number of most recent months left out of the window. Defaults to 0.
+
+    Returns:
+        tuple: A tuple containing three np.ndarray:
+        - stocks: A dates x tickers array of log returns, NaN where a price is missing
+        - spy: S&P 500 log return over each window
+        - last: Row of each date in sp500_data
+
+    Examples:
+        >>> dates = pd.bdate_range('2022-01-03', periods=4, freq='63B', tz='UTC')
+        >>> stocks, spy, last = momentum_matrix(dates, 12, 1)
+    """
+    lookbacks = (lookback, skip) if skip else (lookback,)
+    stocks, spy = _scores(dates, lookbacks)
+    last = window_rows(dates, 0)[1]
+    if skip:
+        return stocks[0] - stocks[1], spy[0] - spy[1], last
+    return stocks[0], spy[0], last
+
+
+def top_k(values, k):
+    """Selects the IDs of the k largest positive values with a partial sort.
+
+    Only the candidates at or above the k-th value are sorted, which is O(tickers) instead of sorting every ticker.
+
+    Args:
+        values (np.ndarray): A value per ticker ID, NaN for tickers out of the ranking.
+        k (int): Number of IDs to select.
+
+    Returns:
+        np.ndarray: IDs of the selected tickers, by descending value and then by ID.
+
+    Examples:
+        >>> top_k(np.array([0.1, np.nan, 0.3, -0.2]), 2)
+        array([2, 0])
+    """
+    (ids,) = np.nonzero(values > 0)
+    if ids.size > k > 0:
+        kth = -np.partition(-values[ids], k - 1)[k - 1]
+        ids = ids[values[ids] >= kth]
+    return ids[np.lexsort((ids, -values[ids]))][:k]
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+def default_dir():
+    """Returns the host-wide directory holding published dataset segments.
+
+    The directory can be set with the PORTFOLIO_SHARED_DIR environment variable, otherwise a folder in /dev/shm is used so segments live in RAM and are shared by every process on the host.
+
+    Returns:
+        str: Path of the shared directory.
+
+    Examples:
+        >>> root = default_dir()
+    """
+    root = os.environ.get("PORTFOLIO_SHARED_DIR")
+    if root:
+        return root
+    if os.path.isdir("/dev/shm"):
+        return "/dev/shm/portfoliobacktester"
+    return os.path.join(tempfile.gettempdir(), "portfoliobacktester")
+
+
+def dataset_version(paths, layout=""):
+    """Computes a version tag for the dataset stored in the given files.
+
+    Args:
+        paths (list): Paths of the source files, e.g. the SPY and S&P 500 CSV files.
+        layout (str, optional): Tag of the arrays published from them, changed whenever the segment content changes. Defaults to "".
+
+    Returns:
+        str: A short hash of file names, sizes and modification times.
+
+    Examples:
+        >>> version = dataset_version(['./spy_1999.csv', './sp500_1999.csv'])
+    """
+    digest = hashlib.sha1(layout.encode())
+    for path in paths:
+        stat = os.stat(path)
+        # whole seconds, the precision kept by image layers and archives
+        digest.update(
+            f"{os.path.basename(path)}:{stat.st_size}:{int(stat.st_mtime)};".encode()
+        )
+    return digest.hexdigest()[:16]
+
+
+def publish(version, arrays, meta, root=None):
+    """Publishes arrays as a read-only dataset segment shared by all processes on the host.
+
+    This function writes every array as a .npy file in a temporary folder and renames it in place atomically, so readers never see a partial segment. Segments of other versions are removed; processes still mapping them keep their pages until they exit. Versions with another suffix, e.g. "-float32", belong to another storage mode and are kept.
+
+    Args:
+        version (str): Dataset version tag, see dataset_version.
+        arrays (dict): Mapping of array name to np.ndarray.
+        meta (dict): JSON-serializable metadata, e.g. column names.
+        root (str, optional): Shared directory. Defaults to default_dir().
+
+    Returns:
+        dict: The attached segment, see attach.
+
+    Examples:
+        >>> segment = publish(version, {'prices': prices}, {'columns': columns})
+    """
+    root = root or default_dir()
+    os.makedirs(root, exist_ok=True)
+    target = os.path.join(root, version)
+
+    tmp = tempfile.mkdtemp(prefix=f".{version}-", dir=root)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(array))
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({"arrays": list(arrays), **meta}, f)
+    os.chmod(tmp, 0o755)
+
+    try:
+        os.rename(tmp, target)
+    except OSError:
+        # another process published the same version first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    mode = version.partition("-")[2]
+    for name in os.listdir(root):
+        stale = name != version and name.partition("-")[2] == mode
+        if stale and not name.startswith("."):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    return attach(version, root)
+
+
+def attach(version, root=None):
+    """Maps a published dataset segment into the current process without copying it.
+
+    Args:
+        version (str): Dataset version tag, see dataset_version.
+        root (str, optional): Shared directory. Defaults to default_dir().
+
+    Returns:
+        dict: Metadata with an extra "arrays" entry mapping names to read-only memory-mapped arrays, or None if the version is not published.
+
+    Examples:
+        >>> segment = attach(version)
+        >>> prices = segment['arrays']['prices']
+    """
+    folder = os.path.join(root or default_dir(), version)
+    try:
+        with open(os.path.join(folder, "meta.json")) as f:
+            meta = json.load(f)
+        meta["arrays"] = {
+            name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r")
+            for name in meta["arrays"]
+        }
+    except FileNotFoundError:
+        return None
+    return meta
+
+
+def to_frames(segment):
+    """Wraps the arrays of a dataset segment into the SPY and S&P 500 DataFrames.
+
+    The price values are not copied: both DataFrames are read-only views of the shared memory.
+
+    Args:
+        segment (dict): An attached segment, see attach.
+
+    Returns:
+        tuple: A tuple containing two pandas DataFrames:
+        - spy_data: SPY ETF closing prices with a UTC datetime index
+        - sp500_data: S&P 500 constituent stock prices with a UTC datetime index
+
+    Examples:
+        >>> spy, sp500 = to_frames(attach(version))
+    """
+    arrays = segment["arrays"]
+
+    spy_data = pd.DataFrame(
+        arrays["spy"].reshape(-1, 1),
+        index=_utc_index(arrays["spy_dates"]),
+        columns=["SPY"],
+        copy=False,
+    )
+    sp500_data = pd.DataFrame(
+        arrays["prices"],
+        index=_utc_index(arrays["dates"]),
+        columns=pd.Index(segment["columns"], name=segment["columns_name"]),
+        copy=False,
+    )
+    return spy_data, sp500_data
+
+
+def from_frames(spy_data, sp500_data, dtype="float64"):
+    """Splits the SPY and S&P 500 DataFrames into arrays and metadata ready to publish.
+
+    Args:
+        spy_data (pd.DataFrame): SPY ETF closing prices.
+        sp500_data (pd.DataFrame): S&P 500 constituent stock prices.
+        dtype (str, optional): Storage type of the price matrix, "float64" or "float32". SPY is always float64. Defaults to "float64".
+
+    Returns:
+        tuple: A tuple containing two elements:
+        - arrays (dict): Price matrix, SPY series and their dates as int64 nanoseconds
+        - meta (dict): Ticker names
+
+    Examples:
+        >>> arrays, meta = from_frames(spy, sp500)
+    """
+    arrays = {
+        "dates": sp500_data.index.tz_convert(None).asi8,
+        "prices": sp500_data.to_numpy(dtype=dtype),
+        "spy": spy_data["SPY"].to_numpy(dtype="float64"),
+        "spy_dates": spy_data.index.tz_convert(None).asi8,
+    }
+    meta = {
+        "columns": [str(c) for c in sp500_data.columns],
+        "columns_name": sp500_data.columns.name,
+    }
+    return arrays, meta
+
+
+def _utc_index(nanoseconds):
+    return pd.DatetimeIndex(
+        nanoseconds.view("datetime64[ns]"), name="Date"
+    ).tz_localize("UTC")
@@ -0,0 +1,84 @@
+import os
+import pickle
+
+import pandas as pd
+
+from load_data import data_version as data_version
+from load_data import sp500_data as sp500_data
+from momentum import MomentumRank
+from momentum import com_strategy
+
+SNAPSHOT_PATH = "./momentum_now.pkl"
+
+# default parameters of the Momentum Now page
+STANDARD_QUARTERS = (1, 2, 4, 8)
+DEFAULT_COM = 0.007
+
+
+def build_snapshot():
+    """Materializes today's momentum ranking and the trailing strategies for the standard lookbacks.
+
+    This function is run by the ingest step after new data lands, so the Momentum Now page can show its default results without running the strategies.
+
+    Returns:
+        dict: The snapshot, including:
+        - version: Version tag of the data it was built from
+        - asof: Last date with data
+        - ranking: Top 10 momentum stocks at that date
+        - rank: The MomentumRank of the ranking, for pages to move it to other dates
+        - strategies: com_strategy results by number of trailing quarters
+
+    Notes:
+        - Saves the snapshot to 'momentum_now.pkl'
+        - Uses the transaction cost rate DEFAULT_COM
+
+    Examples:
+        >>> snapshot = build_snapshot()
+    """
+    asof = sp500_data.index[-1]
+
+    strategies = {}
+    for n_quarters in STANDARD_QUARTERS:
+        date = asof - pd.offsets.BDay(n_quarters * 63)
+        strategies[n_quarters] = com_strategy(date, n_quarters, DEFAULT_COM)
+
+    rank = MomentumRank().update(asof)
+
+    snapshot = {
+        "version": data_version(),
+        "asof": asof,
+        "ranking": rank.frame(),
+        "rank": rank,
+        "strategies": strategies,
+    }
+
+    tmp = SNAPSHOT_PATH + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(snapshot, f)
+    os.replace(tmp, SNAPSHOT_PATH)
+
+    return snapshot
+
+
+def load_snapshot():
+    """Loads the materialized momentum snapshot if it matches the current data.
+
+    Returns:
+        dict: The snapshot, see build_snapshot, or None if it is missing or was built from other data.
+
+    Examples:
+        >>> snapshot = load_snapshot()
+    """
+    try:
+        with open(SNAPSHOT_PATH, "rb") as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return None
+
+    if snapshot["version"] != data_version():
+        return None
+    return snapshot
+
+
+if __name__ == "__main__":
+    build_snapshot()
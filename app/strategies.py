@@ -0,0 +1,391 @@
+import numpy as np
+import pandas as pd
+
+import access
+import costs
+import registry
+import scores
+from metrics import running_metrics, TRADING_DAYS
+from load_data import spy_data as spy_data
+from load_data import sp500_members as sp500_members
+
+# A strategy is a function from a dates x tickers signal matrix to a positions matrix, boolean
+# for equal weights or float weights summing to 1 per date. Returns, turnover, commissions and
+# the benchmark are then computed for every rebalancing at once, see backtest.
+
+QUARTER = 63  # business days between rebalancings of the momentum strategies
+
+
+def schedule(date, n_periods, period=QUARTER):
+    """Rebalancing dates of a strategy started at a date.
+
+    Args:
+        date (datetime): The starting date.
+        n_periods (int): Number of holding periods.
+        period (int, optional): Business days between rebalancings. Defaults to QUARTER.
+
+    Returns:
+        pd.DatetimeIndex: The n_periods + 1 dates named Date, the starting date then the end of every period.
+
+    Examples:
+        >>> dates = schedule(pd.Timestamp('2020-01-02').tz_localize('UTC'), 4)
+    """
+    ends = [date + pd.offsets.BDay(period * n) for n in range(1, n_periods + 1)]
+    return pd.DatetimeIndex([date, *ends], name="Date").as_unit("ns")
+
+
+def momentum_signal(dates, lookback=12, skip=0):
+    """Momentum of every stock relative to the S&P 500 at several dates, the signal of the momentum strategies.
+
+    Args:
+        dates (pd.DatetimeIndex): The rebalancing dates.
+        lookback (int, optional): Lookback in months, see scores. Defaults to 12.
+        skip (int, optional): Number of most recent months left out of the lookback. Defaults to 0.
+
+    Returns:
+        np.ndarray: A dates x tickers array of ALFA, see momentum.moment, NaN for stocks out of the index or without a price.
+    """
+    stocks, spy, last = scores.momentum_matrix(dates, lookback, skip)
+    roi = np.where(sp500_members[last], np.exp(stocks), np.nan)
+    return roi - np.exp(spy)[:, None]
+
+
+def top_positions(signal, top_n):
+    """Holds the top_n stocks of each date with a positive signal, the strategy of com_strategy.
+
+    Args:
+        signal (np.ndarray): A dates x tickers signal matrix, NaN for stocks out of the ranking.
+        top_n (int): Number of stocks to hold.
+
+    Returns:
+        np.ndarray: A dates x tickers boolean positions matrix, ties broken by ticker ID as in scores.top_k.
+    """
+    order = np.argsort(-signal, axis=1, kind="stable")[:, :top_n]
+    rows = np.arange(signal.shape[0])[:, None]
+    positions = np.zeros(signal.shape, dtype=bool)
+    positions[rows, order] = signal[rows, order] > 0
+    return positions
+
+
+def equal_weights(positions):
+    """Weights of equal-weight portfolios.
+
+    Args:
+        positions (np.ndarray): A dates x tickers boolean positions matrix.
+
+    Returns:
+        np.ndarray: The weights, NaN on dates without positions.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return positions / positions.sum(axis=1, keepdims=True)
+
+
+def to_positions(holdings):
+    """Builds a positions matrix from the ticker IDs held at each date.
+
+    Args:
+        holdings (list): An array of ticker IDs per date, see registry.
+
+    Returns:
+        np.ndarray: A dates x tickers boolean positions matrix.
+    """
+    positions = np.zeros((len(holdings), registry.SYMBOLS.size), dtype=bool)
+    rows = np.repeat(np.arange(len(holdings)), [len(ids) for ids in holdings])
+    positions[rows, np.concatenate([np.empty(0, dtype=int), *holdings])] = True
+    return positions
+
+
+def holdings(positions, signal=None):
+    """Lists the ticker IDs held at each date.
+
+    Args:
+        positions (np.ndarray): A dates x tickers positions matrix.
+        signal (np.ndarray, optional): The signal matrix, to order the IDs by descending signal then ID. Defaults to None, by ID.
+
+    Returns:
+        list: An array of ticker IDs per date.
+    """
+    held = positions > 0
+    if signal is None:
+        return [np.flatnonzero(row) for row in held]
+    order = np.argsort(np.where(held, -signal, np.inf), axis=1, kind="stable")
+    return [row[:n] for row, n in zip(order, held.sum(axis=1))]
+
+
+def holding_growth(dates, weights, period=QUARTER):
+    """Growth of every held stock over the periods starting at the rebalancing dates, and of the S&P 500.
+
+    Each portfolio is measured as momentum.momentum_portfolio does: from the first to the last day of the period where every held stock has a price, see access.window_returns.
+
+    Args:
+        dates (pd.DatetimeIndex): The rebalancing dates.
+        weights (np.ndarray): A dates x tickers weights matrix, see equal_weights.
+        period (int, optional): Business days of the holding periods. Defaults to QUARTER.
+
+    Returns:
+        tuple: A tuple containing two np.ndarray:
+        - growth: A dates x tickers array of price ratios, NaN for stocks not held
+        - spy: S&P 500 return over each period
+
+    Raises:
+        IndexError: If a period has no session in the dataset.
+    """
+    growth = np.full(weights.shape, np.nan)
+    if dates.empty:
+        return growth, np.empty(0)
+
+    first = access.DATES.searchsorted(dates, side="left")
+    stop = access.DATES.searchsorted(dates + pd.offsets.BDay(period), side="right")
+    length = stop - first
+    if (length <= 0).any():
+        raise IndexError(f"no session after {dates[np.argmax(length <= 0)]}")
+
+    # held IDs first in each row, padded to the largest portfolio
+    held = weights > 0
+    count = held.sum(axis=1)
+    ids = np.argsort(~held, axis=1, kind="stable")[:, : max(count.max(), 1)]
+    slots = np.arange(ids.shape[1]) < count[:, None]
+
+    # first and last days where every held stock has a price, two rows read per period
+    ratios = access.window_returns(ids, first, stop - 1, slots)
+    np.put_along_axis(growth, ids, ratios, axis=1)
+
+    spy = spy_data["SPY"].to_numpy()
+    spy_roi = (
+        spy[scores.spy_rows(stop - 1, "right")] / spy[scores.spy_rows(first, "left")]
+    )
+    return growth, spy_roi
+
+
+def holding_returns(dates, weights, period=QUARTER):
+    """Returns of the portfolios held from every rebalancing date, and of the S&P 500.
+
+    Args:
+        dates (pd.DatetimeIndex): The rebalancing dates.
+        weights (np.ndarray): A dates x tickers weights matrix, see equal_weights.
+        period (int, optional): Business days of the holding periods. Defaults to QUARTER.
+
+    Returns:
+        tuple: A tuple containing two np.ndarray:
+        - roi: Portfolio return over each period, NaN without positions
+        - spy: S&P 500 return over each period
+
+    Raises:
+        IndexError: If a period has no session in the dataset.
+    """
+    growth, spy = holding_growth(dates, weights, period)
+    held = weights > 0
+    roi = np.where(held, weights * growth, 0).sum(axis=1)
+    return np.where(held.any(axis=1), roi, np.nan), spy
+
+
+def commissions(positions, com, slots):
+    """Transaction costs of each rebalancing, as charged by momentum.com_strategy.
+
+    The first portfolio costs com, then every replaced slot is sold and bought.
+
+    Args:
+        positions (np.ndarray): A dates x tickers positions matrix, or a stack of them on leading axes.
+        com (float): Transaction cost rate per portfolio rebalancing.
+        slots (int): Number of stocks of a full portfolio.
+
+    Returns:
+        np.ndarray: Cost of each rebalancing, as a share of the portfolio, along the last axis.
+    """
+    cm = 2 * com * (slots - _remains(positions)) / slots
+    first = np.full(cm.shape[:-1] + (1,), com)
+    return np.concatenate([first, cm], axis=-1)[..., : positions.shape[-2]]
+
+
+def _remains(positions):
+    # stocks kept from one rebalancing to the next
+    held = positions > 0
+    return (held[..., 1:, :] & held[..., :-1, :]).sum(axis=-1)
+
+
+def stop_loss(roi, loss_rate, restart_nb):
+    """Runs the stop-loss rules of momentum.stop_strategy over the period returns.
+
+    The state depends on the previous period, so this is a scan over the periods, on scalars only.
+
+    Args:
+        roi (np.ndarray): Portfolio return of each period.
+        loss_rate (float): Period loss that stops the strategy.
+        restart_nb (int): Number of positive periods before restarting.
+
+    Returns:
+        tuple: A tuple containing five np.ndarray, one value per period:
+        - stop: Whether the strategy is stopped
+        - n_stop: Number of periods since the stop
+        - n_positive: Number of consecutive periods above the loss rate
+        - sell: Whether the whole portfolio is sold or bought at the end of the period
+        - waiting: Whether the period is spent in cash
+    """
+    n = len(roi)
+    stop, sell, waiting = (np.zeros(n, dtype=bool) for _ in range(3))
+    n_stop, n_positive = np.zeros(n, dtype=int), np.zeros(n, dtype=int)
+
+    stopped, n_s, n_p = False, 0, 0
+    for q, r in enumerate(roi):
+        if r < 1 - loss_rate:
+            stopped, n_p = True, 0
+        else:
+            n_p += 1
+        if stopped:
+            n_s += 1
+        sell[q] = stopped and n_s == 1
+        if stopped and n_p == restart_nb + 1:
+            sell[q], stopped, n_s = True, False, 0
+        waiting[q] = stopped and n_s > 1
+        stop[q], n_stop[q], n_positive[q] = stopped, n_s, n_p
+    return stop, n_stop, n_positive, sell, waiting
+
+
+def performance(dates, positions, roi, spy, com, cm, growth=None, cash_out=True):
+    """Assembles the performance of a strategy, in the format of momentum.com_strategy.
+
+    Args:
+        dates (pd.DatetimeIndex): The rebalancing dates, see schedule.
+        positions (np.ndarray): A periods x tickers positions matrix.
+        roi (np.ndarray): Portfolio return of each period.
+        spy (np.ndarray): S&P 500 return of each period.
+        com (float): Transaction cost rate, paid to buy the first portfolio and to cash out.
+        cm (np.ndarray): Cost of each rebalancing, see commissions.
+        growth (np.ndarray, optional): Growth of the portfolio in each period when not roi, e.g. 1 in cash. Defaults to None.
+        cash_out (bool, optional): Whether the last portfolio is sold. Defaults to True.
+
+    Returns:
+        pd.DataFrame: Portfolio, ROI, SPY, COM, CROI and CSPY of each rebalancing, indexed by Date, the first row being the start. UNIVERSE and CUNIVERSE are the equal-weight universe benchmark, rebalanced daily, like SPY and CSPY, see access.universe_growth.
+    """
+    croi = np.concatenate(
+        [[1 - com], costs.cumulate(roi if growth is None else growth, cm, 1 - com)]
+    )
+    cspy = np.cumprod(np.concatenate([[1 - com], spy]))
+    universe = access.universe_growth(dates[:-1], dates[1:])
+    cuniverse = np.cumprod(np.concatenate([[1 - com], universe]))
+    if cash_out:
+        croi[-1] -= com
+    cspy[-1] -= com
+    cuniverse[-1] -= com
+
+    portfolios = [set(registry.to_symbols(ids)) for ids in holdings(positions)]
+    return pd.DataFrame(
+        {
+            "Portfolio": [{"_"}, *portfolios],
+            "ROI": np.concatenate([[1], roi]),
+            "SPY": np.concatenate([[1], spy]),
+            "COM": np.concatenate([[com], cm]),
+            "CROI": croi,
+            "CSPY": cspy,
+            "UNIVERSE": np.concatenate([[1], universe]),
+            "CUNIVERSE": cuniverse,
+        },
+        index=dates,
+    )
+
+
+def charge(strategy, weights, model, period=QUARTER):
+    """Charges a weight-level cost model to a strategy instead of its commission per slot.
+
+    Args:
+        strategy (pd.DataFrame): A result of performance.
+        weights (np.ndarray): The periods x tickers weights held, 0 in cash.
+        model (dict): Arguments of costs.net_values, e.g. {"proportional": 0.0005, "fixed": 1, "capital": 10000}.
+        period (int, optional): Business days of the holding periods. Defaults to QUARTER.
+
+    Returns:
+        pd.DataFrame: The strategy with the costs paid in COM and the net value in CROI, in units of the starting capital.
+
+    Examples:
+        >>> net = charge(strategy, equal_weights(positions), {"proportional": 0.0005})
+    """
+    growth, _ = holding_growth(strategy.index[:-1], weights, period)
+    values, paid = costs.net_values(weights, growth, **model)
+    return strategy.assign(COM=paid, CROI=values)
+
+
+def with_metrics(strategy, period=QUARTER):
+    """Adds the risk metrics of a strategy as columns, measured from the start to each rebalancing.
+
+    Args:
+        strategy (pd.DataFrame): A result of performance or charge.
+        period (int, optional): Business days of the holding periods. Defaults to QUARTER.
+
+    Returns:
+        pd.DataFrame: The strategy with the columns of metrics.risk_metrics, of CROI against CSPY, see metrics.running_metrics.
+
+    Examples:
+        >>> strategy = with_metrics(backtest(lambda signal: top_positions(signal, 20), start, 8, 0.007))
+    """
+    metrics = running_metrics(
+        strategy["CROI"], strategy["CSPY"], periods=TRADING_DAYS / period
+    )
+    return strategy.join(metrics.set_axis(strategy.index))
+
+
+def backtest(
+    strategy,
+    date,
+    n_periods,
+    com,
+    slots=None,
+    lookback=12,
+    skip=0,
+    period=QUARTER,
+    cost_model=None,
+):
+    """Backtests a strategy on the momentum signal, every period at once.
+
+    Args:
+        strategy (callable): Maps a dates x tickers signal matrix to a boolean positions matrix, held in equal weights, or to a weights matrix.
+        date (datetime): The starting date.
+        n_periods (int): Number of holding periods.
+        com (float): Transaction cost rate per portfolio rebalancing.
+        slots (int, optional): Number of stocks of a full portfolio, for the commission. Defaults to None, the largest portfolio held.
+        lookback (int, optional): Momentum lookback in months. Defaults to 12.
+        skip (int, optional): Number of most recent months left out of the lookback. Defaults to 0.
+        period (int, optional): Business days between rebalancings. Defaults to QUARTER.
+        cost_model (dict, optional): A weight-level cost model, see charge. Defaults to None, com per replaced slot.
+
+    Returns:
+        pd.DataFrame: The columns of performance with the TURNOVER of each rebalancing, the sum of the absolute weight changes, see costs.turnover, and the risk metrics, see with_metrics.
+
+    Examples:
+        >>> start = pd.Timestamp('2010-01-04').tz_localize('UTC')
+        >>> top_20 = backtest(lambda signal: top_positions(signal, 20), start, 8, 0.007)
+        >>> def alfa_weighted(signal):
+        ...     alfa = np.where(top_positions(signal, 10), signal, 0)
+        ...     return alfa / alfa.sum(axis=1, keepdims=True)
+        >>> weighted = backtest(alfa_weighted, start, 8, 0.007, cost_model={"proportional": 0.0005})
+    """
+    dates = schedule(date, n_periods, period)
+    signal = momentum_signal(dates[:-1], lookback, skip)
+    positions = strategy(signal)
+    weights = equal_weights(positions) if positions.dtype == bool else positions
+
+    held = weights > 0
+    slots = slots or max(held.sum(axis=1).max(initial=0), 1)
+    growth, spy = holding_growth(dates[:-1], weights, period)
+    roi = np.where(held, weights * growth, 0).sum(axis=1)
+    roi = np.where(held.any(axis=1), roi, np.nan)
+
+    result = performance(dates, held, roi, spy, com, commissions(held, com, slots))
+    if cost_model is not None:
+        values, paid = costs.net_values(weights, growth, **cost_model)
+        result = result.assign(COM=paid, CROI=values)
+    result.insert(3, "TURNOVER", costs.turnover(weights, growth))
+    return with_metrics(result, period)
+
+
+# DEBUGGING
+
+# 1. com_strategy as a strategy of the framework, then with a weight-level cost model
+# date = pd.Timestamp("2007-06-01").tz_localize("UTC")
+# print(backtest(lambda signal: top_positions(signal, 10), date, 17, 0.007, slots=10))
+# model = {"proportional": 0.0005, "fixed": 1, "capital": 10000}
+# print(backtest(lambda signal: top_positions(signal, 10), date, 17, 0.007, cost_model=model))
+
+# 2. Signal and positions of a few quarters
+# dates = schedule(date, 4)
+# signal = momentum_signal(dates[:-1], 12, 1)
+# print([registry.to_symbols(ids) for ids in holdings(top_positions(signal, 5), signal)])
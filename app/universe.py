@@ -0,0 +1,84 @@
+import numpy as np
+
+# Equal-weight indexes of the S&P 500 universe, computed once when the segment is built and
+# stored as cumulative series, so the universe return of any window is the ratio of two rows.
+
+
+def rebalanced_index(prices, members):
+    """Cumulative value of the universe held in equal weights, rebalanced every session.
+
+    The return of a session is the mean return of the stocks that were index members on the session before and have a price on the session. Each return is taken from the stock's last price, so the move over a gap in its prices counts on the session it trades again, and no return is counted before its first price or after its last one.
+
+    Args:
+        prices (np.ndarray): A dates x tickers array of prices, NaN where there is none.
+        members (np.ndarray): A dates x tickers boolean array of index membership, see membership.membership_mask.
+
+    Returns:
+        np.ndarray: The value of the index at every date, starting at 1, in float64.
+
+    Examples:
+        >>> index = rebalanced_index(sp500_data.to_numpy(), members)
+        >>> growth = index[last] / index[first]
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        daily = prices[1:] / last_prices(prices)[:-1] - 1
+    eligible = members[:-1] & np.isfinite(daily)
+    count = eligible.sum(axis=1)
+    total = np.where(eligible, daily, 0).sum(axis=1)
+    mean = np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+    return np.concatenate([[1.0], np.cumprod(1 + mean)])
+
+
+def buy_and_hold_indexes(prices, members, dates):
+    """Cumulative values of the universe bought in equal weights on the first session of every year and held.
+
+    Stocks leaving the dataset keep their last price, their value stays in the index as cash.
+
+    Args:
+        prices (np.ndarray): A dates x tickers array of prices, NaN where there is none.
+        members (np.ndarray): A dates x tickers boolean array of index membership.
+        dates (pd.DatetimeIndex): The dates of the rows.
+
+    Returns:
+        tuple: A tuple containing two np.ndarray:
+        - years: The start years
+        - paths: A years x dates array of values, 1 on the first session of the year and NaN before
+
+    Examples:
+        >>> years, paths = buy_and_hold_indexes(sp500_data.to_numpy(), members, sp500_data.index)
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    years = np.unique(dates.year) if len(dates) else np.array([], dtype=int)
+    paths = np.full((years.size, len(dates)), np.nan)
+
+    filled = last_prices(prices)
+
+    # first session of every year
+    for k, s in enumerate(np.searchsorted(dates.year, years)):
+        held = members[s] & np.isfinite(prices[s])
+        if held.any():
+            paths[k, s:] = (filled[s:, held] / prices[s, held]).mean(axis=1)
+    return years.astype(np.int64), paths
+
+
+def last_prices(prices):
+    """Last known price of every stock at every date.
+
+    Args:
+        prices (np.ndarray): A dates x tickers array of prices, NaN where there is none.
+
+    Returns:
+        np.ndarray: The prices filled forward over the gaps and after the last one, NaN before the first one.
+    """
+    seen = np.where(np.isfinite(prices), np.arange(prices.shape[0])[:, None], 0)
+    return prices[np.maximum.accumulate(seen, axis=0), np.arange(prices.shape[1])]
+
+
+# DEBUGGING
+
+# 1. Universe benchmarks of the dataset
+# from load_data import sp500_data, sp500_members
+# index = rebalanced_index(sp500_data.to_numpy(), sp500_members)
+# years, paths = buy_and_hold_indexes(sp500_data.to_numpy(), sp500_members, sp500_data.index)
+# print(index[-1], paths[years == 2010, -1])
@@ -0,0 +1,644 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import USFederalHolidayCalendar
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# largest relative deviation accepted between a fast path and its reference, see reference.py
+TOLERANCES = {
+    "rebalance": 1e-12,
+    "given_portfolio": 1e-12,
+    "simulate": 1e-12,
+    "simulate_paths": 1e-5,  # the reference rounds the reinvested amount to 6 decimals
+    "simulate_analytic": 1e-9,
+    "moment": 1e-9,
+    "MomentumRank": 1e-9,
+    "m_strategy": 1e-9,
+    "com_strategy": 1e-9,
+    "stop_strategy": 1e-9,
+    "momentum_portfolio": 1e-9,
+    "rolling_simulate": 1e-9,
+    "cost_model": 1e-9,
+}
+
+
+def synthetic_dataset(
+    folder, seed=0, n_tickers=80, start="2012-01-01", end="2019-12-31"
+):
+    """Writes a synthetic universe with the quirks of the real one, in the CSV files of load_data.
+
+    Args:
+        folder (str): Directory to write spy_1999.csv and sp500_1999.csv to.
+        seed (int, optional): Seed of the prices. Defaults to 0.
+        n_tickers (int, optional): Number of stocks, at least 50 trade every session, see calendars.align_to_primary. Defaults to 80.
+        start (str, optional): The first day. Defaults to "2012-01-01".
+        end (str, optional): The last day. Defaults to "2019-12-31".
+
+    Notes:
+        - Sessions are the business days without the US federal holidays
+        - Half the stocks have missing days, stocks have late listings and delistings, SPY misses a few sessions of its own
+    """
+    rng = np.random.default_rng(seed)
+    holidays = USFederalHolidayCalendar().holidays(start, end)
+    days = pd.bdate_range(start, end).difference(holidays)
+    n = len(days)
+
+    returns = rng.normal(0.0003, 0.015, (n, n_tickers)) + rng.normal(0, 0.01, (n, 1))
+    prices = 20 * np.exp(np.cumsum(returns, axis=0) + rng.normal(0, 1, n_tickers))
+    gaps = rng.random(n_tickers) < 0.5  # the other half is priced every session
+    prices[(rng.random(prices.shape) < 0.01) & gaps] = np.nan
+    for column in rng.choice(n_tickers, n_tickers // 8, replace=False):
+        prices[: rng.integers(n // 2), column] = np.nan  # listed later
+    for column in rng.choice(n_tickers, n_tickers // 8, replace=False):
+        prices[rng.integers(n // 2, n) :, column] = np.nan  # delisted
+
+    columns = [f"T{i:03d}" for i in range(n_tickers)]
+    sp500 = pd.DataFrame(prices, index=pd.Index(days, name="Date"), columns=columns)
+    spy = pd.DataFrame(
+        {"Close": 100 * np.exp(np.cumsum(returns.mean(axis=1)))},
+        index=pd.Index(days, name="Date"),
+    )
+    spy = spy[rng.random(n) > 0.005]
+
+    sp500.to_csv(os.path.join(folder, "sp500_1999.csv"), date_format="%Y-%m-%d")
+    spy.to_csv(os.path.join(folder, "spy_1999.csv"), date_format="%Y-%m-%d")
+
+
+def scenarios(seed, n):
+    """Draws random scenarios on the dataset loaded by the current process.
+
+    Dates are drawn among the sessions, the days next to holidays and the weekends. Windows go down to one month and one year.
+
+    Args:
+        seed (int): Seed of the draws.
+        n (int): Number of scenarios per engine.
+
+    Returns:
+        list: (engine, parameters) pairs.
+    """
+    from load_data import sp500_data
+
+    rng = random.Random(seed)
+    index = sp500_data.index
+    first, last = index[0].year, index[-1].year
+    holidays = USFederalHolidayCalendar().holidays(
+        index[0], index[-1], return_name=False
+    )
+    near = [h + pd.Timedelta(days=d) for h in holidays for d in (-1, 0, 1)]
+    weekends = pd.date_range(index[0], index[-1], freq="W-SAT")
+
+    def date(years_in):
+        pool = rng.choice([list(index), near, list(weekends)])
+        while True:
+            day = pd.Timestamp(rng.choice(pool))
+            day = day.tz_localize("UTC") if day.tz is None else day
+            if (
+                index[0] + pd.DateOffset(years=years_in)
+                <= day
+                <= index[-1] - pd.DateOffset(months=8)
+            ):
+                return day
+
+    def tickers(k, columns=sp500_data.columns):
+        return "-".join(sorted(rng.sample(list(columns), min(k, len(columns)))))
+
+    drawn = []
+    for _ in range(n):
+        startY = rng.randint(first, last - 1)
+        nb_years = rng.randint(1, last - startY)
+        lookback = rng.choice([1, 3, 6, 12])
+        # the reference strategies only take the default lookback and portfolio size
+        strategy = {"date": date(1), "n_quarters": rng.randint(1, 4)}
+        loss_rate = rng.choice([None, 0.05])
+        start, period = date(1), rng.choice([21, 63, 252])
+        window = sp500_data[start : start + pd.offsets.BDay(period)]
+        priced = window.columns[window.notna().any()]
+        drawn += [
+            (
+                "rebalance",
+                {
+                    "tickers": tickers(rng.randint(1, 6)),
+                    "period": rng.choice([5, 63, 252]),
+                },
+            ),
+            (
+                "given_portfolio",
+                {
+                    "tickers": tickers(rng.randint(1, 6)),
+                    "startY": startY,
+                    "nb_years": nb_years,
+                },
+            ),
+            (
+                "simulate",
+                {
+                    "startY": startY,
+                    "nb_years": nb_years,
+                    "nb_stocks": rng.randint(1, 8),
+                    "nb_trials": 5,
+                    "seed": rng.randrange(2**31),
+                },
+            ),
+            (
+                "simulate_paths",
+                {
+                    "startY": startY,
+                    "nb_years": nb_years,
+                    "nb_stocks": rng.randint(1, 8),
+                    "nb_trials": 6,
+                    "seed": rng.randrange(2**31),
+                },
+            ),
+            (
+                "simulate_analytic",
+                {
+                    "startY": startY,
+                    "nb_years": nb_years,
+                    "nb_stocks": rng.randint(1, 3),
+                },
+            ),
+            (
+                "moment",
+                {
+                    "date": date(1),
+                    "NY": lookback / 12,
+                    "top_n": rng.choice([1, 5, 10]),
+                },
+            ),
+            (
+                "MomentumRank",
+                {
+                    "date": date(1),
+                    "lookback": lookback,
+                    "top_n": rng.choice([1, 5, 10]),
+                },
+            ),
+            (
+                "momentum_portfolio",
+                # the reference only holds stocks priced in the window, as ranked by moment
+                {
+                    "tickers": tickers(rng.randint(1, 10), priced),
+                    "start": start,
+                    "period": period,
+                },
+            ),
+            ("m_strategy", strategy),
+            ("com_strategy", strategy | {"com": 0.007}),
+            (
+                "stop_strategy",
+                strategy | {"com": 0.007, "loss_rate": 0.05, "restart_nb": 1},
+            ),
+            (
+                "rolling_simulate",
+                {
+                    "start": strategy["date"],
+                    "end": strategy["date"] + pd.Timedelta(days=30),
+                    "n_quarters": rng.randint(1, 3),
+                    "com": 0.007,
+                    "loss_rate": loss_rate,
+                    "restart_nb": None if loss_rate is None else 1,
+                    "step": rng.choice([5, 10]),
+                },
+            ),
+            (
+                "cost_model",
+                strategy
+                | {
+                    "model": {
+                        "proportional": rng.choice(
+                            [0.0005, {t: 0.002 for t in tickers(20).split("-")}]
+                        ),
+                        "fixed": rng.choice([0, 1]),
+                        "capital": 10000,
+                    }
+                },
+            ),
+        ]
+    return drawn
+
+
+def _cases(engine, params):
+    # the fast path and the reference of a scenario, as two calls
+    import backtester
+    import bootstrap
+    import momentum
+    import reference
+    import registry
+    from load_data import sp500_data
+
+    p = dict(params)
+    if engine == "rebalance":
+        prices = sp500_data[p["tickers"].split("-")].dropna()
+        return (
+            lambda: backtester.rebalance(prices.copy(), p["period"])[0],
+            lambda: reference.rebalance(prices.copy(), p["period"])[0],
+        )
+    if engine == "given_portfolio":
+        args = p["tickers"], p["startY"], p["nb_years"]
+        columns = ["SPY", "ROI", "REBALANCED"]
+        return (
+            lambda: backtester.given_portfolio(*args)[0][columns],
+            lambda: reference.given_portfolio(*args)[0][columns],
+        )
+    if engine == "simulate":
+        seed = p.pop("seed")
+        columns = ["TICKERS", "ROI", "REBALANCED", "SPY"]
+
+        def fast():
+            random.seed(seed)
+            return backtester.simulate(**p)[0][columns]
+
+        def oracle():
+            random.seed(seed)
+            return reference.simulate(**p)[0][columns]
+
+        return fast, oracle
+    if engine == "simulate_paths":
+        seed = p.pop("seed")
+        # copied, the generator reuses its arrays from one batch to the next
+        batches = [
+            (ids.copy(), prices.copy(), spy.copy())
+            for ids, prices, spy in bootstrap.synthetic_paths(
+                p["startY"],
+                p["nb_years"],
+                p["nb_trials"],
+                252 * p["nb_years"],
+                batch=4,
+                seed=seed,
+            )
+        ]
+        drawn = {}
+
+        def fast():
+            random.seed(seed)
+            drawn["stats"] = backtester.simulate(**p, paths=iter(batches))[0]
+            return drawn["stats"][["TICKERS", "ROI", "REBALANCED", "SPY"]]
+
+        def oracle():
+            # like random.sample, no portfolio larger than the universe of the paths
+            if p["nb_stocks"] > batches[0][0].size:
+                raise ValueError("sample larger than population")
+            # each trial holds the portfolio drawn by the fast path on its own path
+            trials = [
+                (ids, r, s) for ids, prices, spy in batches for r, s in zip(prices, spy)
+            ]
+            rows = []
+            for tickers, (ids, prices, spy) in zip(drawn["stats"]["TICKERS"], trials):
+                order = np.argsort(ids)
+                held = order[
+                    np.searchsorted(ids, registry.parse(tickers), sorter=order)
+                ]
+                portfolio = pd.DataFrame(prices[:, held].astype("float64"))
+                cumulative = portfolio / portfolio.iloc[0]
+                rows.append(
+                    {
+                        "TICKERS": tickers,
+                        "ROI": cumulative.mean(axis=1).iloc[-1],
+                        "REBALANCED": reference.rebalance(portfolio, 252)[0].iloc[-1],
+                        "SPY": float(spy[-1]),
+                    }
+                )
+            return pd.DataFrame(rows)
+
+        return fast, oracle
+    if engine == "simulate_analytic":
+        quantiles = ["N", "MEAN", "STD", "SKEW"]
+        if p["nb_stocks"] == 1:
+            quantiles += [f"Q{round(100 * q)}" for q in backtester.QUANTILES]
+
+        def oracle():
+            # the distribution of every portfolio of the eligible universe, enumerated
+            startY, nb_years = p["startY"], p["nb_years"]
+            ratios = []
+            for ticker in reference.SP500_tickers(startY, nb_years).split("-"):
+                prices = reference.given_portfolio(ticker, startY, nb_years)[1]
+                ratios.append(prices.iloc[-1, 0] / prices.iloc[0, 0])
+            means = np.array(
+                [np.mean(c) for c in itertools.combinations(ratios, p["nb_stocks"])]
+            )
+            mean, std = means.mean(), means.std()
+            distribution = {
+                "N": float(len(ratios)),
+                "MEAN": mean,
+                "STD": std,
+                "SKEW": np.mean((means - mean) ** 3) / std**3,
+            }
+            for q in backtester.QUANTILES:
+                distribution[f"Q{round(100 * q)}"] = np.quantile(means, q)
+            return pd.Series(distribution)[quantiles]
+
+        return (
+            lambda: backtester.simulate(**p, nb_trials=0, analytic=True)[1][quantiles],
+            oracle,
+        )
+    if engine == "moment":
+        return lambda: momentum.moment(**p), lambda: reference.moment(**p)
+    if engine == "MomentumRank":
+        date = p.pop("date")
+        return (
+            lambda: momentum.MomentumRank(**p).update(date).frame(),
+            lambda: reference.moment(date, p["lookback"] / 12, p["top_n"]),
+        )
+    if engine == "momentum_portfolio":
+        tickers = p.pop("tickers").split("-")
+
+        def fast():
+            roi, _, spy_roi, _ = momentum.momentum_portfolio(tickers, **p)
+            return [roi, spy_roi]
+
+        def oracle():
+            roi, _, spy_roi = reference.momentum_portfolio(tickers, **p)
+            return [roi, spy_roi]
+
+        return fast, oracle
+    if engine == "rolling_simulate":
+
+        def oracle():
+            index = sp500_data.index
+            origins = index[(index >= p["start"]) & (index <= p["end"])][:: p["step"]]
+            rows = []
+            for origin in origins:
+                if p["loss_rate"] is None:
+                    strategy = reference.com_strategy(origin, p["n_quarters"], p["com"])
+                else:
+                    strategy = reference.stop_strategy(
+                        origin,
+                        p["n_quarters"],
+                        p["com"],
+                        p["loss_rate"],
+                        p["restart_nb"],
+                    )
+                rows.append(strategy[["CROI", "CSPY"]].iloc[-1].add_prefix("Final_"))
+            return pd.DataFrame(rows, index=pd.Index(origins, name="Origin"))
+
+        return lambda: momentum.rolling_simulate(**p), oracle
+    if engine == "cost_model":
+        model = p.pop("model")
+        return (
+            lambda: momentum.com_strategy(com=0.0, cache={}, cost_model=model, **p),
+            lambda: _charged_strategy(model=model, **p),
+        )
+    if engine == "m_strategy":
+        columns = ["ROI", "SPY", "CROI", "CSPY"]
+        return (
+            lambda: momentum.m_strategy(**p)[columns],
+            lambda: reference.m_strategy(**p)[columns],
+        )
+    fast, oracle = getattr(momentum, engine), getattr(reference, engine)
+    return lambda: fast(cache={}, **p), lambda: oracle(**p)
+
+
+def _charged_strategy(date, n_quarters, model):
+    # the momentum strategy of the reference engines, charged the weights traded at every rebalancing
+    import reference
+
+    def cost(spec, ticker):
+        return spec.get(ticker, 0.0) if isinstance(spec, dict) else spec
+
+    value, gross, weights = 1.0, 1.0, {}
+    dates, values, paid = [], [], []
+    for quarter in range(n_quarters + 1):
+        target = {}
+        if quarter < n_quarters:
+            tickers = list(reference.moment(date, 1, 10).index)
+            target = {ticker: 1 / len(tickers) for ticker in tickers}
+        traded = {
+            ticker: abs(target.get(ticker, 0.0) - weights.get(ticker, 0.0))
+            for ticker in target.keys() | weights.keys()
+        }
+        rate = sum(w * cost(model["proportional"], t) for t, w in traded.items())
+        fees = sum(cost(model["fixed"], t) for t, w in traded.items() if w > 1e-12)
+        net = gross * (1 - rate) * value - fees / model["capital"]
+        paid.append(gross * value - net)
+        value = net
+        values.append(value)
+        dates.append(date)
+        if target:
+            # the weights drifted by the quarter held
+            growth = reference.momentum_portfolio(list(target), date, 63)[1].iloc[-1]
+            held = {t: w * growth[t] for t, w in target.items()}
+            gross = sum(held.values())
+            weights = {t: v / gross for t, v in held.items()}
+        else:
+            gross, weights = 1.0, {}
+        date = date + pd.offsets.BDay(63)
+    return pd.DataFrame(
+        {"COM": paid, "CROI": values}, index=pd.DatetimeIndex(dates, name="Date")
+    )
+
+
+def compare(fast, oracle):
+    """Measures the deviation of a fast result from its reference.
+
+    Columns of the fast path that the reference does not have, e.g. the universe benchmark, are not compared.
+
+    Args:
+        fast: The result of the fast path, a DataFrame, Series or scalar.
+        oracle: The result of the reference.
+
+    Returns:
+        tuple: A tuple containing two elements:
+        - deviation (float): The largest relative deviation of the numbers, inf if the results differ otherwise
+        - detail (str): What differs, empty if only numbers do
+    """
+    if isinstance(oracle, pd.Series):
+        fast, oracle = fast.to_frame(), oracle.to_frame()
+    if not isinstance(oracle, pd.DataFrame):
+        return _deviation(np.atleast_1d(fast), np.atleast_1d(oracle)), ""
+
+    absent = oracle.columns.difference(fast.columns)
+    if absent.size:
+        return np.inf, f"columns {list(absent)} missing"
+    fast = fast[oracle.columns]
+    if fast.shape != oracle.shape:
+        return np.inf, f"shape {fast.shape} != {oracle.shape}"
+    if not fast.index.equals(oracle.index):
+        return np.inf, "index"
+
+    deviation = 0.0
+    for column in oracle.columns:
+        a, b = fast[column].to_numpy(), oracle[column].to_numpy()
+        if column in ("Portfolio", "TICKERS") or b.dtype == bool:
+            if list(map(_key, a)) != list(map(_key, b)):
+                return np.inf, f"{column} differs"
+            continue
+        deviation = max(deviation, _deviation(a.astype(float), b.astype(float)))
+    return deviation, ""
+
+
+def _key(value):
+    return sorted(value) if isinstance(value, (set, frozenset)) else value
+
+
+def _deviation(a, b):
+    if a.shape != b.shape or not np.array_equal(np.isnan(a), np.isnan(b)):
+        return np.inf
+    ok = ~np.isnan(b)
+    if not ok.any():
+        return 0.0
+    return float(np.max(np.abs(a[ok] - b[ok]) / np.maximum(np.abs(b[ok]), 1)))
+
+
+def check_scenarios(seed, n):
+    """Runs every scenario with the fast path and the reference, in the current process.
+
+    Args:
+        seed (int): Seed of the scenarios.
+        n (int): Number of scenarios per engine.
+
+    Returns:
+        list: A dict per scenario with the engine, parameters, deviation, outcome and seconds of both calls.
+    """
+    rows = []
+    for engine, params in scenarios(seed, n):
+        results, seconds = [], []
+        for call in _cases(engine, params):
+            clock = time.perf_counter()
+            try:
+                results.append(call())
+            except (KeyError, IndexError, ValueError, ZeroDivisionError) as e:
+                results.append(type(e).__name__)
+            seconds.append(time.perf_counter() - clock)
+
+        if isinstance(results[0], str) or isinstance(results[1], str):
+            errors = [r if isinstance(r, str) else "result" for r in results]
+            deviation, detail = (
+                (0.0, "")
+                if errors[0] == errors[1]
+                else (np.inf, f"{errors[0]} != {errors[1]}")
+            )
+        else:
+            deviation, detail = compare(*results)
+        rows.append(
+            {
+                "Engine": engine,
+                "Scenario": json.dumps(params, default=str),
+                "Deviation": deviation,
+                "Detail": detail,
+                "Fast": seconds[0],
+                "Reference": seconds[1],
+            }
+        )
+    return rows
+
+
+def run(seeds=(0, 1), n=5):
+    """Checks the fast paths against the references on synthetic universes.
+
+    Each universe is written to a temporary folder and loaded by its own process, which publishes its own dataset segment there.
+
+    Args:
+        seeds (tuple, optional): One universe per seed. Defaults to (0, 1).
+        n (int, optional): Number of scenarios per engine and universe. Defaults to 5.
+
+    Returns:
+        pd.DataFrame: One row per scenario with the Deviation, Tolerance, OK flag and the Fast and Reference seconds.
+
+    Examples:
+        >>> report = run()
+        >>> print(summary(report))
+    """
+    rows = []
+    for seed in seeds:
+        with tempfile.TemporaryDirectory() as folder:
+            synthetic_dataset(folder, seed)
+            env = dict(
+                os.environ,
+                PORTFOLIO_SHARED_DIR=os.path.join(folder, "shm"),
+                PORTFOLIO_SNAPSHOT_DIR=os.path.join(folder, "snapshot"),
+                PYTHONPATH=APP_DIR,
+            )
+            done = subprocess.run(
+                [
+                    sys.executable,
+                    os.path.abspath(__file__),
+                    "--worker",
+                    str(seed),
+                    str(n),
+                ],
+                cwd=folder,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            if done.returncode:
+                raise RuntimeError(done.stderr.strip().splitlines()[-1])
+            rows += [
+                dict(row, Universe=seed)
+                for row in json.loads(done.stdout.splitlines()[-1])
+            ]
+
+    report = pd.DataFrame(rows)
+    report["Tolerance"] = report["Engine"].map(TOLERANCES)
+    report["OK"] = report["Deviation"] <= report["Tolerance"]
+    return report
+
+
+def summary(report):
+    """Sums up a report per engine.
+
+    Args:
+        report (pd.DataFrame): A report of run.
+
+    Returns:
+        pd.DataFrame: Number of scenarios and mismatches, largest deviation and median speedup of each engine.
+    """
+    speedup = report["Reference"] / report["Fast"]
+    return (
+        report.assign(Speedup=speedup, Mismatch=~report["OK"])
+        .groupby("Engine", sort=False)
+        .agg(
+            Scenarios=("OK", "size"),
+            Mismatches=("Mismatch", "sum"),
+            Deviation=("Deviation", "max"),
+            Tolerance=("Tolerance", "first"),
+            Speedup=("Speedup", "median"),
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fast paths against the reference engines"
+    )
+    parser.add_argument(
+        "--seeds", type=int, default=2, help="number of synthetic universes"
+    )
+    parser.add_argument(
+        "-n", type=int, default=5, help="scenarios per engine and universe"
+    )
+    parser.add_argument("--worker", nargs=2, type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        import warnings
+
+        warnings.simplefilter("ignore", FutureWarning)
+        print(json.dumps(check_scenarios(*args.worker)))
+        sys.exit()
+
+    report = run(tuple(range(args.seeds)), args.n)
+    print(summary(report).to_string(float_format="{:.3g}".format))
+    for row in report[~report["OK"]].itertuples():
+        print("MISMATCH", row.Engine, row.Scenario, row.Deviation, row.Detail)
+    sys.exit(0 if report["OK"].all() else 1)
+
+
+# DEBUGGING
+
+# 1. One universe, more scenarios
+# print(summary(run((0,), 20)))
+
+# 2. Scenarios of a universe
+# synthetic_dataset("/tmp/universe")
+# $ cd /tmp/universe && PYTHONPATH=<app> python -c "import verify; print(verify.scenarios(0, 2))"